@@ -0,0 +1,442 @@
+"""
+⏱️ AI BRAIN BENCHMARK
+Dict scan vs CSR matrix retrieval speed, LSH recall vs latency, batch throughput,
+fuzzy trigram recall on misspelled queries, learn/recall/persistence suite (JSON results)
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import platform
+import tempfile
+import numpy as np
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from AI_BRAIN import NeuralAI
+
+# সিন্থেটিক শব্দভান্ডার (বাংলা + ইংরেজি)
+BASE_WORDS = [
+    "আমি", "তুমি", "কেমন", "আছো", "ভালো", "নাম", "কি", "তোমার", "আমার",
+    "hello", "how", "are", "you", "name", "what", "bot", "credit", "payment",
+    "salam", "kemon", "acho", "valo", "namaz", "time", "help", "thanks"
+]
+
+# সিন্থেটিক বাংলা শব্দের জন্য ব্যঞ্জন + কার
+BANGLA_CONSONANTS = "কখগঘচছজঝটঠডঢতথদধনপফবভমযরলশসহ"
+BANGLA_VOWEL_SIGNS = ["", "া", "ি", "ী", "ু", "ূ", "ে", "ো"]
+
+def make_vocabulary(size, seed=42, bangla_ratio=0.0):
+    """বেস শব্দ + সিন্থেটিক শব্দ (bangla_ratio অংশ বাংলা অক্ষরে)"""
+    rng = random.Random(seed)
+    words = list(BASE_WORDS)
+    while len(words) < size:
+        if bangla_ratio and rng.random() < bangla_ratio:
+            words.append("".join(rng.choice(BANGLA_CONSONANTS) + rng.choice(BANGLA_VOWEL_SIGNS)
+                                 for _ in range(rng.randint(2, 4))))
+        else:
+            words.append("".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 8))))
+    return words
+
+def make_question(rng, words):
+    """জিপফ-সদৃশ বণ্টনে একটি প্রশ্ন"""
+    length = rng.randint(2, 8)
+    return " ".join(words[min(int(rng.paretovariate(1.2)) - 1, len(words) - 1)] for _ in range(length))
+
+@contextmanager
+def build_brain(size, seed=42, vocabulary_size=20000, **brain_kwargs):
+    """learn_pattern বাইপাস করে সরাসরি প্যাটার্ন ভরা ব্রেইন
+    
+    with ব্লক শেষে ব্রেইনের থ্রেড বন্ধ ও অস্থায়ী ফোল্ডার মুছে যায়।
+    """
+    rng = random.Random(seed)
+    words = make_vocabulary(vocabulary_size, seed)
+    
+    brain_kwargs.setdefault("use_index", False)
+    with tempfile.TemporaryDirectory() as workdir:
+        brain = NeuralAI(memory_path=Path(workdir) / "ai_brain.json", **brain_kwargs)
+        brain._save_brain = lambda: None
+        try:
+            _fill_brain(brain, size, rng, words)
+            yield brain
+        finally:
+            brain.close(save=False)
+
+def _fill_brain(brain, size, rng, words):
+    for i in range(size):
+        question = f"{make_question(rng, words)} {i}"
+        q_hash = hashlib.md5(question.encode()).hexdigest()
+        brain.patterns[q_hash] = {
+            "question": question,
+            "vector": brain._text_to_vector(question, learn=True),
+            "responses": [f"response {i}"],
+            "confidence": rng.choice([0.7, 0.8, 0.9, 1.0]),
+            "learned_from": [0],
+            "learned_at": "",
+            "used_count": 0,
+            "success_rate": 1.0
+        }
+    
+    brain.index.rebuild(brain.patterns)
+    if brain.matrix is not None:
+        brain.matrix.rebuild(brain.patterns)
+
+def time_queries(brain, queries):
+    """প্রতি কোয়েরির গড় সময় (ms)"""
+    start = time.perf_counter()
+    results = [brain._match(q) for q in queries]
+    elapsed = time.perf_counter() - start
+    return elapsed * 1000 / len(queries), results
+
+def run_benchmark(sizes=(10000, 100000, 1000000), query_count=20, seed=7):
+    """প্রতিটি সাইজে dict বনাম matrix তুলনা"""
+    rng = random.Random(seed)
+    words = make_vocabulary(20000)
+    queries = [make_question(rng, words) for _ in range(query_count)]
+    
+    report = []
+    for size in sizes:
+        with build_brain(size, backend="dict") as dict_brain:
+            dict_ms, dict_results = time_queries(dict_brain, queries)
+        
+        with build_brain(size, backend="matrix") as matrix_brain:
+            matrix_ms, matrix_results = time_queries(matrix_brain, queries)
+        
+        row = {
+            "patterns": size,
+            "dict_ms": round(dict_ms, 3),
+            "matrix_ms": round(matrix_ms, 3),
+            "speedup": round(dict_ms / matrix_ms, 1) if matrix_ms else None,
+            "identical": [r[0] for r in dict_results] == [r[0] for r in matrix_results]
+        }
+        report.append(row)
+        print(f"📊 {size:>9} patterns | dict {row['dict_ms']:>10} ms | "
+              f"matrix {row['matrix_ms']:>8} ms | x{row['speedup']} | identical={row['identical']}")
+    
+    return report
+
+def make_near_queries(brain, count, seed=11):
+    """বিদ্যমান প্রশ্ন থেকে একটি শব্দ বদলে কাছাকাছি কোয়েরি"""
+    rng = random.Random(seed)
+    questions = [p["question"] for p in brain.patterns.values()]
+    queries = []
+    
+    for _ in range(count):
+        words = rng.choice(questions).split()
+        words[rng.randrange(len(words))] = rng.choice(BASE_WORDS)
+        queries.append(" ".join(words))
+    
+    return queries
+
+def run_lsh_report(size=100000, configs=((8, 8), (16, 4), (32, 2), (64, 1)), query_count=200):
+    """LSH bands/rows অনুযায়ী recall@1 বনাম লেটেন্সি (এক্স্যাক্ট স্ক্যানের তুলনায়)"""
+    with build_brain(size, backend="dict") as exact_brain:
+        queries = make_near_queries(exact_brain, query_count)
+        exact_ms, exact_results = time_queries(exact_brain, queries)
+    expected = [r[0] for r in exact_results]
+    answerable = sum(1 for r in expected if r)
+    print(f"📊 exact scan | {size} patterns | {exact_ms:.3f} ms | {answerable}/{query_count} answerable")
+    
+    report = [{"mode": "exact", "patterns": size, "latency_ms": round(exact_ms, 3), "recall": 1.0}]
+    for bands, rows in configs:
+        with build_brain(size, use_index=True, index_type="lsh", lsh_bands=bands, lsh_rows=rows) as lsh_brain:
+            lsh_ms, lsh_results = time_queries(lsh_brain, queries)
+        
+        hits = sum(1 for want, got in zip(expected, lsh_results) if want and got[0] == want)
+        row = {
+            "mode": f"lsh b={bands} r={rows}",
+            "patterns": size,
+            "latency_ms": round(lsh_ms, 3),
+            "recall": round(hits / answerable, 3) if answerable else None
+        }
+        report.append(row)
+        print(f"📊 {row['mode']:<14} | {row['latency_ms']:>9} ms | recall@1 {row['recall']}")
+    
+    return report
+
+def run_batch_benchmark(size=100000, batch_size=500, seed=13):
+    """একটা একটা করে স্কোরিং বনাম match_batch (matrix ব্যাকএন্ড)"""
+    rng = random.Random(seed)
+    words = make_vocabulary(20000)
+    queries = [make_question(rng, words) for _ in range(batch_size)]
+    with build_brain(size, backend="matrix") as brain:
+        start = time.perf_counter()
+        single = [brain._match(q) for q in queries]
+        single_s = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        batched = brain.match_batch(queries)
+        batch_s = time.perf_counter() - start
+    
+    row = {
+        "patterns": size,
+        "batch_size": batch_size,
+        "single_qps": round(batch_size / single_s, 1),
+        "batch_qps": round(batch_size / batch_s, 1),
+        "identical": single == batched
+    }
+    print(f"📊 {size} patterns | {batch_size} queries | single {row['single_qps']} q/s | "
+          f"batch {row['batch_qps']} q/s | identical={row['identical']}")
+    return row
+
+def misspell(rng, word):
+    """একটা এলোমেলো বানান ভুল: বাদ, অদলবদল, বদল বা দ্বিগুণ অক্ষর"""
+    i = rng.randrange(len(word))
+    kind = rng.choice(("delete", "swap", "replace", "double"))
+    
+    if kind == "delete":
+        return word[:i] + word[i + 1:]
+    if kind == "swap" and i < len(word) - 1:
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    if kind == "replace":
+        return word[:i] + rng.choice(word) + word[i + 1:]
+    return word[:i] + word[i] + word[i:]
+
+def make_typo_queries(brain, count, seed=17):
+    """বিদ্যমান প্রশ্নের একটা বড় শব্দে বানান ভুল → (ভুল কোয়েরি, শুদ্ধ প্রশ্ন)"""
+    rng = random.Random(seed)
+    questions = [p["question"] for p in brain.patterns.values()]
+    queries = []
+    
+    while len(queries) < count:
+        question = rng.choice(questions)
+        words = question.split()
+        long_words = [i for i, word in enumerate(words) if len(word) > 4]
+        if not long_words:
+            continue
+        
+        i = rng.choice(long_words)
+        words[i] = misspell(rng, words[i])
+        queries.append((" ".join(words), question))
+    
+    return queries
+
+def run_fuzzy_report(size=100000, query_count=500, threshold=0.3):
+    """বানান ভুল কোয়েরিতে শুধু word index বনাম trigram fuzzy - recall@1, no_match ও লেটেন্সি
+    
+    recall@1: ভুল কোয়েরি শুদ্ধ প্রশ্নের মতো একই প্যাটার্নে পৌঁছায় কিনা।
+    """
+    report = []
+    for fuzzy in (False, True):
+        with build_brain(size, use_index=True, fuzzy=fuzzy, fuzzy_threshold=threshold) as brain:
+            queries = make_typo_queries(brain, query_count)
+            expected = [brain._best_match(brain._text_to_vector(clean))[0] for _, clean in queries]
+            latency_ms, results = time_queries(brain, [typo for typo, _ in queries])
+        
+        hits = sum(1 for want, got in zip(expected, results) if got[0] == want)
+        misses = sum(1 for got in results if got[0] is None)
+        row = {
+            "mode": "trigram" if fuzzy else "word",
+            "patterns": size,
+            "latency_ms": round(latency_ms, 3),
+            "recall": round(hits / query_count, 3),
+            "no_match": round(misses / query_count, 3)
+        }
+        report.append(row)
+        print(f"📊 {row['mode']:<7} | {size} patterns | {row['latency_ms']:>8} ms | "
+              f"recall@1 {row['recall']} | no_match {row['no_match']}")
+    
+    return report
+
+def current_rss_mb():
+    """প্রসেসের বর্তমান RSS (MB) - psutil না থাকলে /proc বা ru_maxrss"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1024 / 1024
+    except ImportError:
+        pass
+    
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def latency_stats(samples, total_s=None):
+    """সেকেন্ডের স্যাম্পল → p50/p99/mean (ms) ও throughput"""
+    ms = np.array(samples) * 1000
+    total_s = total_s if total_s is not None else float(np.sum(samples))
+    return {
+        "count": len(samples),
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p99_ms": round(float(np.percentile(ms, 99)), 4),
+        "mean_ms": round(float(np.mean(ms)), 4),
+        "ops_per_s": round(len(samples) / total_s, 1) if total_s else None
+    }
+
+def _measure_suite(brain, workdir, questions, queries, backend):
+    """run_suite এর learn/recall/persistence মাপ"""
+    # learn
+    samples = []
+    start = time.perf_counter()
+    for i, question in enumerate(questions):
+        t = time.perf_counter()
+        brain.learn_pattern(question, f"response {i}", i % 1000)
+        samples.append(time.perf_counter() - t)
+    learn = latency_stats(samples, time.perf_counter() - start)
+    rss_learned = current_rss_mb()
+    
+    # recall
+    samples = []
+    answered = 0
+    start = time.perf_counter()
+    for i, query in enumerate(queries):
+        t = time.perf_counter()
+        answered += brain.find_response(query, i % 1000) is not None
+        samples.append(time.perf_counter() - t)
+    recall = latency_stats(samples, time.perf_counter() - start)
+    recall["answered"] = round(answered / len(queries), 4)
+    
+    # persistence: পুরো স্ন্যাপশট, JSON ও বাইনারি
+    persistence = {}
+    for fmt, suffix in (("json", ".json"), ("binary", ".bin")):
+        brain.memory_path = workdir / f"ai_brain{suffix}"
+        start = time.perf_counter()
+        brain._save_brain()
+        persistence[fmt] = {
+            "save_ms": round((time.perf_counter() - start) * 1000, 2),
+            "size_mb": round(brain.memory_path.stat().st_size / 1024 / 1024, 3)
+        }
+    
+    start = time.perf_counter()
+    loaded = NeuralAI(memory_path=workdir / "ai_brain.bin", backend=backend, write_behind=False)
+    persistence["binary"]["load_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    loaded.close(save=False)
+    
+    return learn, recall, persistence, rss_learned
+
+def run_suite(size=10000, query_count=1000, seed=42, backend="dict", **brain_kwargs):
+    """আসল learn_pattern/find_response/সেভ দিয়ে পুরো পাইপলাইন মাপা
+    
+    ব্যাকগ্রাউন্ড রাইটার বন্ধ রাখা হয় যাতে learn/recall এর মাপে ডিস্ক না ঢোকে;
+    persistence আলাদা করে JSON ও বাইনারি স্ন্যাপশটে মাপা হয়।
+    """
+    rng = random.Random(seed)
+    words = make_vocabulary(20000, seed, bangla_ratio=0.5)
+    questions = [f"{make_question(rng, words)} {i}" for i in range(size)]
+    queries = [make_question(rng, words) for _ in range(query_count // 2)]
+    queries += [rng.choice(questions) for _ in range(query_count - len(queries))]
+    rng.shuffle(queries)
+    
+    rss_start = current_rss_mb()
+    
+    brain_kwargs.setdefault("write_interval", 10 ** 9)
+    brain_kwargs.setdefault("write_every", 10 ** 12)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        brain = NeuralAI(memory_path=workdir / "ai_brain.json", backend=backend, **brain_kwargs)
+        try:
+            learn, recall, persistence, rss_learned = _measure_suite(brain, workdir, questions, queries, backend)
+        finally:
+            brain.close(save=False)
+    
+    result = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "patterns": size,
+            "queries": query_count,
+            "seed": seed,
+            "backend": backend,
+            "brain_kwargs": {k: v for k, v in brain_kwargs.items() if isinstance(v, (int, float, str, bool))}
+        },
+        "learn": learn,
+        "recall": recall,
+        "persistence": persistence,
+        "rss_mb": {
+            "start": round(rss_start, 1),
+            "after_learn": round(rss_learned, 1),
+            "end": round(current_rss_mb(), 1)
+        }
+    }
+    
+    print(f"📊 {size} patterns ({backend}) | learn p50 {learn['p50_ms']} ms p99 {learn['p99_ms']} ms "
+          f"{learn['ops_per_s']}/s | recall p50 {recall['p50_ms']} ms p99 {recall['p99_ms']} ms "
+          f"{recall['ops_per_s']}/s | save json {persistence['json']['save_ms']} ms "
+          f"bin {persistence['binary']['save_ms']} ms | RSS {result['rss_mb']['end']} MB")
+    return result
+
+# বেসলাইনের তুলনায় যেগুলো বাড়লে রিগ্রেশন (কম ভালো)
+REGRESSION_METRICS = [
+    ("learn", "p50_ms"), ("learn", "p99_ms"),
+    ("recall", "p50_ms"), ("recall", "p99_ms"),
+    ("persistence", "json", "save_ms"), ("persistence", "binary", "save_ms"),
+    ("rss_mb", "end")
+]
+
+def compare_results(current, baseline, tolerance=0.25):
+    """tolerance এর বেশি খারাপ হওয়া মেট্রিকের তালিকা"""
+    regressions = []
+    for path in REGRESSION_METRICS:
+        now, before = current, baseline
+        for key in path:
+            now, before = now.get(key, {}), before.get(key, {})
+        if not isinstance(now, (int, float)) or not isinstance(before, (int, float)) or before <= 0:
+            continue
+        
+        change = (now - before) / before
+        if change > tolerance:
+            regressions.append({"metric": ".".join(path), "baseline": before,
+                                "current": now, "change": round(change, 3)})
+    return regressions
+
+def run_suite_cli(args):
+    """suite N [--backend matrix] [--queries Q] [--out file.json] [--baseline file.json] [--tolerance 0.25]"""
+    options = {"--backend": "dict", "--queries": "1000", "--out": "benchmark_results.json",
+               "--baseline": None, "--tolerance": "0.25"}
+    positional = []
+    i = 0
+    while i < len(args):
+        if args[i] in options:
+            options[args[i]] = args[i + 1]
+            i += 2
+        else:
+            positional.append(args[i])
+            i += 1
+    
+    result = run_suite(int(positional[0]) if positional else 10000,
+                       int(options["--queries"]), backend=options["--backend"])
+    
+    with open(options["--out"], 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"💾 Results written: {options['--out']}")
+    
+    if options["--baseline"]:
+        with open(options["--baseline"], 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(result, baseline, float(options["--tolerance"]))
+        for r in regressions:
+            print(f"❌ Regression {r['metric']}: {r['baseline']} → {r['current']} (+{r['change'] * 100:.0f}%)")
+        if regressions:
+            sys.exit(1)
+        print("✅ No regressions against baseline")
+
+if __name__ == "__main__":
+    # ব্যবহার: python AI_BENCHMARK.py 10000,100000,1000000
+    #          python AI_BENCHMARK.py lsh 100000
+    #          python AI_BENCHMARK.py batch 100000
+    #          python AI_BENCHMARK.py fuzzy 100000
+    #          python AI_BENCHMARK.py suite 100000 --out results.json --baseline baseline.json
+    if len(sys.argv) > 1 and sys.argv[1] == "lsh":
+        run_lsh_report(int(sys.argv[2]) if len(sys.argv) > 2 else 100000)
+    elif len(sys.argv) > 1 and sys.argv[1] == "batch":
+        run_batch_benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 100000)
+    elif len(sys.argv) > 1 and sys.argv[1] == "suite":
+        run_suite_cli(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "fuzzy":
+        run_fuzzy_report(int(sys.argv[2]) if len(sys.argv) > 2 else 100000)
+    else:
+        sizes = tuple(int(s) for s in sys.argv[1].split(",")) if len(sys.argv) > 1 else (10000, 100000, 1000000)
+        run_benchmark(sizes)
@@ -3,68 +3,1222 @@
 Self-learning neural network simulation
 """
 
+import os
 import json
 import hashlib
+import heapq
+import math
 import random
+import sqlite3
+import sys
+import threading
+import time
+import zlib
 import numpy as np
 from datetime import datetime
-from collections import defaultdict
+from collections import defaultdict, deque, OrderedDict
 from pathlib import Path
 
-class NeuralAI:
+from AI_BRAIN_FORMAT import MappedBrain, MappedPatterns, write_brain
+from utilities.CACHE_SYSTEM import SmartCache
+
+class Vocabulary:
+    """শব্দ → int আইডি ইন্টার্নিং - ব্রেইন, ইনডেক্স ও পারসিস্টেন্স সবাই এটাই শেয়ার করে"""
+    
+    def __init__(self, words=None):
+        self.words = list(words or [])
+        self.ids = {word: i for i, word in enumerate(self.words)}
+    
+    def intern(self, word):
+        """শব্দের আইডি, নতুন হলে যোগ করে"""
+        token = self.ids.get(word)
+        if token is None:
+            token = len(self.words)
+            self.words.append(word)
+            self.ids[word] = token
+        return token
+    
+    def get(self, word, default=None):
+        """শব্দের আইডি, নতুন শব্দ যোগ না করে"""
+        return self.ids.get(word, default)
+    
+    def word(self, token):
+        """টোকেন → শব্দ (অজানা শব্দ টোকেন হিসেবেই থাকে)"""
+        return self.words[token] if isinstance(token, int) else token
+    
+    def __len__(self):
+        return len(self.words)
+
+class TokenIndex:
+    """ইনভার্টেড ইনডেক্স - word id → pattern hash পোস্টিং লিস্ট"""
+    
     def __init__(self):
-        self.memory_path = Path("data/ai_brain.json")
-        self.memory_path.parent.mkdir(exist_ok=True)
+        self.postings = defaultdict(list)
+        self.order = {}  # pattern hash → ইনসার্শন ক্রম
+    
+    def add(self, p_hash, vector):
+        """নতুন প্যাটার্ন ইনডেক্সে যোগ"""
+        if p_hash in self.order:
+            return
         
-        self._load_brain()
+        self.order[p_hash] = len(self.order)
+        for token in vector:
+            self.postings[token].append(p_hash)
+    
+    def candidates(self, vector):
+        """অন্তত একটি টোকেন মেলে এমন প্যাটার্ন (ইনসার্শন ক্রমে)"""
+        found = set()
+        for token in vector:
+            found.update(self.postings.get(token, ()))
         
-        # AI প্যারামিটার
+        # স্ক্যানের মতো একই টাই-ব্রেক রাখতে ক্রম অনুযায়ী সাজান
+        return sorted(found, key=self.order.__getitem__)
+    
+    def rebuild(self, patterns):
+        """পুরো ইনডেক্স নতুন করে তৈরি"""
+        self.rebuild_rows((p_hash, pattern["vector"]) for p_hash, pattern in patterns.items())
+    
+    def rebuild_rows(self, rows):
+        """(pattern hash, টোকেন) জোড়া থেকে ইনডেক্স - mmap ব্রেইনে প্যাটার্ন ডিকোড ছাড়া"""
+        self.postings = defaultdict(list)
+        self.order = {}
+        for p_hash, vector in rows:
+            self.add(p_hash, vector)
+    
+    def stats(self):
+        """ইনডেক্স স্ট্যাটিস্টিক্স"""
+        return {
+            "indexed_patterns": len(self.order),
+            "indexed_tokens": len(self.postings)
+        }
+
+class MinHashLSH:
+    """MinHash-LSH ইনডেক্স - সাধারণ শব্দে ইনভার্টেড ইনডেক্স ফুলে গেলে আনুমানিক ক্যান্ডিডেট"""
+    
+    PRIME = (1 << 31) - 1
+    
+    def __init__(self, bands=16, rows=4, seed=1):
+        self.bands = bands
+        self.rows = rows
+        
+        rng = np.random.RandomState(seed)
+        num_perm = bands * rows
+        self._a = rng.randint(1, self.PRIME, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, self.PRIME, size=num_perm).astype(np.uint64)
+        
+        self.buckets = defaultdict(list)  # (band, সিগনেচার অংশ) → pattern hash
+        self.order = {}
+    
+    def signature(self, vector):
+        """টোকেন সেটের MinHash সিগনেচার"""
+        tokens = np.array([self._token_int(token) for token in vector], dtype=np.uint64) % self.PRIME
+        hashed = (self._a[:, None] * tokens[None, :] + self._b[:, None]) % self.PRIME
+        return hashed.min(axis=1)
+    
+    @staticmethod
+    def _token_int(token):
+        """word id সরাসরি; অজানা শব্দ (স্ট্রিং) হলে crc32"""
+        return token if isinstance(token, int) else zlib.crc32(token.encode('utf-8'))
+    
+    def _band_keys(self, vector):
+        """প্রতিটি ব্যান্ডের বাকেট কী"""
+        sig = self.signature(vector)
+        return [(band, sig[band * self.rows:(band + 1) * self.rows].tobytes())
+                for band in range(self.bands)]
+    
+    def add(self, p_hash, vector):
+        """নতুন প্যাটার্ন বাকেটে যোগ"""
+        if p_hash in self.order:
+            return
+        
+        self.order[p_hash] = len(self.order)
+        if not vector:
+            return
+        
+        for key in self._band_keys(vector):
+            self.buckets[key].append(p_hash)
+    
+    def candidates(self, vector):
+        """অন্তত একটি ব্যান্ডে মেলে এমন প্যাটার্ন (ইনসার্শন ক্রমে)"""
+        if not vector:
+            return []
+        
+        found = set()
+        for key in self._band_keys(vector):
+            found.update(self.buckets.get(key, ()))
+        
+        return sorted(found, key=self.order.__getitem__)
+    
+    def rebuild(self, patterns):
+        """পুরো ইনডেক্স নতুন করে তৈরি"""
+        self.rebuild_rows((p_hash, pattern["vector"]) for p_hash, pattern in patterns.items())
+    
+    def rebuild_rows(self, rows):
+        """(pattern hash, টোকেন) জোড়া থেকে ইনডেক্স - mmap ব্রেইনে প্যাটার্ন ডিকোড ছাড়া"""
+        self.buckets = defaultdict(list)
+        self.order = {}
+        for p_hash, vector in rows:
+            self.add(p_hash, vector)
+    
+    def stats(self):
+        """ইনডেক্স স্ট্যাটিস্টিক্স"""
+        return {
+            "indexed_patterns": len(self.order),
+            "buckets": len(self.buckets),
+            "bands": self.bands,
+            "rows": self.rows
+        }
+
+class TrigramIndex:
+    """ভোকাবুলারির শব্দের char-trigram → word id, বানান ভুল শব্দের কাছের শব্দ খুঁজতে
+    
+    pg_trgm এর মতো শব্দের আগে দুটো ও পরে একটা স্পেস প্যাড; মিল = trigram Jaccard।
+    পুরো ভোকাবুলারি স্ক্যান না করে শুধু কমন trigram এর পোস্টিং গোনা হয়।
+    """
+    
+    def __init__(self, threshold=0.3):
+        self.threshold = threshold
+        self.postings = defaultdict(list)
+        self.gram_counts = []
+    
+    @staticmethod
+    def grams(word):
+        padded = f"  {word} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+    
+    def sync(self, vocab):
+        """ভোকাবুলারির নতুন শব্দগুলো ইনডেক্সে তোলা (id ক্রমে অ্যাপেন্ড)"""
+        for token in range(len(self.gram_counts), len(vocab)):
+            grams = self.grams(vocab.words[token])
+            for gram in grams:
+                self.postings[gram].append(token)
+            self.gram_counts.append(len(grams))
+    
+    def closest(self, word):
+        """থ্রেশহোল্ডের উপরে সবচেয়ে কাছের শব্দের id, না থাকলে None"""
+        grams = self.grams(word)
+        shared = defaultdict(int)
+        for gram in grams:
+            for token in self.postings.get(gram, ()):
+                shared[token] += 1
+        
+        best_token = None
+        best_score = 0.0
+        for token, count in shared.items():
+            score = count / (len(grams) + self.gram_counts[token] - count)
+            # টাই হলে পুরনো (ছোট id) শব্দ
+            if score > best_score or (score == best_score and token < best_token):
+                best_token, best_score = token, score
+        
+        return best_token if best_score >= self.threshold else None
+    
+    def stats(self):
+        return {
+            "type": "trigram",
+            "words": len(self.gram_counts),
+            "grams": len(self.postings),
+            "threshold": self.threshold
+        }
+
+class PatternMatrix:
+    """CSR ম্যাট্রিক্স ব্যাকএন্ড - এক কোয়েরি = একটি স্পার্স mat-vec + argmax"""
+    
+    def __init__(self, capacity=1024):
+        self.vocab = {}    # word id → কলাম আইডি
+        self.hashes = []   # রো → pattern hash
+        self.rows = {}     # pattern hash → রো
+        self.nnz = 0
+        
+        # বাইনারি ব্রেইন থেকে attach করলে প্রথম base_rows রো mmap ফাইলে থাকে
+        self.base = None
+        self.base_rows = 0
+        
+        self.indptr = np.zeros(capacity + 1, dtype=np.int64)
+        self.indices = np.zeros(capacity * 4, dtype=np.int32)
+        self.row_ids = np.zeros(capacity * 4, dtype=np.int32)
+        self.data = np.zeros(capacity * 4, dtype=np.float64)
+        self.norms = np.zeros(capacity, dtype=np.float64)
+        self.confidence = np.zeros(capacity, dtype=np.float64)
+        
+        self._query_buffer = np.zeros(0, dtype=np.float64)
+    
+    @staticmethod
+    def _grow(array, needed):
+        """ক্যাপাসিটি দ্বিগুণ করে অ্যারে বড় করা"""
+        if needed <= len(array):
+            return array
+        
+        grown = np.zeros(max(needed, len(array) * 2), dtype=array.dtype)
+        grown[:len(array)] = array
+        return grown
+    
+    @property
+    def row_count(self):
+        return self.base_rows + len(self.hashes)
+    
+    def _hash_at(self, row):
+        """রো → pattern hash"""
+        if row < self.base_rows:
+            return self.base.hash_at(row)
+        return self.hashes[row - self.base_rows]
+    
+    def _row_of(self, p_hash):
+        """pattern hash → রো"""
+        row = self.rows.get(p_hash)
+        if row is None and self.base is not None:
+            row = self.base.row_of(p_hash)
+        return row
+    
+    def attach(self, mapped):
+        """mmap করা বাইনারি ব্রেইনের অ্যারে কপি ছাড়াই ব্যবহার
+        
+        প্রথম append এ _grow অ্যারেগুলো হিপে কপি করে (copy-on-grow)।
+        """
+        self.__init__(capacity=0)
+        self.base = mapped
+        self.base_rows = len(mapped)
+        self.vocab = dict(mapped.vocabulary())
+        self.nnz = mapped.nnz
+        
+        self.indptr = mapped.indptr
+        self.indices = mapped.indices
+        self.row_ids = mapped.row_ids
+        self.data = mapped.data
+        self.norms = mapped.norms
+        self.confidence = mapped.confidence
+    
+    def append(self, p_hash, vector, confidence):
+        """নতুন রো যোগ (ইনক্রিমেন্টাল)"""
+        if self._row_of(p_hash) is not None:
+            self.set_confidence(p_hash, confidence)
+            return
+        
+        row = self.row_count
+        end = self.nnz + len(vector)
+        
+        self.indptr = self._grow(self.indptr, row + 2)
+        self.indices = self._grow(self.indices, end)
+        self.row_ids = self._grow(self.row_ids, end)
+        self.data = self._grow(self.data, end)
+        self.norms = self._grow(self.norms, row + 1)
+        self.confidence = self._grow(self.confidence, row + 1)
+        
+        for offset, (token, count) in enumerate(vector.items()):
+            col = self.vocab.setdefault(token, len(self.vocab))
+            self.indices[self.nnz + offset] = col
+            self.data[self.nnz + offset] = count
+        
+        self.row_ids[self.nnz:end] = row
+        self.nnz = end
+        self.indptr[row + 1] = end
+        
+        # dict পাথের সাথে হুবহু মেলাতে একই সূত্রে নর্ম
+        self.norms[row] = sum(v**2 for v in vector.values()) ** 0.5
+        self.confidence[row] = confidence
+        
+        self.hashes.append(p_hash)
+        self.rows[p_hash] = row
+    
+    def set_confidence(self, p_hash, confidence):
+        """কনফিডেন্স কলাম আপডেট"""
+        row = self._row_of(p_hash)
+        if row is not None:
+            self.confidence[row] = confidence
+    
+    def rebuild(self, patterns):
+        """পুরো ম্যাট্রিক্স নতুন করে তৈরি"""
+        self.__init__(capacity=max(1024, len(patterns)))
+        for p_hash, pattern in patterns.items():
+            self.append(p_hash, pattern["vector"], pattern["confidence"])
+    
+    def scores(self, vector):
+        """সব রো এর কনফিডেন্স-ওয়েটেড cosine স্কোর"""
+        n = self.row_count
+        q_cols = [self.vocab[token] for token in vector if token in self.vocab]
+        
+        if n == 0 or not q_cols:
+            return np.zeros(n, dtype=np.float64)
+        
+        self._query_buffer = self._grow(self._query_buffer, len(self.vocab))
+        for token in vector:
+            if token in self.vocab:
+                self._query_buffer[self.vocab[token]] = vector[token]
+        
+        products = self.data[:self.nnz] * self._query_buffer[self.indices[:self.nnz]]
+        dots = np.bincount(self.row_ids[:self.nnz], weights=products, minlength=n)
+        
+        # বাফার পরিষ্কার - শুধু ছোঁয়া কলামগুলো
+        self._query_buffer[q_cols] = 0.0
+        
+        q_norm = sum(v**2 for v in vector.values()) ** 0.5
+        norms = self.norms[:n]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            similarity = np.where(norms > 0, dots / (q_norm * norms), 0.0)
+        
+        return similarity * self.confidence[:n]
+    
+    def best(self, vector, threshold):
+        """থ্রেশহোল্ডের উপরে সেরা রো → (pattern hash, score)"""
+        scores = self.scores(vector)
+        if not len(scores):
+            return None, 0.0
+        
+        scores[~(scores > threshold)] = -1.0
+        row = int(np.argmax(scores))  # প্রথম সর্বোচ্চ = স্ক্যানের টাই-ব্রেক
+        
+        if scores[row] <= threshold:
+            return None, 0.0
+        return self._hash_at(row), float(scores[row])
+    
+    def top_k(self, vector, k, threshold):
+        """থ্রেশহোল্ডের উপরে সেরা k রো → [(pattern hash, score), ...] (স্কোর কমে, টাই হলে আগের রো)"""
+        scores = self.scores(vector)
+        rows = np.flatnonzero(scores > threshold)
+        
+        if len(rows) > k:
+            # argpartition এ k-তম স্কোর, তারপর সীমানার টাই সহ শুধু ওগুলো সাজানো
+            kth = scores[rows[np.argpartition(-scores[rows], k - 1)[k - 1]]]
+            rows = rows[scores[rows] >= kth]
+        
+        rows = rows[np.lexsort((rows, -scores[rows]))][:k]
+        return [(self._hash_at(int(row)), float(scores[row])) for row in rows]
+    
+    def best_batch(self, vectors, threshold):
+        """অনেক কোয়েরির সেরা রো - nnz একবার ফিল্টার, তারপর শুধু ক্যান্ডিডেট রো তে স্কোর"""
+        results = [(None, 0.0)] * len(vectors)
+        
+        # ব্যাচের কোয়েরিতে থাকা কলাম → লোকাল কলাম
+        local = {}
+        for vector in vectors:
+            for token in vector:
+                col = self.vocab.get(token)
+                if col is not None:
+                    local.setdefault(col, len(local))
+        
+        if self.row_count == 0 or not local:
+            return results
+        
+        weights = np.zeros((len(local), len(vectors)), dtype=np.float64)
+        for b, vector in enumerate(vectors):
+            for token, count in vector.items():
+                col = self.vocab.get(token)
+                if col is not None:
+                    weights[local[col], b] = count
+        
+        col_map = np.full(len(self.vocab), -1, dtype=np.int64)
+        col_map[np.fromiter(local.keys(), dtype=np.int64, count=len(local))] = np.arange(len(local))
+        
+        # ব্যাচের কোনো কলাম ছোঁয় এমন nnz (পুরো ম্যাট্রিক্সে একবারই পাস)
+        mapped = col_map[self.indices[:self.nnz]]
+        selected = np.nonzero(mapped >= 0)[0]
+        mapped = mapped[selected]
+        data = self.data[selected]
+        
+        # ক্যান্ডিডেট রো সাজানো থাকে, তাই argmax এর টাই-ব্রেক স্ক্যানের মতোই
+        candidates, row_local = np.unique(self.row_ids[selected], return_inverse=True)
+        norms = self.norms[candidates]
+        confidence = self.confidence[candidates]
+        
+        for b, vector in enumerate(vectors):
+            q_norm = sum(v**2 for v in vector.values()) ** 0.5
+            if not q_norm:
+                continue
+            
+            dots = np.bincount(row_local, weights=data * weights[mapped, b], minlength=len(candidates))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                similarity = np.where(norms > 0, dots / (q_norm * norms), 0.0)
+            
+            scores = similarity * confidence
+            scores[~(scores > threshold)] = -1.0
+            best = int(np.argmax(scores))
+            
+            if scores[best] > threshold:
+                results[b] = (self._hash_at(int(candidates[best])), float(scores[best]))
+        
+        return results
+    
+    def stats(self):
+        """ম্যাট্রিক্স স্ট্যাটিস্টিক্স"""
+        return {
+            "rows": self.row_count,
+            "vocabulary": len(self.vocab),
+            "nnz": self.nnz
+        }
+
+class BrainJournal:
+    """অ্যাপেন্ড-অনলি জার্নাল - প্রতি মিউটেশনে একটি কম্প্যাক্ট JSON লাইন"""
+    
+    def __init__(self, path, fsync=False):
+        self.path = Path(path)
+        self.fsync = fsync
+        self.pending = 0  # শেষ স্ন্যাপশটের পর রেকর্ড সংখ্যা
+        self._file = None
+    
+    def append(self, record):
+        """একটি রেকর্ড যোগ"""
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        
+        self.pending += 1
+    
+    def replay(self):
+        """পুরনো সেগমেন্ট তারপর চলতি জার্নাল থেকে সব বৈধ রেকর্ড; ক্র্যাশে ছেঁড়া শেষ অংশ কেটে ফেলা"""
+        records = []
+        for path in self.segments() + [self.path]:
+            if path.exists():
+                records.extend(self._read(path))
+        
+        self.pending = len(records)
+        return records
+    
+    def _read(self, path):
+        records = []
+        good_offset = 0
+        
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("incomplete record")
+                    records.append(json.loads(line.decode('utf-8')))
+                except ValueError:
+                    print(f"⚠️ Journal truncated at byte {good_offset}")
+                    break
+                good_offset += len(line)
+        
+        if good_offset < path.stat().st_size:
+            with open(path, 'r+b') as f:
+                f.truncate(good_offset)
+        
+        return records
+    
+    def segments(self):
+        """স্ন্যাপশটে এখনো না ঢোকা পুরনো সেগমেন্ট (<journal>.<শেষ seq>), seq ক্রমে"""
+        segments = [path for path in self.path.parent.glob(f"{self.path.name}.*")
+                    if path.suffix[1:].isdigit()]
+        return sorted(segments, key=lambda path: int(path.suffix[1:]))
+    
+    def rotate(self, seq):
+        """স্ন্যাপশট শুরুর মুহূর্তে চলতি জার্নাল সেগমেন্টে সরিয়ে নতুন খালি জার্নাল
+        
+        seq: জার্নালের শেষ রেকর্ডের seq। এরপরের রেকর্ড নতুন ফাইলে যায়, তাই সেভ চলাকালীন
+        ট্রাফিক থাকলেও স্ন্যাপশট লেখা শেষে পুরনো অংশ ফেলে দেওয়া যায়। সরানো রেকর্ড সংখ্যা ফেরত।
+        """
+        self.close()
+        rotated = self.pending
+        if rotated:
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.{seq}"))
+        with open(self.path, 'w', encoding='utf-8'):
+            pass
+        self.pending = 0
+        return rotated
+    
+    def drop_segments(self, seq):
+        """seq পর্যন্ত স্ন্যাপশটে ঢুকে যাওয়া সেগমেন্ট মুছে ফেলা"""
+        for path in self.segments():
+            if int(path.suffix[1:]) <= seq:
+                path.unlink(missing_ok=True)
+    
+    def close(self):
+        """ফাইল হ্যান্ডেল বন্ধ"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+class AliasTable:
+    """Vose alias মেথড - ওয়েটেড স্যাম্পলিং O(1), স্যাম্পলে কোনো অ্যালোকেশন নেই
+    
+    valid_until: যে epoch পর্যন্ত ওয়েটের অনুপাত একই থাকে; decay: তৈরির সময়ের memory_decay
+    """
+    
+    __slots__ = ("prob", "alias", "valid_until", "decay")
+    
+    def __init__(self, weights, valid_until=math.inf, decay=None):
+        n = len(weights)
+        total = sum(weights)
+        if total <= 0:
+            weights, total = [1.0] * n, float(n)
+        
+        scaled = [weight * n / total for weight in weights]
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+        self.valid_until = valid_until
+        self.decay = decay
+        
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] += scaled[less] - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+        # বাকি গুলো (ফ্লোটিং এরর সহ) নিজেই নিজের alias, prob 1.0
+    
+    def sample(self):
+        i = int(random.random() * len(self.prob))
+        return i if random.random() < self.prob[i] else self.alias[i]
+    
+    def __len__(self):
+        return len(self.prob)
+
+class ContextStore:
+    """ইউজার কনটেক্সট - ইউজার প্রতি deque, ইউজারদের মধ্যে LRU
+    
+    max_users এর বেশি হলে সবচেয়ে পুরনো অ্যাক্টিভ ইউজার বাদ পড়ে; spill_path দিলে
+    বাদ পড়া ইউজার SQLite এ যায় এবং আবার দরকার হলে সেখান থেকে ফিরে আসে।
+    """
+    
+    def __init__(self, max_users=10000, max_turns=20, spill_path=None):
+        self.max_users = max_users
+        self.max_turns = max_turns
+        self.users = OrderedDict()
+        self.evictions = 0
+        self.reloads = 0
+        self._lock = threading.Lock()
+        
+        self.spill = None
+        if spill_path:
+            self.spill = sqlite3.connect(str(spill_path), check_same_thread=False)
+            self.spill.execute("PRAGMA journal_mode=WAL")
+            self.spill.execute("PRAGMA synchronous=NORMAL")
+            self.spill.execute(
+                "CREATE TABLE IF NOT EXISTS user_context (user_id TEXT PRIMARY KEY, turns TEXT NOT NULL)"
+            )
+            self.spill.commit()
+    
+    def load(self, data):
+        """সেভ করা {user: [turn, ...]} থেকে লোড (ক্রম = পুরনো থেকে নতুন)"""
+        with self._lock:
+            for user_key, turns in data.items():
+                self.users[user_key] = deque(turns, maxlen=self.max_turns)
+                self.users.move_to_end(user_key)
+                self._evict()
+    
+    def append(self, user_key, turn):
+        """ইউজারের কনটেক্সটে একটি কনভারসেশন যোগ"""
+        with self._lock:
+            turns = self._touch(user_key)
+            if turns is None:
+                turns = self.users[user_key] = deque(maxlen=self.max_turns)
+            turns.append(turn)
+            self._evict()
+    
+    def get(self, user_key):
+        """ইউজারের কনটেক্সট; স্পিল হয়ে থাকলে আবার মেমোরিতে তোলা হয়"""
+        with self._lock:
+            turns = self._touch(user_key)
+            if turns is None:
+                return []
+            result = list(turns)
+            self._evict()
+            return result
+    
+    def _touch(self, user_key):
+        """অ্যাক্টিভ ইউজারকে LRU এর শেষে নেওয়া, নইলে স্পিল থেকে রিলোড"""
+        turns = self.users.get(user_key)
+        if turns is not None:
+            self.users.move_to_end(user_key)
+            return turns
+        
+        if self.spill is None:
+            return None
+        
+        row = self.spill.execute(
+            "SELECT turns FROM user_context WHERE user_id = ?", (user_key,)
+        ).fetchone()
+        if row is None:
+            return None
+        
+        self.spill.execute("DELETE FROM user_context WHERE user_id = ?", (user_key,))
+        self.spill.commit()
+        self.reloads += 1
+        
+        turns = self.users[user_key] = deque(json.loads(row[0]), maxlen=self.max_turns)
+        return turns
+    
+    def _evict(self):
+        """ওয়ার্কিং সেটের বাইরে থাকা ইউজারদের স্পিল বা বাদ দেওয়া"""
+        spilled = []
+        while len(self.users) > self.max_users:
+            user_key, turns = self.users.popitem(last=False)
+            spilled.append((user_key, json.dumps(list(turns), ensure_ascii=False)))
+            self.evictions += 1
+        
+        if spilled and self.spill is not None:
+            self.spill.executemany(
+                "INSERT OR REPLACE INTO user_context (user_id, turns) VALUES (?, ?)", spilled
+            )
+            self.spill.commit()
+    
+    def to_dict(self):
+        """সেভের জন্য শুধু অ্যাক্টিভ ইউজার"""
+        with self._lock:
+            return {user_key: list(turns) for user_key, turns in self.users.items()}
+    
+    def user_count(self):
+        """অ্যাক্টিভ + স্পিল হওয়া ইউজার"""
+        with self._lock:
+            return len(self.users) + self._spilled_count()
+    
+    def _spilled_count(self):
+        if self.spill is None:
+            return 0
+        return self.spill.execute("SELECT COUNT(*) FROM user_context").fetchone()[0]
+    
+    def stats(self):
+        with self._lock:
+            return {
+                "active_users": len(self.users),
+                "spilled_users": self._spilled_count(),
+                "max_users": self.max_users,
+                "evictions": self.evictions,
+                "reloads": self.reloads
+            }
+    
+    def close(self):
+        if self.spill is not None:
+            self.spill.close()
+            self.spill = None
+
+class LearningLog:
+    """লার্নিং লগ - ফিক্সড সাইজ রিং বাফার + রোটেটিং ফাইল + মিনিট ভিত্তিক কাউন্টার
+    
+    মেমোরিতে শুধু শেষ capacity টা এন্ট্রি (time = epoch seconds)। পুরো ইতিহাস
+    path এ কম্প্যাক্ট JSON লাইনে যায়, max_bytes পেরোলে .1, .2 ... তে রোটেট হয়।
+    শেষ 24 ঘণ্টার learn/recall সংখ্যা মিনিট বাকেটে আগেই যোগ করা থাকে, তাই পড়া O(1)।
+    """
+    
+    MINUTES = 1440
+    
+    def __init__(self, capacity=1000, path=None, max_bytes=5 * 1024 * 1024, backups=5):
+        self.capacity = capacity
+        self.slots = [None] * capacity
+        self.head = 0  # পরের এন্ট্রির স্লট
+        self.count = 0
+        
+        self.kinds = {"learn": 0, "recall": 1}
+        self.minute_counts = np.zeros((self.MINUTES, len(self.kinds)), dtype=np.int64)
+        self.day_totals = np.zeros(len(self.kinds), dtype=np.int64)
+        self.last_minute = None
+        
+        self.path = Path(path) if path else None
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._file = None
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def timestamp(value):
+        """ISO স্ট্রিং বা epoch → epoch seconds"""
+        if isinstance(value, str):
+            return datetime.fromisoformat(value).timestamp()
+        return float(value)
+    
+    def load(self, entries):
+        """সেভ করা এন্ট্রি রিং এ তোলা (পুরনো ISO time ও চলে), ফাইলে আবার লেখা হয় না"""
+        for entry in entries[-self.capacity:]:
+            entry = dict(entry, time=self.timestamp(entry.get("time", 0)))
+            with self._lock:
+                self._store(entry)
+    
+    def append(self, entry, write=True):
+        """একটি এন্ট্রি যোগ - রিং, মিনিট কাউন্টার ও লগ ফাইল (write=False হলে ফাইলে নয়)"""
+        with self._lock:
+            self._store(entry)
+            if write and self.path is not None:
+                self._write(entry)
+    
+    def _store(self, entry):
+        self.slots[self.head] = entry
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        
+        kind = self.kinds.get(entry.get("type"))
+        if kind is not None:
+            minute = int(entry["time"] // 60)
+            self._advance(minute)
+            if minute > self.last_minute - self.MINUTES:
+                self.minute_counts[minute % self.MINUTES, kind] += 1
+                self.day_totals[kind] += 1
+    
+    def _advance(self, minute):
+        """নতুন মিনিটে ঢোকার আগে 24 ঘণ্টার পুরনো বাকেট খালি করা (amortized O(1))"""
+        if self.last_minute is None:
+            self.last_minute = minute
+            return
+        
+        steps = min(minute - self.last_minute, self.MINUTES)
+        for step in range(1, steps + 1):
+            bucket = (self.last_minute + step) % self.MINUTES
+            self.day_totals -= self.minute_counts[bucket]
+            self.minute_counts[bucket] = 0
+        self.last_minute = max(self.last_minute, minute)
+    
+    def _write(self, entry):
+        """বাফারড অ্যাপেন্ড; ফাইল বড় হলে রোটেট"""
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        
+        self._file.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+        
+        if self._file.tell() >= self.max_bytes:
+            self._rotate()
+    
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        
+        for i in range(self.backups - 1, 0, -1):
+            older = self.path.with_name(f"{self.path.name}.{i}")
+            if older.exists():
+                os.replace(older, self.path.with_name(f"{self.path.name}.{i + 1}"))
+        
+        if self.backups > 0:
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+    
+    def flush(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+    
+    def entries(self):
+        """পুরনো থেকে নতুন ক্রমে রিং এর এন্ট্রি"""
+        with self._lock:
+            start = (self.head - self.count) % self.capacity
+            return [self.slots[(start + i) % self.capacity] for i in range(self.count)]
+    
+    def totals(self, now=None):
+        """শেষ 24 ঘণ্টার {"learn": n, "recall": n} - O(1)"""
+        with self._lock:
+            self._advance(int((now or time.time()) // 60))
+            return {kind: int(self.day_totals[i]) for kind, i in self.kinds.items()}
+    
+    def per_minute(self, minutes=60, now=None):
+        """শেষ minutes মিনিটের বাকেট, পুরনো থেকে নতুন: [(minute, learn, recall), ...]"""
+        with self._lock:
+            current = int((now or time.time()) // 60)
+            self._advance(current)
+            return [
+                (minute * 60, *(int(c) for c in self.minute_counts[minute % self.MINUTES]))
+                for minute in range(current - min(minutes, self.MINUTES) + 1, current + 1)
+            ]
+    
+    def __len__(self):
+        return self.count
+    
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+class NeuralAI:
+    def __init__(self, use_index=True, backend="dict", memory_path="data/ai_brain.json",
+                 journal=False, snapshot_every=5000, snapshot_interval=300,
+                 prune_interval=60, prune_slice=1000,
+                 index_type="token", lsh_bands=16, lsh_rows=4,
+                 fuzzy=False, fuzzy_threshold=0.3,
+                 context_users=10000, context_turns=20, context_spill=None,
+                 write_behind=True, write_interval=5, write_every=100,
+                 learning_capacity=1000, learning_log_bytes=5 * 1024 * 1024, learning_log_backups=5):
+        self.memory_path = Path(memory_path)
+        self.memory_path.parent.mkdir(exist_ok=True)
+        
+        # AI প্যারামিটার (জার্নাল রিপ্লের আগে দরকার)
         self.learning_rate = 0.1
         self.memory_decay = 0.99
         self.pattern_threshold = 0.6
+        self.prune_threshold = 0.01
+        
+        # ল্যাজি ডিকে: প্রতিটি এজ [weight, epoch], আসল ওয়েট পড়ার সময় হিসাব হয়
+        self.decay_epoch = 0
+        self.prune_interval = prune_interval
+        self.prune_slice = prune_slice
+        self._prune_queue = []
+        
+        # journal=True দিলে প্রতি মিউটেশনে শুধু জার্নালে অ্যাপেন্ড,
+        # পুরো ব্রেইন ব্যাকগ্রাউন্ডে পর্যায়ক্রমে স্ন্যাপশট হয়
+        self._lock = threading.RLock()
+        self.journal = BrainJournal(self.memory_path.with_suffix(".journal")) if journal else None
+        self.journal_seq = 0
+        self.snapshot_every = snapshot_every
+        self.snapshot_interval = snapshot_interval
+        self._snapshot_wakeup = threading.Event()
+        self._closed = threading.Event()
+        
+        # জার্নাল ছাড়া write_behind=True: মিউটেশন শুধু গোনা হয়, রাইটার থ্রেড
+        # write_interval সেকেন্ড বা write_every মিউটেশনে একবার পুরো সেভ করে
+        self.write_behind = write_behind
+        self.write_interval = write_interval
+        self.write_every = write_every
+        self.mutations = 0
+        self.saved_mutations = 0  # ডিস্কের স্ন্যাপশটে থাকা মিউটেশন পর্যন্ত
+        self._save_lock = threading.Lock()
+        self._save_generation = 0
+        self._written_generation = 0
+        # একই ফাইলের hot reload চলাকালীন মিউটেশন ডিস্কে না গিয়ে এখানে যায় (নতুন ব্রেইনের কাছে)
+        self._handoff = None
+        
+        # pattern hash → AliasTable, রেসপন্স বা কানেকশন ওয়েট বদলালে বাতিল
+        self._response_tables = {}
+        
+        # প্যাটার্ন বদলালে listener(pattern hash, words) ডাকা হয় - যেমন রেসপন্স ক্যাশে ইনভ্যালিডেশন
+        self.change_listeners = []
+        
+        # use_index=False দিলে পুরনো ব্রুট-ফোর্স স্ক্যান (ভেরিফিকেশনের জন্য)
+        # index_type="lsh" দিলে আনুমানিক MinHash-LSH ক্যান্ডিডেট, স্কোরিং একই cosine
+        self.use_index = use_index
+        self.index_type = index_type
+        if index_type == "lsh":
+            self.index = MinHashLSH(lsh_bands, lsh_rows)
+        elif index_type == "token":
+            self.index = TokenIndex()
+        else:
+            raise ValueError(f"Unsupported index type: {index_type}")
+        
+        # context_spill দিলে (যেমন "data/ai_context.db") ওয়ার্কিং সেটের বাইরের ইউজার SQLite এ যায়
+        self.context_memory = ContextStore(context_users, context_turns, context_spill)
+        
+        # লার্নিং লগ: মেমোরিতে রিং বাফার, পুরো ইতিহাস রোটেটিং ফাইলে
+        self.learning_log = LearningLog(learning_capacity, self.memory_path.with_suffix(".learning.jsonl"),
+                                        learning_log_bytes, learning_log_backups)
+        
+        # fuzzy=True দিলে কোয়েরির অজানা শব্দ trigram মিলে কাছের জানা শব্দে বদলে যায়
+        self.fuzzy = TrigramIndex(fuzzy_threshold) if fuzzy else None
+        
+        # backend="matrix" দিলে CSR ম্যাট্রিক্সে ভেক্টরাইজড স্কোরিং
+        self.backend = backend
+        self.matrix = PatternMatrix() if backend == "matrix" else None
+        
+        self._load_brain()
+        
+        if self.journal is not None or self.write_behind:
+            threading.Thread(target=self._snapshot_loop, daemon=True).start()
+        threading.Thread(target=self._prune_loop, daemon=True).start()
         
         print("🧠 AI Neural Network Initialized")
     
     def _load_brain(self):
         """ব্রেইন লোড"""
-        if self.memory_path.exists():
+        self.mapped = None
+        brain_data = {}
+        
+        if self.memory_path.exists() and self._is_binary():
+            # বাইনারি ব্রেইন: প্যাটার্ন mmap থেকে দরকার মতো ডিকোড হয়
+            self.mapped = MappedBrain(self.memory_path)
+            brain_data = self.mapped.extra()
+        elif self.memory_path.exists():
             with open(self.memory_path, 'r', encoding='utf-8') as f:
                 brain_data = json.load(f)
-                self.patterns = brain_data.get("patterns", {})
-                self.connections = brain_data.get("connections", {})
-                self.context_memory = brain_data.get("context", {})
-                self.learning_log = brain_data.get("learning", [])
+        
+        self.patterns = MappedPatterns(self.mapped) if self.mapped else brain_data.get("patterns", {})
+        self.connections = {
+            src: {dst: [weight, 0] for dst, weight in edges.items()}
+            for src, edges in brain_data.get("connections", {}).items()
+        }
+        self.context_memory.load(brain_data.get("context", {}))
+        self.aliases = brain_data.get("aliases", {})  # কম্প্যাকশনে মুছে যাওয়া hash → রাখা hash
+        self.learning_log.load(brain_data.get("learning", []))
+        self.journal_seq = brain_data.get("journal_seq", 0)
+        
+        if "vocabulary" in brain_data:
+            self.vocab = Vocabulary(brain_data["vocabulary"])
+            if self.mapped is None:
+                # JSON এ int কী স্ট্রিং হয়ে যায়, আবার int এ ফেরানো
+                for pattern in self.patterns.values():
+                    pattern["vector"] = {int(token): count for token, count in pattern["vector"].items()}
         else:
-            self.patterns = {}
-            self.connections = {}
-            self.context_memory = {}
-            self.learning_log = []
+            self.vocab = Vocabulary()
+            self._migrate_vectors()
+        
+        # বাইনারি ফাইলের CSR অ্যারে সরাসরি: matrix ব্যাকএন্ড অ্যারেই ব্যবহার করে,
+        # ইনডেক্স শুধু কলাম থেকে টোকেন পড়ে - কোনো প্যাটার্ন ডিকোড হয় না
+        if self.matrix is None and self.mapped is not None:
+            self.index.rebuild_rows(self.mapped.row_tokens())
+        elif self.matrix is None:
+            self.index.rebuild(self.patterns)
+        elif self.mapped is not None:
+            self.matrix.attach(self.mapped)
+        else:
+            self.matrix.rebuild(self.patterns)
+        
+        if self.journal is not None:
+            self._replay_journal()
+    
+    def _migrate_vectors(self):
+        """পুরনো md5-hex কী এর ভেক্টর → word id ভেক্টর (প্রশ্ন আবার টোকেনাইজ করে)"""
+        if not self.patterns:
+            return
+        
+        # পুরনো বাইনারি ফাইলের CSR অ্যারে আর কাজে লাগবে না, তাই পুরো dict এ তোলা
+        if self.mapped is not None:
+            self.patterns = dict(self.patterns.items())
+            self.mapped.close()
+            self.mapped = None
+        
+        for pattern in self.patterns.values():
+            pattern["vector"] = self._text_to_vector(pattern["question"], learn=True)
+        
+        print(f"🧠 Migrated {len(self.patterns)} pattern vectors to vocabulary ids")
+    
+    def _is_binary(self):
+        """memory_path .bin হলে বাইনারি ফরম্যাট"""
+        return self.memory_path.suffix == ".bin"
+    
+    def _replay_journal(self):
+        """স্ন্যাপশটের পরের জার্নাল রেকর্ড পুনরায় প্রয়োগ"""
+        applied = 0
+        
+        snapshot_seq = self.journal_seq
+        for record in self.journal.replay():
+            # স্ন্যাপশটে আগেই আছে এমন রেকর্ড বাদ
+            if record.get("seq", 0) <= self.journal_seq:
+                continue
+            
+            self._apply_record(record)
+            self.journal_seq = record["seq"]
+            applied += 1
+        
+        # স্ন্যাপশট লেখার পর মোছার আগে ক্র্যাশ হলে বাসি সেগমেন্ট থেকে যায়
+        self.journal.drop_segments(snapshot_seq)
+        self.journal.pending = applied
+        
+        if applied:
+            print(f"🧠 Journal replayed: {applied} records")
+    
+    def _apply_record(self, record):
+        """জার্নাল রেকর্ড আবার প্রয়োগ - লার্নিং লগ ফাইলে লাইনটা আগেই আছে"""
+        if record["op"] == "learn":
+            self._apply_learn(record["q"], record["r"], record["u"], record["t"], replay=True)
+        elif record["op"] == "recall":
+            self._apply_recall(record["p"], record["q"], record["r"], record["u"],
+                               record["s"], record["t"], replay=True)
+    
+    def _hand_off(self, sink):
+        """এ পর্যন্ত সব ফাইলে লিখে পরের মিউটেশন ডিস্কের বদলে sink এ পাঠানো
+        
+        একই ফাইলের hot reload এর জন্য: লক ধরে রেখেই সেভ, তাই ফাইল আর sink এর মাঝে
+        কোনো মিউটেশন হারায় না বা দুবার আসে না।
+        """
+        with self._lock:
+            self.learning_log.flush()
+            if self._pending():
+                self._save_brain()
+            self._handoff = sink
+    
+    def _take_back(self, records):
+        """হ্যান্ড-অফ বাতিল - sink এ জমা মিউটেশন আবার নিজেই সংরক্ষণ"""
+        with self._lock:
+            self._handoff = None
+            for record in records:
+                self._persist(record)
+    
+    def _adopt(self, record):
+        """hot reload এ পুরনো ব্রেইনের মিউটেশন এই ব্রেইনে প্রয়োগ ও সংরক্ষণ"""
+        with self._lock:
+            self._apply_record(record)
+            self._persist(dict(record))
+    
+    def _persist(self, record):
+        """মিউটেশন সংরক্ষণ - জার্নাল মোডে O(change), write_behind এ শুধু dirty, নইলে পুরো সেভ"""
+        if self._handoff is not None:
+            self._handoff(dict(record))
+            return
+        
+        # বন্ধ ব্রেইন আর কিছু লেখে না (জার্নালও আবার খোলে না)
+        if self._closed.is_set():
+            return
+        
+        if self.journal is None:
+            if not self.write_behind:
+                self._save_brain()
+                return
+            
+            # একগুচ্ছ মেসেজে একটাই রাইট - হ্যান্ডলার ডিস্কের জন্য অপেক্ষা করে না
+            self.mutations += 1
+            if self._pending() >= self.write_every:
+                self._snapshot_wakeup.set()
+            return
+        
+        self.journal_seq += 1
+        record["seq"] = self.journal_seq
+        self.journal.append(record)
+        
+        if self.journal.pending >= self.snapshot_every:
+            self._snapshot_wakeup.set()
+    
+    def _pending(self):
+        """শেষ সেভের পর ডিস্কে না যাওয়া মিউটেশন সংখ্যা"""
+        if self.journal is not None:
+            return self.journal.pending
+        return self.mutations - self.saved_mutations
+    
+    def _snapshot_loop(self):
+        """ব্যাকগ্রাউন্ড স্ন্যাপশট / কম্প্যাকশন / write-behind সেভ"""
+        interval = self.snapshot_interval if self.journal is not None else self.write_interval
+        while not self._closed.is_set():
+            self._snapshot_wakeup.wait(interval)
+            self._snapshot_wakeup.clear()
+            if self._closed.is_set():
+                break
+            
+            try:
+                self.learning_log.flush()
+                if self._pending():
+                    self._save_brain()
+            except Exception as e:
+                print(f"⚠️ Brain snapshot error: {e}")
+    
+    def flush(self):
+        """জমে থাকা পরিবর্তন এখনই ডিস্কে লেখা (শাটডাউনের আগে ডাকুন)"""
+        self.learning_log.flush()
+        if self._pending():
+            self._save_brain()
+    
+    def close(self, save=True):
+        """ব্যাকগ্রাউন্ড থ্রেড থামানো ও ফাইল হ্যান্ডেল বন্ধ (hot reload এ পুরনো ব্রেইন)
+        
+        save=False হলে জমে থাকা পরিবর্তন ফেলে দেওয়া হয়, চলতি সেভও আর ফাইলে পৌঁছায় না -
+        একই ফাইল থেকে নতুন ব্রেইন লোড হলে পুরনোটা যেন তার উপর না লেখে।
+        বন্ধের পর মিউটেশন আর ফাইল বা জার্নালে যায় না।
+        """
+        with self._save_lock:
+            self._closed.set()
+            if not save:
+                self._written_generation = math.inf
+        
+        self._snapshot_wakeup.set()
+        if save:
+            self.flush()
+        
+        self.learning_log.close()
+        if self.journal is not None:
+            self.journal.close()
     
     def _save_brain(self):
-        """ব্রেইন সেভ"""
-        brain_data = {
-            "patterns": self.patterns,
-            "connections": self.connections,
-            "context": self.context_memory,
-            "learning": self.learning_log[-1000:],  # শুধু শেষ 1000
-            "updated": datetime.now().isoformat()
-        }
+        """ব্রেইন সেভ
         
-        with open(self.memory_path, 'w', encoding='utf-8') as f:
-            json.dump(brain_data, f, ensure_ascii=False, indent=2)
+        লকের ভিতরে শুধু কাঠামোগুলোর কপি; JSON/বাইনারি সিরিয়ালাইজ ও ডিস্ক রাইট লকের বাইরে,
+        তাই সেভ চলাকালীন হ্যান্ডলার আটকে থাকে না।
+        """
+        with self._lock:
+            # হ্যান্ড-অফ বা save=False এ বন্ধ ব্রেইনের ফাইল/জার্নাল এখন অন্য ব্রেইনের
+            if self._handoff is not None or self._written_generation == math.inf:
+                return
+            
+            # mmap ব্রেইনে শুধু ছোঁয়া/নতুন প্যাটার্ন কপি; বাকি রো লেখার সময় ফাইল থেকে হুবহু
+            base = self.mapped
+            changed = self.patterns.overlay if base is not None else self.patterns
+            deleted = set(self.patterns.deleted) if base is not None else ()
+            brain_data = {
+                # প্যাটার্নের responses/learned_from জায়গায় বদলায়, তাই ভিতরের লিস্ট/ডিক্টও কপি
+                "patterns": {p_hash: {key: value.copy() if isinstance(value, (list, dict)) else value
+                                      for key, value in pattern.items()}
+                             for p_hash, pattern in changed.items()},
+                "vocabulary": list(self.vocab.words),
+                "connections": self._materialize_connections(),
+                "context": self.context_memory.to_dict(),
+                "aliases": dict(self.aliases),
+                "learning": self.learning_log.entries(),  # শুধু রিং বাফার, পুরোটা লগ ফাইলে
+                "journal_seq": self.journal_seq,
+                "updated": datetime.now().isoformat()
+            }
+            mutations = self.mutations
+            
+            # এই মুহূর্ত পর্যন্ত জার্নাল স্ন্যাপশটে ঢুকছে; নতুন রেকর্ড নতুন ফাইলে
+            rotated = self.journal.rotate(self.journal_seq) if self.journal is not None else 0
+            
+            # রাইটার থ্রেড ও flush() একসাথে সেভ করলে পুরনো স্ন্যাপশট নতুনটার উপর লেখা হবে না
+            self._save_generation += 1
+            generation = self._save_generation
+        
+        try:
+            with self._save_lock:
+                if generation > self._written_generation:
+                    tmp_path = self.memory_path.with_suffix(f".{generation}.tmp")
+                    if self._is_binary():
+                        write_brain(tmp_path, brain_data, base=base, deleted=deleted)
+                    else:
+                        # জার্নাল মোডে কম্প্যাক্ট স্ন্যাপশট
+                        indent = None if self.journal is not None else 2
+                        with open(tmp_path, 'w', encoding='utf-8') as f:
+                            json.dump(brain_data, f, ensure_ascii=False, indent=indent)
+                    
+                    # অ্যাটমিক রিপ্লেস - ক্র্যাশে পুরনো স্ন্যাপশট অক্ষত থাকে
+                    os.replace(tmp_path, self.memory_path)
+                    self._written_generation = generation
+                    self.saved_mutations = max(self.saved_mutations, mutations)
+                
+                # নতুন জেনারেশন আগে লেখা হয়ে থাকলে সেটাও এই রেকর্ডগুলো ধারণ করে;
+                # close(save=False) এ কিছুই লেখা হয়নি, তখন সেগমেন্ট রেখে দেওয়া
+                covered = self._written_generation != math.inf
+        except Exception:
+            # সেগমেন্ট ডিস্কেই আছে; স্ন্যাপশট হয়নি, তাই রেকর্ডগুলো আবার বাকি হিসেবে গোনা
+            if rotated:
+                with self._lock:
+                    self.journal.pending += rotated
+            raise
+        
+        if self.journal is not None and covered:
+            # journal_seq স্ন্যাপশটে আছে, তাই মোছার আগে ক্র্যাশ হলেও ডাবল রিপ্লে হবে না
+            self.journal.drop_segments(brain_data["journal_seq"])
     
-    def _text_to_vector(self, text):
-        """টেক্সট থেকে ভেক্টর তৈরি"""
+    def _text_to_vector(self, text, learn=False, fuzzy=False):
+        """টেক্সট থেকে ভেক্টর তৈরি (word id → count)
+        
+        learn=False হলে অজানা শব্দ ভোকাবুলারিতে যোগ হয় না; শব্দটাই কী হিসেবে থাকে,
+        যাতে কোয়েরির নর্মে গোনা হয় কিন্তু কোনো প্যাটার্নের সাথে মেলে না।
+        fuzzy=True (আর fuzzy চালু) হলে অজানা শব্দ আগে কাছের জানা শব্দের id তে বদলানোর চেষ্টা হয়।
+        """
         words = text.lower().split()
         vector = {}
         
+        fuzzy = fuzzy and self.fuzzy is not None and not learn
+        if fuzzy:
+            with self._lock:
+                self.fuzzy.sync(self.vocab)
+        
         for word in words:
             if len(word) > 2:  # শুধু গুরুত্বপূর্ণ শব্দ
-                word_hash = hashlib.md5(word.encode()).hexdigest()[:8]
-                vector[word_hash] = vector.get(word_hash, 0) + 1
+                if learn:
+                    token = self.vocab.intern(word)
+                else:
+                    token = self.vocab.get(word)
+                    if token is None and fuzzy:
+                        token = self.fuzzy.closest(word)
+                    if token is None:
+                        token = word
+                vector[token] = vector.get(token, 0) + 1
         
         return vector
     
+    def _fuzzy_vector(self, question, q_vector):
+        """শব্দে মেলেনি এমন কোয়েরির trigram-শুদ্ধ ভেক্টর; কিছু না বদলালে None"""
+        if self.fuzzy is None:
+            return None
+        
+        fuzzy_vector = self._text_to_vector(question, fuzzy=True)
+        return fuzzy_vector if fuzzy_vector != q_vector else None
+    
+    def _match(self, question):
+        """সেরা ম্যাচ - আগে শুধু শব্দে, কিছু না মিললে তবেই fuzzy"""
+        q_vector = self._text_to_vector(question)
+        match = self._best_match(q_vector)
+        if match[0] is None:
+            fuzzy_vector = self._fuzzy_vector(question, q_vector)
+            if fuzzy_vector is not None:
+                match = self._best_match(fuzzy_vector)
+        return match
+    
     def _cosine_similarity(self, vec1, vec2):
         """কোসাইন সাদৃশ্যতা"""
         if not vec1 or not vec2:
@@ -81,8 +1235,21 @@ class NeuralAI:
     
     def learn_pattern(self, question, response, user_id):
         """নতুন প্যাটার্ন শেখে"""
-        q_vector = self._text_to_vector(question)
-        q_hash = hashlib.md5(question.encode()).hexdigest()
+        now = datetime.now().isoformat()
+        
+        with self._lock:
+            self._apply_learn(question, response, user_id, now)
+            self._persist({"op": "learn", "q": question, "r": response, "u": user_id, "t": now})
+        
+        return True
+    
+    def _apply_learn(self, question, response, user_id, now, replay=False):
+        """learn_pattern এর মূল লজিক (জার্নাল রিপ্লেতেও ব্যবহৃত)
+        
+        replay=True হলে লগ ফাইলে আবার লেখা হয় না - ক্র্যাশের আগেই লাইনটা সেখানে গেছে।
+        """
+        q_vector = self._text_to_vector(question, learn=True)
+        q_hash = self._resolve_alias(hashlib.md5(question.encode()).hexdigest())
         
         # নতুন প্যাটার্ন
         if q_hash not in self.patterns:
@@ -92,10 +1259,14 @@ class NeuralAI:
                 "responses": [response],
                 "confidence": 1.0,
                 "learned_from": [user_id],
-                "learned_at": datetime.now().isoformat(),
+                "learned_at": now,
                 "used_count": 0,
                 "success_rate": 1.0
             }
+            if self.matrix is not None:
+                self.matrix.append(q_hash, q_vector, 1.0)
+            else:
+                self.index.add(q_hash, q_vector)
         else:
             # বিদ্যমান প্যাটার্ন আপডেট
             pattern = self.patterns[q_hash]
@@ -107,9 +1278,12 @@ class NeuralAI:
                 pattern["learned_from"].append(user_id)
             
             pattern["confidence"] = min(1.0, pattern["confidence"] + 0.1)
+            if self.matrix is not None:
+                self.matrix.set_confidence(q_hash, pattern["confidence"])
         
         # কানেকশন তৈরি
         self._build_connections(q_hash, response)
+        self._notify_change(q_hash, [self.vocab.word(token) for token in q_vector])
         
         # লার্নিং লগ
         self.learning_log.append({
@@ -117,158 +1291,533 @@ class NeuralAI:
             "question": question[:50],
             "response": response[:50],
             "user": user_id,
-            "time": datetime.now().isoformat()
-        })
-        
-        self._save_brain()
-        return True
+            "time": LearningLog.timestamp(now)
+        }, write=not replay)
     
     def _build_connections(self, source_hash, response):
         """নিউরাল কানেকশন তৈরি"""
-        resp_vector = self._text_to_vector(response)
         resp_hash = hashlib.md5(response.encode()).hexdigest()
         
         if source_hash not in self.connections:
             self.connections[source_hash] = {}
         
-        # ওয়েট আপডেট
-        current_weight = self.connections[source_hash].get(resp_hash, 0)
-        self.connections[source_hash][resp_hash] = current_weight + 1
+        # ওয়েট আপডেট - বর্তমান epoch এ স্ট্যাম্প
+        current_weight = self._connection_weight(source_hash, resp_hash, 0)
+        self.connections[source_hash][resp_hash] = [current_weight + 1, self.decay_epoch]
+        self._response_tables.pop(source_hash, None)
         
-        # ডিকে রেট প্রয়োগ
-        for src in list(self.connections.keys()):
-            for dst in list(self.connections[src].keys()):
-                self.connections[src][dst] *= self.memory_decay
+        # ডিকে রেট প্রয়োগ: সব এজে গুণ না করে শুধু গ্লোবাল epoch বাড়ানো
+        self.decay_epoch += 1
+    
+    def _decayed(self, weight, epoch):
+        """epoch থেকে এখন পর্যন্ত ডিকে প্রয়োগ করা ওয়েট"""
+        return weight * self.memory_decay ** (self.decay_epoch - epoch)
+    
+    def _connection_weight(self, src, dst, default=None):
+        """এজের বর্তমান ওয়েট; থ্রেশহোল্ডের নিচে হলে মুছে যাওয়া এজের মতো"""
+        edge = self.connections.get(src, {}).get(dst)
+        if edge is None:
+            return default
+        
+        weight = self._decayed(*edge)
+        return weight if weight >= self.prune_threshold else default
+    
+    def _materialize_connections(self):
+        """সেভের জন্য ডিকে করা ওয়েট {src: {dst: weight}}"""
+        materialized = {}
+        for src, edges in self.connections.items():
+            live = {}
+            for dst, edge in edges.items():
+                weight = self._decayed(*edge)
+                if weight >= self.prune_threshold:
+                    live[dst] = weight
+            materialized[src] = live
+        return materialized
+    
+    def prune_connections(self, max_edges=None):
+        """থ্রেশহোল্ডের নিচের এজ মুছে ফেলা - প্রতি কলে সীমিত অংশ"""
+        max_edges = max_edges or self.prune_slice
+        visited = 0
+        removed = 0
+        
+        with self._lock:
+            if not self._prune_queue:
+                self._prune_queue = list(self.connections.keys())
+            
+            while self._prune_queue and visited < max_edges:
+                src = self._prune_queue.pop()
+                edges = self.connections.get(src)
+                if edges is None:
+                    continue
+                
+                visited += len(edges)
+                dead = [dst for dst, edge in edges.items()
+                        if self._decayed(*edge) < self.prune_threshold]
+                for dst in dead:
+                    del edges[dst]
+                removed += len(dead)
+                if dead:
+                    self._notify_change(src)
                 
-                if self.connections[src][dst] < 0.01:
-                    del self.connections[src][dst]
+                if not edges:
+                    del self.connections[src]
         
-        self._save_brain()
+        return removed
     
-    def find_response(self, question, user_id=None):
-        """সেরা উত্তর খুঁজে"""
-        q_vector = self._text_to_vector(question)
+    def _notify_change(self, p_hash, words=()):
+        """প্যাটার্ন পরিবর্তনের খবর listener দের কাছে পাঠানো"""
+        for listener in self.change_listeners:
+            try:
+                listener(p_hash, words)
+            except Exception as e:
+                print(f"⚠️ Change listener error: {e}")
+    
+    def _prune_loop(self):
+        """ব্যাকগ্রাউন্ড প্রুনিং সুইপ"""
+        while not self._closed.wait(self.prune_interval):
+            try:
+                # স্লাইসের মাঝে লক ছেড়ে দেওয়া হয় যাতে হ্যান্ডলার আটকে না থাকে
+                self.prune_connections()
+                while self._prune_queue:
+                    time.sleep(0.01)
+                    self.prune_connections()
+            except Exception as e:
+                print(f"⚠️ Connection prune error: {e}")
+    
+    def _resolve_alias(self, p_hash):
+        """একত্র হয়ে যাওয়া প্যাটার্নের hash → বর্তমান প্যাটার্নের hash"""
+        while p_hash in self.aliases:
+            p_hash = self.aliases[p_hash]
+        return p_hash
+    
+    def compact_patterns(self, threshold=0.95, dry_run=True, examples=10):
+        """প্রায় একই প্যাটার্ন (cosine ≥ threshold) একত্র করা
         
-        best_match = None
-        best_score = 0.0
+        স্ক্যান লক ছাড়াই ভেক্টরের স্ন্যাপশটে চলে (MinHash-LSH ক্যান্ডিডেট + এক্স্যাক্ট cosine)।
+        dry_run=False হলে প্রতিটি ক্লাস্টার সবচেয়ে পুরনো প্যাটার্নে মার্জ হয়, ইনডেক্স নতুন করে
+        বানিয়ে লকের ভেতরে একবারে বদলানো হয় এবং ব্রেইন সেভ হয়।
+        """
+        with self._lock:
+            snapshot = [(p_hash, pattern["vector"], pattern["question"])
+                        for p_hash, pattern in self.patterns.items()]
         
-        # সব প্যাটার্ন চেক
-        for p_hash, pattern in self.patterns.items():
-            similarity = self._cosine_similarity(q_vector, pattern["vector"])
+        clusters = self._find_duplicate_clusters(snapshot, threshold)
+        questions = {p_hash: question for p_hash, _, question in snapshot}
+        duplicates = sum(len(members) for _, members in clusters)
+        
+        report = {
+            "patterns": len(snapshot),
+            "clusters": len(clusters),
+            "duplicates": duplicates,
+            "patterns_after": len(snapshot) - duplicates,
+            "scan_reduction": round(duplicates / len(snapshot), 4) if snapshot else 0.0,
+            "threshold": threshold,
+            "dry_run": dry_run,
+            "examples": [
+                {"keep": questions[leader], "merge": [questions[m] for m in members]}
+                for leader, members in clusters[:examples]
+            ]
+        }
+        
+        if not dry_run:
+            with self._lock:
+                merged = 0
+                for leader, members in clusters:
+                    for member in members:
+                        if leader in self.patterns and member in self.patterns:
+                            self._merge_pattern(leader, member)
+                            merged += 1
+                    if leader in self.patterns:
+                        vector = self.patterns[leader]["vector"]
+                        self._notify_change(leader, [self.vocab.word(token) for token in vector])
+                
+                self._rebuild_indexes()
+                report["duplicates"] = merged
+                report["patterns_after"] = len(self.patterns)
             
-            # কনফিডেন্স ফ্যাক্টর
-            adjusted_score = similarity * pattern["confidence"]
+            self._save_brain()
+        
+        print(f"🧹 Compaction {'dry-run' if dry_run else 'done'}: {report['patterns']} → "
+              f"{report['patterns_after']} patterns ({report['clusters']} clusters, "
+              f"{report['scan_reduction'] * 100:.1f}% smaller scan set)")
+        return report
+    
+    def _find_duplicate_clusters(self, snapshot, threshold):
+        """ইনসার্শন ক্রমে লিডার ক্লাস্টারিং → [(leader hash, [member hash, ...]), ...]"""
+        lsh = MinHashLSH()
+        vectors = {}
+        for p_hash, vector, _ in snapshot:
+            lsh.add(p_hash, vector)
+            vectors[p_hash] = vector
+        
+        assigned = set()
+        clusters = []
+        for p_hash, vector, _ in snapshot:
+            if p_hash in assigned or not vector:
+                continue
             
-            if adjusted_score > best_score and adjusted_score > self.pattern_threshold:
-                best_score = adjusted_score
-                best_match = pattern
-        
-        if best_match:
-            # প্যাটার্ন আপডেট
-            best_match["used_count"] += 1
-            
-            # কনটেক্সট মেমোরি
-            if user_id:
-                self._update_context(user_id, question, best_match["responses"][0])
-            
-            # রেসপন্স সিলেক্ট
-            if len(best_match["responses"]) > 1:
-                # ওয়েটেড র্যান্ডম সিলেকশন
-                weights = []
-                for resp in best_match["responses"]:
-                    resp_hash = hashlib.md5(resp.encode()).hexdigest()
-                    weight = self.connections.get(p_hash, {}).get(resp_hash, 1.0)
-                    weights.append(weight)
-                
-                # নরমালাইজ ওয়েট
-                total = sum(weights)
-                if total > 0:
-                    probs = [w/total for w in weights]
-                    response_idx = np.random.choice(len(best_match["responses"]), p=probs)
-                else:
-                    response_idx = random.randint(0, len(best_match["responses"])-1)
-                
-                response = best_match["responses"][response_idx]
+            # আগের প্যাটার্নগুলো নিজেরাই লিডার হিসেবে এটাকে দেখে ফেলেছে
+            position = lsh.order[p_hash]
+            members = [
+                candidate for candidate in lsh.candidates(vector)
+                if lsh.order[candidate] > position and candidate not in assigned
+                and self._cosine_similarity(vector, vectors[candidate]) >= threshold
+            ]
+            if members:
+                assigned.update(members)
+                clusters.append((p_hash, members))
+        
+        return clusters
+    
+    def _merge_pattern(self, leader, member):
+        """member প্যাটার্নের রেসপন্স, ইউজার, কাউন্টার ও কানেকশন leader এ সরানো"""
+        target = self.patterns[leader]
+        source = self.patterns[member]
+        
+        for response in source["responses"]:
+            if response not in target["responses"]:
+                target["responses"].append(response)
+        
+        for user_id in source["learned_from"]:
+            if user_id not in target["learned_from"]:
+                target["learned_from"].append(user_id)
+        
+        # success_rate ব্যবহারের অনুপাতে গড়
+        used = target["used_count"] + source["used_count"]
+        if used:
+            target["success_rate"] = (target["success_rate"] * target["used_count"]
+                                      + source["success_rate"] * source["used_count"]) / used
+        target["used_count"] = used
+        target["confidence"] = max(target["confidence"], source["confidence"])
+        
+        self.patterns[leader] = target
+        del self.patterns[member]
+        self.aliases[member] = leader
+        self._response_tables.pop(leader, None)
+        self._response_tables.pop(member, None)
+        
+        # কানেকশন ওয়েট যোগ, বর্তমান epoch এ স্ট্যাম্প
+        edges = self.connections.pop(member, None)
+        if edges:
+            target_edges = self.connections.setdefault(leader, {})
+            for dst, edge in edges.items():
+                weight = self._decayed(*edge)
+                if dst in target_edges:
+                    weight += self._decayed(*target_edges[dst])
+                target_edges[dst] = [weight, self.decay_epoch]
+        
+        self._notify_change(member)
+    
+    def _rebuild_indexes(self):
+        """নতুন ইনডেক্স/ম্যাট্রিক্স বানিয়ে একবারে বদলানো"""
+        if self.matrix is not None:
+            matrix = PatternMatrix()
+            matrix.rebuild(self.patterns)
+            self.matrix = matrix
+        else:
+            index = MinHashLSH(self.index.bands, self.index.rows) if self.index_type == "lsh" else TokenIndex()
+            index.rebuild(self.patterns)
+            self.index = index
+    
+    def find_response(self, question, user_id=None, match=None):
+        """সেরা উত্তর খুঁজে
+        
+        match: match_batch থেকে আগেই হিসাব করা (pattern hash, score), থাকলে স্কোরিং বাদ
+        """
+        with self._lock:
+            if match is None or (match[0] and match[0] not in self.patterns):
+                match = self._match(question)
+            
+            best_hash, best_score = match
+            if not best_hash:
+                return None
+            
+            best_match = self.patterns[best_hash]
+            response = self._select_response(best_hash, best_match)
+            
+            now = datetime.now().isoformat()
+            self._apply_recall(best_hash, question, response, user_id, best_score, now)
+            self._persist({"op": "recall", "p": best_hash, "q": question, "r": response,
+                           "u": user_id, "s": best_score, "t": now})
+        
+        return {
+            "response": response,
+            "confidence": best_score,
+            "source": "ai_memory",
+            "pattern_used": best_match["question"][:50],
+            "pattern_hash": best_hash
+        }
+    
+    def match_batch(self, questions):
+        """অনেক প্রশ্নের সেরা ম্যাচ একসাথে → [(pattern hash, score), ...]"""
+        vectors = [self._text_to_vector(question) for question in questions]
+        
+        with self._lock:
+            if self.matrix is not None:
+                matches = self.matrix.best_batch(vectors, self.pattern_threshold)
             else:
-                response = best_match["responses"][0]
+                matches = [self._best_match(vector) for vector in vectors]
             
-            # লার্নিং লগ
-            self.learning_log.append({
-                "type": "recall",
-                "question": question[:50],
-                "response": response[:50],
-                "score": best_score,
-                "time": datetime.now().isoformat()
-            })
+            # শব্দে না মেলা প্রশ্নগুলো fuzzy তে আবার, find_response এর মতোই
+            for i, (question, vector) in enumerate(zip(questions, vectors)):
+                if matches[i][0] is None:
+                    fuzzy_vector = self._fuzzy_vector(question, vector)
+                    if fuzzy_vector is not None:
+                        matches[i] = self._best_match(fuzzy_vector)
+            return matches
+    
+    def _select_response(self, p_hash, pattern):
+        """রেসপন্স সিলেক্ট"""
+        if len(pattern["responses"]) == 1:
+            return pattern["responses"][0]
+        
+        # ওয়েটেড র্যান্ডম সিলেকশন - আগে থেকে বানানো alias টেবিল থেকে
+        table = self._response_tables.get(p_hash)
+        if (table is None or len(table) != len(pattern["responses"])
+                or self.decay_epoch > table.valid_until or table.decay != self.memory_decay):
+            table = self._response_tables[p_hash] = self._build_response_table(p_hash, pattern)
+        
+        return pattern["responses"][table.sample()]
+    
+    def _build_response_table(self, p_hash, pattern):
+        """কানেকশন ওয়েট থেকে alias টেবিল (থ্রেশহোল্ডের নিচের বা না থাকা এজ = 1.0)
+        
+        সব এজ একই হারে ডিকে হয় বলে অনুপাত বদলায় না, যতক্ষণ না কোনো এজ থ্রেশহোল্ড
+        পেরোয় - টেবিল সেই epoch এর আগ পর্যন্ত বৈধ। ডিফল্ট 1.0 ডিকে হয় না, তাই
+        লাইভ ও ডিফল্ট মেশানো থাকলে টেবিল শুধু এই epoch এর জন্য।
+        """
+        edges = self.connections.get(p_hash, {})
+        decay = self.memory_decay
+        weights = []
+        live = 0
+        valid_until = math.inf
+        
+        for resp in pattern["responses"]:
+            resp_hash = hashlib.md5(resp.encode()).hexdigest()
+            weight = self._connection_weight(p_hash, resp_hash, None)
+            if weight is None:
+                weights.append(1.0)
+                continue
             
-            self._save_brain()
+            weights.append(weight)
+            live += 1
             
-            return {
-                "response": response,
-                "confidence": best_score,
-                "source": "ai_memory",
-                "pattern_used": best_match["question"][:50]
-            }
+            if not 0 < decay < 1:
+                if decay <= 0:
+                    valid_until = self.decay_epoch
+            elif self.prune_threshold > 0:
+                # ফ্লোটিং এরর এর জন্য এক epoch আগেই মেয়াদ শেষ
+                stored, epoch = edges[resp_hash]
+                crossing = epoch + math.floor(math.log(self.prune_threshold / stored) / math.log(decay))
+                valid_until = min(valid_until, crossing - 1)
         
-        return None
+        if 0 < live < len(weights):
+            valid_until = self.decay_epoch
+        
+        return AliasTable(weights, valid_until, decay)
     
-    def _update_context(self, user_id, question, response):
-        """কনটেক্সট মেমোরি আপডেট"""
-        user_key = str(user_id)
+    def _apply_recall(self, p_hash, question, response, user_id, score, now, replay=False):
+        """রিকল এর স্টেট আপডেট (জার্নাল রিপ্লেতেও ব্যবহৃত; replay এ লগ ফাইলে লেখা নয়)"""
+        pattern = self.patterns.get(self._resolve_alias(p_hash))
+        if pattern is None:
+            return
+        
+        # প্যাটার্ন আপডেট
+        pattern["used_count"] += 1
+        
+        # কনটেক্সট মেমোরি
+        if user_id:
+            self._update_context(user_id, question, pattern["responses"][0], now)
+        
+        # লার্নিং লগ
+        self.learning_log.append({
+            "type": "recall",
+            "question": question[:50],
+            "response": response[:50],
+            "score": score,
+            "time": LearningLog.timestamp(now)
+        }, write=not replay)
+    
+    def _best_match(self, q_vector):
+        """সেরা প্যাটার্ন → (pattern hash, score)"""
+        if self.matrix is not None:
+            return self.matrix.best(q_vector, self.pattern_threshold)
+        
+        top = self._top_k(q_vector, 1, self.pattern_threshold)
+        return top[0] if top else (None, 0.0)
+    
+    def _top_k(self, q_vector, k, threshold):
+        """থ্রেশহোল্ডের উপরে সেরা k প্যাটার্ন → [(pattern hash, score), ...]
+        
+        সাইজ k এর min-heap, কী (score, -ক্রম): সমান স্কোরে আগের প্যাটার্ন জেতে,
+        তাই k=1 হলে পুরনো লিনিয়ার স্ক্যানের ফলাফলই আসে।
+        """
+        if self.matrix is not None:
+            return self.matrix.top_k(q_vector, k, threshold)
+        
+        heap = []
+        
+        # ইনডেক্স থেকে শুধু মিল থাকা প্যাটার্ন, নইলে সব প্যাটার্ন চেক
+        for position, (p_hash, pattern) in enumerate(self._candidate_patterns(q_vector)):
+            similarity = self._cosine_similarity(q_vector, pattern["vector"])
+            
+            # কনফিডেন্স ফ্যাক্টর
+            adjusted_score = similarity * pattern["confidence"]
+            
+            if adjusted_score > threshold:
+                item = (adjusted_score, -position, p_hash)
+                if len(heap) < k:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+        
+        return [(p_hash, score) for score, _, p_hash in sorted(heap, reverse=True)]
+    
+    def find_top_k(self, question, k=5, min_score=None):
+        """সেরা k টি ম্যাচ স্কোর ও মিলে যাওয়া শব্দসহ (কোনো স্টেট বদলায় না)
         
-        if user_key not in self.context_memory:
-            self.context_memory[user_key] = []
+        min_score না দিলে pattern_threshold; 0 দিলে থ্রেশহোল্ডের নিচের বিকল্পও আসে।
+        """
+        q_vector = self._text_to_vector(question)
+        threshold = self.pattern_threshold if min_score is None else min_score
         
-        self.context_memory[user_key].append({
+        with self._lock:
+            top = self._top_k(q_vector, k, threshold)
+            if not top:
+                fuzzy_vector = self._fuzzy_vector(question, q_vector)
+                if fuzzy_vector is not None:
+                    q_vector = fuzzy_vector
+                    top = self._top_k(q_vector, k, threshold)
+            
+            results = []
+            for p_hash, score in top:
+                pattern = self.patterns[p_hash]
+                results.append({
+                    "pattern_hash": p_hash,
+                    "question": pattern["question"],
+                    "score": score,
+                    "confidence": pattern["confidence"],
+                    "responses": list(pattern["responses"]),
+                    "matched_tokens": [self.vocab.word(token) for token in q_vector
+                                       if token in pattern["vector"]]
+                })
+        
+        return results
+    
+    def _candidate_patterns(self, q_vector):
+        """স্কোর করার জন্য প্যাটার্ন তালিকা"""
+        if not self.use_index:
+            return self.patterns.items()
+        
+        # কোনো টোকেন না মিললে cosine শূন্য, তাই সেগুলো বাদ দিলেও ফলাফল একই
+        return ((p_hash, self.patterns[p_hash]) for p_hash in self.index.candidates(q_vector))
+    
+    def _update_context(self, user_id, question, response, now=None):
+        """কনটেক্সট মেমোরি আপডেট"""
+        # deque এ শুধু শেষ context_turns কনভারসেশন থাকে
+        self.context_memory.append(str(user_id), {
             "question": question,
             "response": response,
-            "time": datetime.now().isoformat()
+            "time": now or datetime.now().isoformat()
         })
-        
-        # শুধু শেষ 20 কনভারসেশন রাখুন
-        if len(self.context_memory[user_key]) > 20:
-            self.context_memory[user_key] = self.context_memory[user_key][-20:]
     
     def get_context(self, user_id):
         """ইউজার কনটেক্সট পেতে"""
-        return self.context_memory.get(str(user_id), [])
+        return self.context_memory.get(str(user_id))
     
     def get_brain_stats(self):
         """ব্রেইন স্ট্যাটিস্টিক্স"""
         return {
             "total_patterns": len(self.patterns),
-            "total_connections": sum(len(v) for v in self.connections.values()),
+            "total_connections": sum(len(v) for v in self._materialize_connections().values()),
             "learning_log_count": len(self.learning_log),
-            "unique_users": len(self.context_memory),
-            "avg_confidence": np.mean([p["confidence"] for p in self.patterns.values()]) 
-                              if self.patterns else 0
+            "learning_24h": self.learning_log.totals(),
+            "unique_users": self.context_memory.user_count(),
+            "context": self.context_memory.stats(),
+            "vocabulary_size": len(self.vocab),
+            # matrix ব্যাকএন্ডে টোকেন ইনডেক্স ভরা হয় না - শুধু সক্রিয় ব্যাকএন্ডের হিসাব
+            "backend": self.backend,
+            "index": self.index.stats() if self.use_index and self.matrix is None else None,
+            "matrix": self.matrix.stats() if self.matrix is not None else None,
+            "fuzzy": self.fuzzy.stats() if self.fuzzy is not None else None,
+            "avg_confidence": self._avg_confidence()
         }
+    
+    def _avg_confidence(self):
+        """গড় কনফিডেন্স - matrix থাকলে কলাম থেকে, প্যাটার্ন ডিকোড ছাড়াই"""
+        if self.matrix is not None:
+            return float(np.mean(self.matrix.confidence[:self.matrix.row_count])) if self.matrix.row_count else 0
+        return np.mean([p["confidence"] for p in self.patterns.values()]) if self.patterns else 0
 
 class AIOrchestrator:
-    def __init__(self):
-        self.brain = NeuralAI()
-        self.response_cache = {}
+    def __init__(self, config=None, db=None):
+        # config["brain"] সরাসরি NeuralAI তে যায়, যেমন
+        # {"brain": {"index_type": "lsh", "lsh_bands": 16, "lsh_rows": 4}}
+        self.config = config or {}
+        self.brain = NeuralAI(**self.config.get("brain", {}))
         
+        # DatabaseManager এর ai_memory (ফুল-টেক্সট সার্চ) মেমোরি হিসেবে:
+        # "brain" - শুধু RAM এর ব্রেইন, "hybrid" - ব্রেইনে না পেলে ডাটাবেজ, শেখা দুই জায়গাতেই,
+        # "database" - শেখা ও খোঁজা শুধু ডাটাবেজে, ব্রেইন RAM এ খালি থাকে
+        self.db = db
+        self.memory_backend = self.config.get("memory_backend", "brain") if db is not None else "brain"
+        self.db_candidates = self.config.get("db_candidates", 10)
+        
+        # LRU + TTL ক্যাশে; প্রতিটি এন্ট্রি তার প্যাটার্ন ও কোয়েরির শব্দ দিয়ে ট্যাগ করা
+        self.response_cache = SmartCache(max_size=self.config.get("cache_size", 1000),
+                                          ttl=self.config.get("cache_ttl", 3600))
+        self.brain.change_listeners.append(self._invalidate_cache)
+        
+        # reload_brain একটার পর একটা চলে; হট পাথে কোনো লক নেই, শুধু self.brain একবার পড়া হয়
+        self._reload_lock = threading.Lock()
+        self.reloads = 0
+    
+    
     def process_query(self, user_id, query):
         """কোয়েরি প্রসেস"""
+        return self._answer(user_id, query)
+    
+    def process_queries(self, batch):
+        """একসাথে অনেক কোয়েরি (যেমন রিকানেক্টের পর জমে থাকা মেসেজ)
+        
+        batch: [(user_id, query), ...] - ফলাফল একই ক্রমে, একটার পর একটা
+        process_query ডাকলে যা আসত ঠিক তাই।
+        """
+        batch = list(batch)
+        brain = self.brain
+        
+        # স্কোরিং এক পাসে; ক্যাশে ও রিকল আগের মতোই ক্রমানুসারে
+        matches = brain.match_batch([query for _, query in batch])
+        return [self._answer(user_id, query, match, brain) for (user_id, query), match in zip(batch, matches)]
+    
+    def _answer(self, user_id, query, match=None, brain=None):
+        """ক্যাশে → AI ব্রেইন → ডাটাবেজ → no_match
+        
+        brain একবারই পড়া হয়, তাই মাঝপথে reload_brain সোয়াপ করলেও কল পুরনো স্ন্যাপশটেই শেষ হয়।
+        """
+        brain = brain or self.brain
+        
         # প্রথমে ক্যাশে চেক
         cache_key = f"{user_id}_{hashlib.md5(query.encode()).hexdigest()}"
-        if cache_key in self.response_cache:
-            return self.response_cache[cache_key]
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         # AI ব্রেইন থেকে উত্তর খুঁজুন
-        ai_response = self.brain.find_response(query, user_id)
+        ai_response = None
+        if self.memory_backend != "database":
+            ai_response = brain.find_response(query, user_id, match=match)
+        
+        if not ai_response and self.memory_backend != "brain":
+            ai_response = self._search_database(query, brain)
         
         if ai_response:
-            # ক্যাশে স্টোর
-            self.response_cache[cache_key] = ai_response
-            
-            # ক্যাশে লিমিট
-            if len(self.response_cache) > 1000:
-                # FIFO: প্রথমেরগুলো রিমুভ
-                keys = list(self.response_cache.keys())
-                for key in keys[:100]:
-                    del self.response_cache[key]
+            # ক্যাশে স্টোর - উৎস প্যাটার্ন বদলালে বা একই শব্দের নতুন প্যাটার্ন এলে বাতিল;
+            # এর মধ্যে ব্রেইন বদলে গেলে পুরনো স্ন্যাপশটের উত্তর ক্যাশে রাখা হয় না
+            tags = [f"pat:{ai_response['pattern_hash']}"]
+            tags.extend(f"tok:{word}" for word in self._query_words(query, brain))
+            if brain is self.brain:
+                self.response_cache.set(cache_key, ai_response, tags)
             
             return ai_response
         
@@ -280,22 +1829,241 @@ class AIOrchestrator:
             "suggestion": "আমি এই প্রশ্নের উত্তর জানি না। আপনি আমাকে শিখিয়ে দিবেন?"
         }
     
+    def _search_database(self, query, brain):
+        """ডাটাবেজের ফুল-টেক্সট ক্যান্ডিডেট, ব্রেইনের মতো কোসাইন × কনফিডেন্স দিয়ে বাছাই
+        
+        FTS শুধু শব্দ মেলে এমন কয়েকটা রো আনে; চূড়ান্ত স্কোর আর থ্রেশহোল্ড ব্রেইনের
+        সাথে একই, তাই কোন মেমোরি থেকে উত্তর এল তাতে আচরণ বদলায় না।
+        """
+        candidates = self.db.search_ai_patterns(query, self.db_candidates)
+        if not candidates:
+            return None
+        
+        q_vector = brain._text_to_vector(query)
+        best_row, best_score = None, brain.pattern_threshold
+        
+        for row in candidates:
+            similarity = brain._cosine_similarity(q_vector, brain._text_to_vector(row["question"]))
+            adjusted_score = similarity * float(row["confidence"] if row["confidence"] is not None else 1.0)
+            
+            if adjusted_score > best_score:
+                best_row, best_score = row, adjusted_score
+        
+        if best_row is None:
+            return None
+        
+        if best_row.get("id") is not None:
+            self.db.increment_ai_usage(best_row["id"])
+        
+        return {
+            "response": best_row["response"],
+            "confidence": best_score,
+            "source": "ai_database",
+            "pattern_used": best_row["question"][:50],
+            "pattern_hash": best_row["pattern_hash"]
+        }
+    
     def teach_ai(self, user_id, question, response):
         """AI কে শেখান"""
-        success = self.brain.learn_pattern(question, response, user_id)
+        brain = self.brain
+        success = True
+        
+        if self.memory_backend != "database":
+            success = brain.learn_pattern(question, response, user_id)
+        
+        if self.memory_backend != "brain":
+            # ডাটাবেজে শেখা ব্রেইনের listener এ আসে না; একই শব্দের ক্যাশে এন্ট্রি এখানেই বাতিল
+            success = self.db.save_ai_pattern(question, response, user_id) is not None and success
+            self.response_cache.invalidate(*(f"tok:{word}" for word in self._query_words(question, brain)))
         
         if success:
             # ক্যাশে ইনভ্যালিডেট
+            # নির্ভরশীল সব এন্ট্রি listener দিয়েই বাতিল হয়; নিজের কী টাও মুছে দেওয়া
             cache_key = f"{user_id}_{hashlib.md5(question.encode()).hexdigest()}"
-            if cache_key in self.response_cache:
-                del self.response_cache[cache_key]
+            self.response_cache.delete(cache_key)
         
         return success
     
+    def _query_words(self, query, brain):
+        """_text_to_vector যে শব্দগুলো গোনে, fuzzy তে বদলে যাওয়া শব্দসহ"""
+        words = {word for word in query.lower().split() if len(word) > 2}
+        if brain.fuzzy is not None:
+            words.update(brain.vocab.word(token) for token in brain._text_to_vector(query, fuzzy=True))
+        return words
+    
+    def _invalidate_cache(self, p_hash, words):
+        """প্যাটার্ন শেখা/আপডেট/ডিকে হলে নির্ভরশীল ক্যাশে এন্ট্রি বাতিল"""
+        self.response_cache.invalidate(f"pat:{p_hash}", *(f"tok:{word}" for word in words))
+    
+    def reload_brain(self, path=None, wait=False):
+        """রিট্রেইন করা ব্রেইন ব্যাকগ্রাউন্ডে লোড ও ইনডেক্স করে অ্যাটমিক সোয়াপ (copy-on-write)
+        
+        path দিলে নতুন ব্রেইন সেই ফাইল থেকে লোড হয় এবং এরপর সেখানেই সেভ হয় - memory_path
+        স্থায়ীভাবে বদলায়; রিস্টার্টের পরও এটা রাখতে configs/ai.json এর brain.memory_path বদলান।
+        পুরনো ব্রেইন বন্ধের আগে নিজের ফাইলে সেভ হয়। path না দিলে বর্তমান ফাইলটাই নতুন
+        config["brain"] সেটিং দিয়ে আবার লোড হয়: আগে পুরনো ব্রেইনের সব শেখা ফাইলে যায়, লোডের
+        সময়ের শেখা পরে নতুন ব্রেইনে আসে। তাই রিট্রেইন করা ব্রেইন আলাদা ফাইলে লিখে path দিন।
+        লোডের সময় পুরনো ব্রেইনই উত্তর দেয়; সোয়াপের পর নতুন কল নতুন ব্রেইনে যায়।
+        ইউজার কনটেক্সট লাইভ স্টেট, তাই পুরনো ব্রেইন থেকে নতুনটায় চলে আসে।
+        wait=True দিলে সোয়াপ শেষ হওয়া পর্যন্ত অপেক্ষা। রিটার্ন: লোডার থ্রেড
+        """
+        thread = threading.Thread(target=self._reload, args=(path,), daemon=True)
+        thread.start()
+        
+        if wait:
+            thread.join()
+        return thread
+    
+    def _reload(self, path):
+        with self._reload_lock:
+            old = self.brain
+            brain_config = dict(self.config.get("brain", {}))
+            brain_config["memory_path"] = str(path if path is not None else old.memory_path)
+            
+            same_file = Path(brain_config["memory_path"]).resolve() == old.memory_path.resolve()
+            
+            # ভুল পাথে খালি ব্রেইন তৈরি হয়ে সব শেখা হারিয়ে না যায়
+            if not same_file and not Path(brain_config["memory_path"]).exists():
+                print(f"⚠️ Brain reload failed, file not found: {brain_config['memory_path']}")
+                return
+            
+            # একই ফাইল: পুরনো ব্রেইন এখনই সব লিখে দেয়, লোড চলাকালীন মিউটেশন captured এ জমে
+            captured = []
+            if same_file:
+                old._hand_off(captured.append)
+            
+            try:
+                brain = NeuralAI(**brain_config)
+            except Exception as e:
+                if same_file:
+                    old._take_back(captured)
+                print(f"⚠️ Brain reload failed, keeping current brain: {e}")
+                return
+            
+            brain.context_memory.close()
+            brain.context_memory = old.context_memory
+            brain.change_listeners.append(self._invalidate_cache)
+            
+            # সোয়াপ - একটাই অ্যাট্রিবিউট অ্যাসাইনমেন্ট
+            self.brain = brain
+            # শুধু এন্ট্রি বাদ; হিট/মিস কাউন্টার মনিটরিং এর জন্য থাকে
+            self.response_cache.clear(reset_stats=False)
+            self.reloads += 1
+            
+            if same_file:
+                # লোডের সময়ের শেখা নতুন ব্রেইনে; সোয়াপের আগে শুরু হওয়া কলও সরাসরি সেখানে যায়
+                with old._lock:
+                    for record in captured:
+                        brain._adopt(record)
+                    old._handoff = brain._adopt
+                old.close(save=False)
+            else:
+                old.close()
+            
+            print(f"🧠 Brain reloaded from {brain.memory_path} ({len(brain.patterns)} patterns)")
+    
+    def flush(self):
+        """ব্রেইনের জমে থাকা পরিবর্তন ডিস্কে লেখা"""
+        self.brain.flush()
+    
     def get_ai_status(self):
         """AI স্ট্যাটাস"""
         stats = self.brain.get_brain_stats()
         stats["cache_size"] = len(self.response_cache)
+        stats["cache"] = self.response_cache.stats()
+        stats["memory_backend"] = self.memory_backend
+        stats["reloads"] = self.reloads
         stats["active"] = True
         
-        return stats
\ No newline at end of file
+        return stats
+
+class AIMemoryService:
+    """প্লাগিনের জন্য শেয়ার করা AI মেমোরি - core.ai_memory
+    
+    আলাদা JSON ফাইল না খুলে AIOrchestrator এর ব্রেইনেই খোঁজা ও শেখা হয়: লুকআপ
+    মেমোরি থেকে শুধু পড়ে, সেভ ব্রেইনের write-behind রাইটারে। reload_brain এর পরেও
+    একই অবজেক্ট কাজ করে, কারণ প্রতি কলে orchestrator এর বর্তমান ব্রেইন ব্যবহার হয়।
+    """
+    
+    def __init__(self, orchestrator):
+        self.orchestrator = orchestrator
+    
+    def lookup(self, message, user_id=None):
+        """মেসেজের উত্তর, না পেলে None
+        
+        শুধু পড়া - process_query এর মতো রিকল কাউন্ট, কনটেক্সট, লার্নিং লগ বা ক্যাশে কিছুই
+        বদলায় না। ব্রেইনে আগে হুবহু প্রশ্ন, না পেলে find_top_k এর সেরা ম্যাচ; ডাটাবেজে হুবহু প্রশ্ন।
+        """
+        orchestrator = self.orchestrator
+        
+        if orchestrator.memory_backend != "database":
+            brain = orchestrator.brain
+            with brain._lock:
+                pattern = brain.patterns.get(brain._resolve_alias(hashlib.md5(message.encode()).hexdigest()))
+                responses = list(pattern["responses"]) if pattern else []
+            if not responses:
+                matches = brain.find_top_k(message, k=1)
+                responses = matches[0]["responses"] if matches else []
+            if responses:
+                return responses[0]
+        
+        if orchestrator.memory_backend != "brain":
+            row = orchestrator.db.find_ai_pattern(message)
+            if row:
+                return row["response"]
+        
+        return None
+    
+    def train(self, question, answer, user_id=None):
+        """প্রশ্ন-উত্তর শেখানো"""
+        return self.orchestrator.teach_ai(user_id, question, answer)
+    
+    def import_patterns(self, patterns):
+        """পুরনো ai_memory.json এর {md5: {"question", "responses", "learned_from"}} মেমোরিতে তোলা
+        
+        teach_ai দিয়ে শেখানো হয়, তাই memory_backend অনুযায়ী ব্রেইন, ডাটাবেজ বা দুটোতেই যায়।
+        যেখানে যাওয়ার কথা সব জায়গায় আগে থেকে থাকলে বাদ - প্রতি স্টার্টে ডাকলেও একবারই
+        শেখা হয়। রিটার্ন: নতুন শেখা প্যাটার্ন সংখ্যা
+        """
+        imported = 0
+        
+        for p_hash, pattern in patterns.items():
+            if self._known(p_hash, pattern["question"]):
+                continue
+            
+            for response in pattern.get("responses", []):
+                self.orchestrator.teach_ai(pattern.get("learned_from"), pattern["question"], response)
+            imported += 1
+        
+        if imported:
+            print(f"🧠 Imported {imported} legacy AI memory patterns")
+        return imported
+    
+    def _known(self, p_hash, question):
+        """প্যাটার্ন কনফিগ করা মেমোরিতে আছে কিনা - ব্রেইনে md5(question), ডাটাবেজে প্রশ্ন দিয়ে"""
+        orchestrator = self.orchestrator
+        
+        if orchestrator.memory_backend != "database":
+            brain = orchestrator.brain
+            if brain._resolve_alias(p_hash) not in brain.patterns:
+                return False
+        
+        if orchestrator.memory_backend != "brain":
+            if orchestrator.db.find_ai_pattern(question) is None:
+                return False
+        
+        return True
+    
+    def stats(self):
+        return self.orchestrator.get_ai_status()
+
+if __name__ == "__main__":
+    # অফলাইন কম্প্যাকশন: python AI_BRAIN.py compact data/ai_brain.json [threshold] [--apply]
+    if len(sys.argv) > 2 and sys.argv[1] == "compact":
+        args = [arg for arg in sys.argv[2:] if arg != "--apply"]
+        brain = NeuralAI(memory_path=args[0], write_behind=False)
+        report = brain.compact_patterns(float(args[1]) if len(args) > 1 else 0.95,
+                                        dry_run="--apply" not in sys.argv)
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print("Usage: python AI_BRAIN.py compact <brain file> [threshold] [--apply]")
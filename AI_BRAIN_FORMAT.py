@@ -0,0 +1,411 @@
+"""
+💾 AI BRAIN BINARY FORMAT
+Versioned mmap-able brain file: vocabulary table, CSR vectors, string arena
+"""
+
+import sys
+import json
+import mmap
+import struct
+from pathlib import Path
+from collections.abc import MutableMapping
+
+import numpy as np
+
+MAGIC = b"RANABRN\0"
+VERSION = 1
+
+# ম্যাজিক, ভার্সন, সেকশন সংখ্যা, হ্যাশ প্রস্থ, প্যাটার্ন, ভোকাবুলারি, nnz
+HEADER = struct.Struct("<8sIIIQQQ")
+# প্রতিটি সেকশন: অফসেট, দৈর্ঘ্য (বাইট)
+SECTION = struct.Struct("<QQ")
+
+# অ্যারের dtype PatternMatrix এর সাথে মিলিয়ে রাখা, যাতে কপি ছাড়াই ব্যবহার করা যায়
+SECTIONS = (
+    ("vocab_offsets", np.int64),
+    ("vocab_arena", np.uint8),
+    ("indptr", np.int64),
+    ("indices", np.int32),
+    ("row_ids", np.int32),
+    ("data", np.float64),
+    ("norms", np.float64),
+    ("confidence", np.float64),
+    ("hashes", np.uint8),
+    ("sorted_rows", np.int64),
+    ("text_offsets", np.int64),
+    ("text_arena", np.uint8),
+    ("extra_json", np.uint8),
+)
+
+def _arena(strings):
+    """স্ট্রিং তালিকা → (অফসেট অ্যারে, UTF-8 বাইট)"""
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in encoded], dtype=np.int64)
+    return offsets, b"".join(encoded)
+
+def _encode_patterns(patterns, vocab, int_tokens):
+    """dict প্যাটার্ন → রো সেকশনের টুকরো"""
+    indices = []
+    data = []
+    row_nnz = []
+    norms = []
+    confidence = []
+    hashes = []
+    texts = []
+
+    for p_hash, pattern in patterns:
+        vector = pattern.get("vector", {})
+        for token, count in vector.items():
+            token = int(token) if int_tokens else token
+            indices.append(vocab.setdefault(token, len(vocab)))
+            data.append(count)
+        row_nnz.append(len(vector))
+
+        # NeuralAI এর _cosine_similarity এর মতো একই সূত্রে নর্ম
+        norms.append(sum(v**2 for v in vector.values()) ** 0.5)
+        confidence.append(pattern.get("confidence", 1.0))
+        hashes.append(p_hash.encode('ascii'))
+
+        meta = {k: v for k, v in pattern.items() if k not in ("question", "vector")}
+        texts.append(pattern.get("question", "").encode('utf-8'))
+        texts.append(json.dumps(meta, ensure_ascii=False, separators=(",", ":")).encode('utf-8'))
+
+    return {
+        "indices": np.array(indices, dtype=np.int32),
+        "data": np.array(data, dtype=np.float64),
+        "row_nnz": np.array(row_nnz, dtype=np.int64),
+        "norms": np.array(norms, dtype=np.float64),
+        "confidence": np.array(confidence, dtype=np.float64),
+        "hashes": np.array(hashes, dtype=f"S{max((len(h) for h in hashes), default=32)}"),
+        "text_lengths": np.array([len(t) for t in texts], dtype=np.int64),
+        "text_arena": b"".join(texts),
+    }
+
+def _copy_rows(base, start, end):
+    """MappedBrain এর start..end রো হুবহু - কিছু ডিকোড না করে সেকশনের টুকরো"""
+    lo, hi = base.indptr[start], base.indptr[end]
+    text_lo, text_hi = base.text_offsets[2 * start], base.text_offsets[2 * end]
+    return {
+        "indices": base.indices[lo:hi],
+        "data": base.data[lo:hi],
+        "row_nnz": np.diff(base.indptr[start:end + 1]),
+        "norms": base.norms[start:end],
+        "confidence": base.confidence[start:end],
+        "hashes": base.hashes[start:end],
+        "text_lengths": np.diff(base.text_offsets[2 * start:2 * end + 1]),
+        "text_arena": base.text_arena[text_lo:text_hi].tobytes(),
+    }
+
+def write_brain(path, brain_data, base=None, deleted=()):
+    """ব্রেইন ডাটা (JSON ফর্ম) → বাইনারি ফাইল
+
+    base (MappedBrain) দিলে brain_data["patterns"] এ শুধু বদলানো/নতুন প্যাটার্ন থাকে:
+    base এর বাকি রো আর শব্দ-কলাম হুবহু কপি হয়, deleted এর hash বাদ যায়। রো এর ক্রম
+    base এর মতোই থাকে, নতুন প্যাটার্ন শেষে।
+    """
+    patterns = brain_data.get("patterns", {})
+
+    # "vocabulary" থাকলে ভেক্টরের কী word id (JSON থেকে এলে স্ট্রিং হয়ে থাকে)
+    int_tokens = "vocabulary" in brain_data
+    if base is not None and base.extra().get("token_type") != ("int" if int_tokens else "str"):
+        raise ValueError("Base brain token type does not match")
+
+    # base এর কলাম একই থাকে, তাই কপি করা indices বদলাতে হয় না
+    vocab = dict(base.vocabulary()) if base is not None else {}
+    chunks = []
+
+    if base is not None:
+        # বদলানো বা মোছা রো - এদের মাঝের টানা রো একবারে কপি
+        special = {}
+        for p_hash in list(patterns) + list(deleted):
+            row = base.row_of(p_hash)
+            if row is not None:
+                special[row] = p_hash
+
+        start = 0
+        for row in sorted(special):
+            if start < row:
+                chunks.append(_copy_rows(base, start, row))
+            p_hash = special[row]
+            if p_hash in patterns and p_hash not in deleted:
+                chunks.append(_encode_patterns([(p_hash, patterns[p_hash])], vocab, int_tokens))
+            start = row + 1
+        if start < len(base):
+            chunks.append(_copy_rows(base, start, len(base)))
+
+        added = [(p_hash, pattern) for p_hash, pattern in patterns.items()
+                 if base.row_of(p_hash) is None]
+        chunks.append(_encode_patterns(added, vocab, int_tokens))
+    else:
+        chunks.append(_encode_patterns(patterns.items(), vocab, int_tokens))
+
+    row_nnz = np.concatenate([chunk["row_nnz"] for chunk in chunks])
+    count = len(row_nnz)
+    indptr = np.zeros(count + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum(row_nnz)
+    text_offsets = np.zeros(2 * count + 1, dtype=np.int64)
+    text_offsets[1:] = np.cumsum(np.concatenate([chunk["text_lengths"] for chunk in chunks]))
+
+    hash_width = max((chunk["hashes"].dtype.itemsize for chunk in chunks if len(chunk["hashes"])), default=32)
+    hash_array = np.concatenate([chunk["hashes"].astype(f"S{hash_width}") for chunk in chunks])
+
+    vocab_offsets, vocab_arena = _arena([str(token) for token in vocab])
+
+    extra = {k: v for k, v in brain_data.items() if k != "patterns"}
+    extra["token_type"] = "int" if int_tokens else "str"
+
+    sections = {
+        "vocab_offsets": vocab_offsets.tobytes(),
+        "vocab_arena": vocab_arena,
+        "indptr": indptr.tobytes(),
+        "indices": np.concatenate([chunk["indices"] for chunk in chunks]).astype(np.int32).tobytes(),
+        "row_ids": np.repeat(np.arange(count, dtype=np.int32), row_nnz).tobytes(),
+        "data": np.concatenate([chunk["data"] for chunk in chunks]).astype(np.float64).tobytes(),
+        "norms": np.concatenate([chunk["norms"] for chunk in chunks]).astype(np.float64).tobytes(),
+        "confidence": np.concatenate([chunk["confidence"] for chunk in chunks]).astype(np.float64).tobytes(),
+        "hashes": hash_array.tobytes(),
+        "sorted_rows": np.argsort(hash_array, kind="stable").astype(np.int64).tobytes(),
+        "text_offsets": text_offsets.tobytes(),
+        "text_arena": b"".join(chunk["text_arena"] for chunk in chunks),
+        "extra_json": json.dumps(extra, ensure_ascii=False, separators=(",", ":")).encode('utf-8'),
+    }
+
+    # সব সেকশন 8 বাইটে অ্যালাইন, যাতে np.frombuffer সরাসরি কাজ করে
+    offset = HEADER.size + SECTION.size * len(SECTIONS)
+    table = []
+    for name, _ in SECTIONS:
+        offset += -offset % 8
+        table.append((offset, len(sections[name])))
+        offset += len(sections[name])
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(SECTIONS), hash_width, count, len(vocab), int(indptr[-1])))
+        for entry in table:
+            f.write(SECTION.pack(*entry))
+        for (name, _), (section_offset, _) in zip(SECTIONS, table):
+            f.write(b"\0" * (section_offset - f.tell()))
+            f.write(sections[name])
+
+class MappedBrain:
+    """mmap করা বাইনারি ব্রেইন - পুরো ডিসিরিয়ালাইজ ছাড়াই কোয়েরি"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+
+        # ACCESS_COPY: অ্যারে লেখা যায় কিন্তু পরিবর্তন ফাইলে যায় না
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_COPY)
+
+        magic, version, section_count, self.hash_width, self.count, self.vocab_size, self.nnz = \
+            HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a brain file: {self.path}")
+        if version != VERSION or section_count != len(SECTIONS):
+            raise ValueError(f"Unsupported brain format version: {version}")
+
+        for i, (name, dtype) in enumerate(SECTIONS):
+            offset, length = SECTION.unpack_from(self._mm, HEADER.size + SECTION.size * i)
+            view = np.frombuffer(self._mm, dtype=np.uint8, count=length, offset=offset)
+            setattr(self, name, view.view(dtype) if dtype is not np.uint8 else view)
+
+        self.hashes = self.hashes.view(f"S{self.hash_width}")
+        self._vocab = None
+        self._extra = None
+
+    def __len__(self):
+        return self.count
+
+    def _text(self, offsets, arena, i):
+        """অ্যারেনা থেকে একটি স্ট্রিং"""
+        return arena[offsets[i]:offsets[i + 1]].tobytes().decode('utf-8')
+
+    def hash_at(self, row):
+        """রো → pattern hash"""
+        return self.hashes[row].decode('ascii')
+
+    def row_of(self, p_hash):
+        """pattern hash → রো (বাইনারি সার্চ), না থাকলে None"""
+        try:
+            key = p_hash.encode('ascii')
+        except (AttributeError, UnicodeEncodeError):
+            return None
+
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.hashes[self.sorted_rows[mid]] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        if lo < self.count and self.hashes[self.sorted_rows[lo]] == key:
+            return int(self.sorted_rows[lo])
+        return None
+
+    def token(self, col):
+        """কলাম → টোকেন"""
+        token = self._text(self.vocab_offsets, self.vocab_arena, col)
+        return int(token) if self.extra().get("token_type") == "int" else token
+
+    def vocabulary(self):
+        """টোকেন → কলাম (প্রথম ব্যবহারে একবার তৈরি)"""
+        if self._vocab is None:
+            self._vocab = {self.token(col): col for col in range(self.vocab_size)}
+        return self._vocab
+
+    def vector(self, row):
+        """একটি রো এর স্পার্স ভেক্টর"""
+        start, end = self.indptr[row], self.indptr[row + 1]
+        return {
+            self.token(int(col)): int(count) if float(count).is_integer() else float(count)
+            for col, count in zip(self.indices[start:end], self.data[start:end])
+        }
+
+    def row_tokens(self):
+        """প্রতি রো এর (pattern hash, টোকেন তালিকা) - প্যাটার্ন JSON ডিকোড ছাড়া, ইনডেক্স বানাতে"""
+        tokens = list(self.vocabulary())
+        if self.extra().get("token_type") == "int":
+            col_tokens = np.array(tokens, dtype=np.int64)
+        else:
+            col_tokens = np.empty(len(tokens), dtype=object)
+            col_tokens[:] = tokens
+
+        for row in range(self.count):
+            start, end = self.indptr[row], self.indptr[row + 1]
+            yield self.hash_at(row), col_tokens[self.indices[start:end]].tolist()
+
+    def pattern(self, row):
+        """একটি প্যাটার্ন dict আকারে ডিকোড"""
+        pattern = {
+            "question": self._text(self.text_offsets, self.text_arena, 2 * row),
+            "vector": self.vector(row),
+        }
+        pattern.update(json.loads(self._text(self.text_offsets, self.text_arena, 2 * row + 1)))
+        return pattern
+
+    def extra(self):
+        """connections, context, learning ইত্যাদি"""
+        if self._extra is None:
+            self._extra = json.loads(self.extra_json.tobytes().decode('utf-8') or "{}")
+        return self._extra
+
+    def close(self):
+        """mmap বন্ধ"""
+        for name, _ in SECTIONS:
+            setattr(self, name, None)
+
+        try:
+            self._mm.close()
+        except BufferError:
+            # বাইরে কোনো অ্যারে ভিউ এখনও বেঁচে আছে; GC তে বন্ধ হবে
+            pass
+        self._file.close()
+
+class MappedPatterns(MutableMapping):
+    """MappedBrain এর উপর অলস pattern dict - শুধু ছোঁয়া প্যাটার্ন ডিকোড হয়
+
+    self[key] ডিকোড করা প্যাটার্ন ওভারলেতে রাখে, তাই পরিবর্তন হারায় না;
+    items()/values() ইটারেশনে ক্যাশ করে না, যাতে পুরো ব্রেইন হিপে না ওঠে।
+    """
+
+    def __init__(self, mapped):
+        self.mapped = mapped
+        self.overlay = {}
+        self.added = []
+        self.deleted = set()
+
+    def __getitem__(self, key):
+        if key in self.overlay:
+            return self.overlay[key]
+        if key in self.deleted:
+            raise KeyError(key)
+
+        row = self.mapped.row_of(key)
+        if row is None:
+            raise KeyError(key)
+
+        pattern = self.mapped.pattern(row)
+        self.overlay[key] = pattern
+        return pattern
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            if key in self.deleted:
+                self.deleted.discard(key)
+            else:
+                self.added.append(key)
+        self.overlay[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+
+        self.overlay.pop(key, None)
+        if key in self.added:
+            self.added.remove(key)
+        else:
+            self.deleted.add(key)
+
+    def __contains__(self, key):
+        if key in self.overlay:
+            return True
+        return key not in self.deleted and self.mapped.row_of(key) is not None
+
+    def __iter__(self):
+        for row in range(len(self.mapped)):
+            key = self.mapped.hash_at(row)
+            if key not in self.deleted:
+                yield key
+        yield from list(self.added)
+
+    def __len__(self):
+        return len(self.mapped) - len(self.deleted) + len(self.added)
+
+    def items(self):
+        for row in range(len(self.mapped)):
+            key = self.mapped.hash_at(row)
+            if key in self.deleted:
+                continue
+            yield key, self.overlay[key] if key in self.overlay else self.mapped.pattern(row)
+        for key in list(self.added):
+            yield key, self.overlay[key]
+
+    def values(self):
+        for _, pattern in self.items():
+            yield pattern
+
+def read_brain(path):
+    """বাইনারি ফাইল → ব্রেইন ডাটা (JSON ফর্ম)"""
+    mapped = MappedBrain(path)
+    try:
+        brain_data = {k: v for k, v in mapped.extra().items() if k != "token_type"}
+        brain_data["patterns"] = {mapped.hash_at(row): mapped.pattern(row) for row in range(len(mapped))}
+        return brain_data
+    finally:
+        mapped.close()
+
+def json_to_binary(json_path, bin_path):
+    """ai_brain.json → ai_brain.bin"""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        write_brain(bin_path, json.load(f))
+
+def binary_to_json(bin_path, json_path):
+    """ai_brain.bin → ai_brain.json"""
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(read_brain(bin_path), f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    # ব্যবহার: python AI_BRAIN_FORMAT.py data/ai_brain.json data/ai_brain.bin
+    #          python AI_BRAIN_FORMAT.py data/ai_brain.bin data/ai_brain.json
+    if len(sys.argv) != 3:
+        print("Usage: python AI_BRAIN_FORMAT.py <source> <target>")
+        sys.exit(1)
+
+    source, target = Path(sys.argv[1]), Path(sys.argv[2])
+    if source.suffix == ".bin":
+        binary_to_json(source, target)
+    else:
+        json_to_binary(source, target)
+
+    print(f"✅ Converted {source} → {target}")
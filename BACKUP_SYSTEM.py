@@ -98,7 +98,7 @@ class AutoBackupSystem:
                 "total_credits": sum(self.core._credits.values()) if hasattr(self.core, '_credits') else 0,
                 "plugins_count": len(self.core.plugins) if hasattr(self.core, 'plugins') else 0,
                 "ai_patterns": len(self.core.ai_orchestrator.brain.patterns) 
-                              if hasattr(self.core, 'ai_orchestrator') else 0
+                              if getattr(self.core, 'ai_orchestrator', None) else 0
             }
             
             with open(temp_dir / "system_status.json", 'w') as f:
@@ -24,6 +24,9 @@ class SQLBackupSystem:
         backup_path = self.backup_dir / f"{backup_name}.sql.gz"
         
         try:
+            # জমে থাকা লগ/লেজার সারিও যেন ব্যাকআপে থাকে
+            self.db.flush_writes()
+            
             # SQLite এর জন্য বিশেষ ব্যাকআপ
             if self.db.db_type == "sqlite":
                 db_path = self.db.config.get("path", "data/bot_database.db")
@@ -80,19 +83,20 @@ class SQLBackupSystem:
         tables = {}
         
         try:
-            self.db.cursor.execute("""
-                SELECT name FROM sqlite_master 
-                WHERE type='table' AND name NOT LIKE 'sqlite_%'
-            """)
-            
-            for table in self.db.cursor.fetchall():
-                table_name = table[0]
-                
-                # row count
-                self.db.cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-                row_count = self.db.cursor.fetchone()[0]
+            with self.db.transaction() as cursor:
+                cursor.execute("""
+                    SELECT name FROM sqlite_master 
+                    WHERE type='table' AND name NOT LIKE 'sqlite_%'
+                """)
                 
-                tables[table_name] = {"rows": row_count}
+                for table in cursor.fetchall():
+                    table_name = table[0]
+                    
+                    # row count
+                    cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+                    row_count = cursor.fetchone()[0]
+                    
+                    tables[table_name] = {"rows": row_count}
         except:
             pass
         
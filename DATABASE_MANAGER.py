@@ -7,17 +7,954 @@ import sqlite3
 import psycopg2
 import mysql.connector
 import json
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 
+# বাংলা কার-চিহ্ন, চন্দ্রবিন্দু, হসন্ত ইত্যাদি (Unicode Mn/Mc) - FTS টোকেনাইজারে অক্ষরের অংশ
+BANGLA_MARKS = "".join(chr(code) for code in [*range(0x0981, 0x0984), *range(0x09BC, 0x09D8), 0x09E2, 0x09E3])
+
+class PoolTimeout(Exception):
+    """পুলের সব কানেকশন ব্যস্ত, connection_timeout এর মধ্যে একটাও ফেরত আসেনি"""
+
+class ConnectionPool:
+    """PostgreSQL/MySQL কানেকশন পুল
+    
+    pool_size টা কানেকশন খালি অবস্থায় রাখা হয়; চাপ বাড়লে আরো max_overflow টা খোলা হয়
+    (মোট max_connections এর বেশি না), সেগুলো ফেরত এলেই বন্ধ। health_check_interval
+    সেকেন্ডের বেশি অলস থাকা কানেকশন দেওয়ার আগে "SELECT 1" দিয়ে যাচাই হয়।
+    """
+    
+    def __init__(self, connect, pool_size=10, max_overflow=20, max_connections=100,
+                 timeout=30, health_check_interval=30):
+        self.connect = connect
+        self.pool_size = pool_size
+        self.max_connections = min(pool_size + max_overflow, max_connections)
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        
+        self._idle = deque()  # (connection, শেষ ফেরতের সময়), শেষেরটা সবচেয়ে তাজা
+        self._size = 0  # খোলা কানেকশন, খালি + ধার দেওয়া
+        self._cond = threading.Condition()
+        self._closed = False
+        
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.created = 0
+        self.discarded = 0
+        self.health_checks = 0
+        self.peak_in_use = 0
+    
+    def checkout(self):
+        """একটা কানেকশন ধার - খালি না থাকলে নতুন, সীমায় পৌঁছালে timeout পর্যন্ত অপেক্ষা"""
+        deadline = time.monotonic() + self.timeout
+        connection, last_used = None, None
+        waited = False
+        
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeout("Connection pool is closed")
+                
+                if self._idle:
+                    connection, last_used = self._idle.pop()
+                    break
+                
+                if self._size < self.max_connections:
+                    self._size += 1
+                    break
+                
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(f"No free connection within {self.timeout}s "
+                                      f"({self.max_connections} in use)")
+                
+                if not waited:
+                    self.waits += 1
+                    waited = True
+                self._cond.wait(remaining)
+            
+            self.checkouts += 1
+            self.peak_in_use = max(self.peak_in_use, self._size - len(self._idle))
+        
+        # নেটওয়ার্কের কাজ লকের বাইরে
+        try:
+            if connection is not None and time.monotonic() - last_used > self.health_check_interval:
+                if not self._healthy(connection):
+                    self._close(connection)
+                    connection = None
+            
+            if connection is None:
+                connection = self.connect()
+                with self._cond:
+                    self.created += 1
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        
+        return connection
+    
+    def release(self, connection, discard=False):
+        """কানেকশন ফেরত; ভাঙা (discard) বা ওভারফ্লো হলে বন্ধ"""
+        with self._cond:
+            keep = not discard and not self._closed and self._size <= self.pool_size
+            if keep:
+                self._idle.append((connection, time.monotonic()))
+            else:
+                self._size -= 1
+            self._cond.notify()
+        
+        if not keep:
+            self._close(connection)
+    
+    def _healthy(self, connection):
+        with self._cond:
+            self.health_checks += 1
+        
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
+            connection.rollback()
+            return True
+        except Exception:
+            return False
+    
+    def _close(self, connection):
+        with self._cond:
+            self.discarded += 1
+        
+        try:
+            connection.close()
+        except Exception:
+            pass
+    
+    def close_all(self):
+        """খালি কানেকশন বন্ধ; ধার দেওয়াগুলো ফেরত আসার সময় বন্ধ হবে"""
+        with self._cond:
+            self._closed = True
+            idle = [connection for connection, _ in self._idle]
+            self._size -= len(idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        
+        for connection in idle:
+            self._close(connection)
+    
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "pool_size": self.pool_size,
+                "max_connections": self.max_connections,
+                "peak_in_use": self.peak_in_use,
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "created": self.created,
+                "discarded": self.discarded,
+                "health_checks": self.health_checks
+            }
+
+class ThreadLocalPool:
+    """SQLite - প্রতিটি থ্রেডের নিজস্ব কানেকশন
+    
+    ফাইল-ভিত্তিক ডাটাবেজে নেটওয়ার্ক পুলের দরকার নেই, কিন্তু একটা কানেকশন সব থ্রেডে
+    শেয়ার করলে একজনের ট্রানজ্যাকশনে অন্যজনের স্টেটমেন্ট ঢুকে যায়। শেষ হয়ে যাওয়া
+    থ্রেডের কানেকশন পরের নতুন কানেকশন খোলার সময় বন্ধ হয়।
+    """
+    
+    def __init__(self, connect):
+        self.connect = connect
+        self._local = threading.local()
+        self._connections = {}  # thread → connection
+        self._lock = threading.Lock()
+        self._closed = False
+        
+        self.checkouts = 0
+        self.created = 0
+        self.discarded = 0
+    
+    def checkout(self):
+        if self._closed:
+            raise PoolTimeout("Connection pool is closed")
+        
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self.connect()
+            with self._lock:
+                self.created += 1
+                self._connections[threading.current_thread()] = connection
+                self._reap()
+        
+        with self._lock:
+            self.checkouts += 1
+        return connection
+    
+    def release(self, connection, discard=False):
+        if not discard:
+            return
+        
+        self._local.connection = None
+        with self._lock:
+            self._connections.pop(threading.current_thread(), None)
+            self.discarded += 1
+        connection.close()
+    
+    def _reap(self):
+        """মরা থ্রেডের কানেকশন বন্ধ"""
+        for thread in [thread for thread in self._connections if not thread.is_alive()]:
+            self._connections.pop(thread).close()
+            self.discarded += 1
+    
+    def close_all(self):
+        with self._lock:
+            self._closed = True
+            for connection in self._connections.values():
+                connection.close()
+            self._connections.clear()
+    
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._connections),
+                "threads": len(self._connections),
+                "checkouts": self.checkouts,
+                "created": self.created,
+                "discarded": self.discarded
+            }
+
+class Dialect:
+    """SQL ডায়ালেক্ট - কোড একবার PostgreSQL স্টাইলে (%s, RETURNING, ON CONFLICT) লেখা,
+    প্রতিটি SQL টেক্সট ব্যাকএন্ডের রূপে একবারই রূপান্তর হয়ে ক্যাশে থাকে"""
+    
+    PREPARABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+    
+    def __init__(self, db_type):
+        self.db_type = db_type
+        self._rewritten = {}
+    
+    def sql(self, text):
+        """%s প্লেসহোল্ডারের SQL → এই ব্যাকএন্ডের SQL"""
+        rewritten = self._rewritten.get(text)
+        if rewritten is None:
+            rewritten = self._rewritten[text] = self._rewrite(text)
+        return rewritten
+    
+    def _rewrite(self, text):
+        if self.db_type == "sqlite":
+            return text.replace("%s", "?")
+        
+        if self.db_type == "mysql":
+            # MySQL এ RETURNING নেই (inserted_id → lastrowid), upsert এর নাম আলাদা
+            text = re.sub(r"\s+RETURNING\s+id\s*$", "\n", text)
+            text = re.sub(r"ON\s+CONFLICT\s*\([^)]*\)\s*DO\s+UPDATE\s+SET", "ON DUPLICATE KEY UPDATE", text)
+        return text
+    
+    def ddl(self, text):
+        """CREATE TABLE এর টাইপ"""
+        if self.db_type == "sqlite":
+            # SERIAL কোনো টাইপ না, কলামটা NULL থেকে যায়; rowid এর alias বানালে
+            # RETURNING id আর FTS5 এর content_rowid দুটোই ঠিক চলে
+            return text.replace("SERIAL PRIMARY KEY", "INTEGER PRIMARY KEY AUTOINCREMENT")
+        if self.db_type == "mysql":
+            return text.replace("JSONB", "JSON")
+        return text
+    
+    def inserted_id(self, cursor):
+        """INSERT ... RETURNING id এর id"""
+        if self.db_type == "mysql":
+            return cursor.lastrowid
+        
+        row = cursor.fetchone()
+        return row[0] if row else None
+    
+    def preparable(self, text):
+        return text.lstrip().upper().startswith(self.PREPARABLE)
+    
+    def numbered(self, text):
+        """PostgreSQL PREPARE এর জন্য %s → $1, $2 ... (%% → %)"""
+        counter = iter(range(1, text.count("%s") + 1))
+        return re.sub(r"%([s%])", lambda m: f"${next(counter)}" if m.group(1) == "s" else "%", text)
+
+class StatementCache:
+    """একটা কানেকশনের প্রিপেয়ার্ড স্টেটমেন্ট LRU
+    
+    SQLite: sqlite3 নিজেই cached_statements টা কম্পাইল করা স্টেটমেন্ট SQL টেক্সট দিয়ে
+    LRU তে রাখে; এখানে একই সাইজের LRU শুধু হিসাব রাখে কোনটা হিট।
+    PostgreSQL: মিস হলে সার্ভারে PREPARE, হিটে শুধু EXECUTE - পার্স/প্ল্যান বাদ;
+    LRU থেকে বাদ পড়লে DEALLOCATE। MySQL এ ড্রাইভারের সাধারণ execute (ক্যাশে নেই)।
+    """
+    
+    def __init__(self, dialect, size, stats):
+        self.dialect = dialect
+        self.size = size
+        self.stats = stats
+        self.statements = OrderedDict()  # backend SQL → PostgreSQL স্টেটমেন্টের নাম
+        self._next_name = 0
+    
+    def execute(self, cursor, sql, params=()):
+        text = self.dialect.sql(sql)
+        
+        if self.size <= 0 or self.dialect.db_type == "mysql" or not self.dialect.preparable(text):
+            return cursor.execute(text, params)
+        
+        name = self.statements.get(text)
+        if name is not None:
+            self.statements.move_to_end(text)
+            self.stats.record(hit=True)
+        else:
+            name = f"rb_stmt_{self._next_name}"
+            self._next_name += 1
+            
+            if self.dialect.db_type == "postgresql":
+                cursor.execute(f"PREPARE {name} AS {self.dialect.numbered(text)}")
+            
+            self.statements[text] = name
+            evicted = 0
+            while len(self.statements) > self.size:
+                _, old_name = self.statements.popitem(last=False)
+                if self.dialect.db_type == "postgresql":
+                    cursor.execute(f"DEALLOCATE {old_name}")
+                evicted += 1
+            self.stats.record(hit=False, evicted=evicted)
+        
+        if self.dialect.db_type == "postgresql":
+            if params:
+                return cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+            return cursor.execute(f"EXECUTE {name}")
+        
+        return cursor.execute(text, params)
+
+class StatementStats:
+    """সব কানেকশনের স্টেটমেন্ট ক্যাশে হিট/মিস
+    
+    estimated=True (SQLite): sqlite3 নিজের স্টেটমেন্ট ক্যাশের হিট জানায় না, তাই সংখ্যাগুলো
+    একই সাইজের ছায়া LRU থেকে আনুমানিক। PostgreSQL এ সত্যিকারের PREPARE/EXECUTE গোনা।
+    """
+    
+    def __init__(self, estimated=False):
+        self.estimated = estimated
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+    
+    def record(self, hit, evicted=0):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self.evictions += evicted
+    
+    def to_dict(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total > 0 else 0,
+                "estimated": self.estimated
+            }
+
+class PreparedConnection:
+    """ড্রাইভারের কানেকশন + তার StatementCache (পুল এটাকেই ধার দেয়)"""
+    
+    def __init__(self, raw, statements):
+        self.raw = raw
+        self.statements = statements
+    
+    def cursor(self, **kwargs):
+        return self.raw.cursor(**kwargs)
+    
+    def commit(self):
+        self.raw.commit()
+    
+    def rollback(self):
+        self.raw.rollback()
+    
+    def close(self):
+        self.raw.close()
+
+class PreparedCursor:
+    """transaction() এর কার্সর - execute ডায়ালেক্ট ও স্টেটমেন্ট ক্যাশে হয়ে যায়, বাকি সব ড্রাইভারের"""
+    
+    def __init__(self, cursor, connection, tuner=None):
+        self.cursor = cursor
+        self.connection = connection
+        self.tuner = tuner
+    
+    def execute(self, sql, params=()):
+        result = self.connection.statements.execute(self.cursor, sql, params)
+        if self.tuner is not None:
+            self.tuner.count_writes(sql, self.cursor.rowcount)
+        return result
+    
+    def executemany(self, sql, rows):
+        result = self.cursor.executemany(self.connection.statements.dialect.sql(sql), rows)
+        if self.tuner is not None:
+            self.tuner.count_writes(sql, len(rows))
+        return result
+    
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+class StorageTuner:
+    """SQL_CONFIG.json এর টিউনিং প্রোফাইল - প্রাগমা, ইনডেক্স, VACUUM/ANALYZE
+    
+    SQLite প্রাগমা (journal_mode, synchronous, cache_size ...) প্রতিটি নতুন কানেকশনে বসে।
+    optimize_after_rows টা রো লেখা হলে ব্যাকগ্রাউন্ডে ANALYZE (SQLite এ PRAGMA optimize),
+    যাতে প্ল্যানারের পরিসংখ্যান ডাটার সাথে তাল রাখে। report() চাওয়া আর আসল মান মেলায়।
+    """
+    
+    SQLITE_PRAGMAS = ("journal_mode", "synchronous", "cache_size", "temp_store",
+                      "mmap_size", "foreign_keys", "wal_autocheckpoint")
+    
+    # পড়ার সময় SQLite এগুলো সংখ্যা হিসেবে ফেরত দেয়
+    PRAGMA_VALUES = {
+        "synchronous": {"OFF": 0, "NORMAL": 1, "FULL": 2, "EXTRA": 3},
+        "temp_store": {"DEFAULT": 0, "FILE": 1, "MEMORY": 2},
+        "foreign_keys": {"OFF": 0, "ON": 1},
+    }
+    
+    TABLES = ("users", "user_bots", "credits", "payments", "ai_memory",
+              "conversations", "scheduled_messages", "audit_log")
+    
+    def __init__(self, db, config):
+        self.db = db
+        self.pragmas = {
+            name: self._pragma_value(config[name])
+            for name in self.SQLITE_PRAGMAS if config.get(name) is not None
+        }
+        self.indexes = list(config.get("indexes", []))
+        self.vacuum_on_start = config.get("vacuum_on_start", False)
+        self.optimize_on_start = config.get("optimize_on_start", False)
+        self.optimize_after_rows = config.get("optimize_after_rows", 0)
+        
+        self.rows_since_optimize = 0
+        self.optimizations = 0
+        self.last_optimize = None
+        self._optimizing = False
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _pragma_value(value):
+        if isinstance(value, bool):
+            return "ON" if value else "OFF"
+        
+        # কনফিগের মান সরাসরি SQL এ বসে, তাই শুধু শব্দ/সংখ্যা
+        if not re.fullmatch(r"-?\w+", str(value)):
+            raise ValueError(f"Invalid pragma value: {value!r}")
+        return value
+    
+    def apply_pragmas(self, connection):
+        """নতুন SQLite কানেকশনে প্রাগমা (journal_mode ফাইলে থাকে, বাকিগুলো কানেকশন প্রতি)"""
+        for name, value in self.pragmas.items():
+            connection.execute(f"PRAGMA {name} = {value}")
+    
+    def on_start(self):
+        """টেবিল তৈরির পর: ইনডেক্স, VACUUM, ANALYZE, তারপর সেটিং যাচাই"""
+        for index_sql in self.indexes:
+            try:
+                with self.db.transaction() as cursor:
+                    cursor.execute(index_sql)
+            except Exception as e:
+                print(f"⚠️ Index creation error: {e}")
+        
+        # VACUUM ট্রানজ্যাকশনের ভেতরে চলে না; PostgreSQL/MySQL এ autovacuum/purge নিজেই করে
+        if self.vacuum_on_start and self.db.db_type == "sqlite":
+            try:
+                with self.db.transaction() as cursor:
+                    cursor.execute("VACUUM")
+            except Exception as e:
+                print(f"⚠️ VACUUM error: {e}")
+        
+        if self.optimize_on_start:
+            self.optimize()
+        
+        report = self.report()
+        for name, pragma in report["pragmas"].items():
+            if not pragma["ok"]:
+                print(f"⚠️ SQLite {name}: requested {pragma['requested']}, effective {pragma['effective']}")
+        if report["indexes"]["missing"]:
+            print(f"⚠️ Missing indexes: {', '.join(report['indexes']['missing'])}")
+    
+    def count_writes(self, sql, rowcount):
+        """লেখা রো গোনা; সীমা পেরোলে ব্যাকগ্রাউন্ডে optimize"""
+        if not self.optimize_after_rows or rowcount is None or rowcount <= 0:
+            return
+        if sql.lstrip()[:6].upper() not in ("INSERT", "UPDATE", "DELETE"):
+            return
+        
+        with self._lock:
+            self.rows_since_optimize += rowcount
+            if self.rows_since_optimize < self.optimize_after_rows or self._optimizing:
+                return
+            self._optimizing = True
+        
+        threading.Thread(target=self.optimize, daemon=True).start()
+    
+    def optimize(self):
+        """প্ল্যানারের পরিসংখ্যান হালনাগাদ - SQLite: PRAGMA optimize, বাকিরা ANALYZE"""
+        with self._lock:
+            self._optimizing = True
+            rows = self.rows_since_optimize
+        
+        try:
+            with self.db.transaction() as cursor:
+                if self.db.db_type == "sqlite":
+                    cursor.execute("PRAGMA optimize")
+                elif self.db.db_type == "postgresql":
+                    cursor.execute("ANALYZE")
+                else:
+                    cursor.execute(f"ANALYZE TABLE {', '.join(self.TABLES)}")
+            
+            with self._lock:
+                self.rows_since_optimize -= rows
+                self.optimizations += 1
+                self.last_optimize = datetime.now().isoformat()
+        except Exception as e:
+            print(f"⚠️ Database optimize error: {e}")
+        finally:
+            with self._lock:
+                self._optimizing = False
+    
+    def report(self):
+        """চাওয়া বনাম আসল সেটিং, ইনডেক্স ও optimize এর অবস্থা"""
+        pragmas = {}
+        if self.db.db_type == "sqlite":
+            with self.db.transaction() as cursor:
+                for name, requested in self.pragmas.items():
+                    cursor.execute(f"PRAGMA {name}")
+                    effective = cursor.fetchone()[0]
+                    expected = self.PRAGMA_VALUES.get(name, {}).get(str(requested).upper(), requested)
+                    pragmas[name] = {
+                        "requested": requested,
+                        "effective": effective,
+                        "ok": str(effective).lower() == str(expected).lower()
+                    }
+        
+        declared = [match.group(1) for match in
+                    (re.search(r"INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)", sql, re.I) for sql in self.indexes)
+                    if match]
+        present = self._index_names()
+        
+        with self._lock:
+            return {
+                "pragmas": pragmas,
+                "indexes": {
+                    "declared": len(declared),
+                    "present": len([name for name in declared if name in present]),
+                    "missing": [name for name in declared if name not in present]
+                },
+                "rows_since_optimize": self.rows_since_optimize,
+                "optimize_after_rows": self.optimize_after_rows,
+                "optimizations": self.optimizations,
+                "last_optimize": self.last_optimize
+            }
+    
+    def _index_names(self):
+        if self.db.db_type == "sqlite":
+            sql = "SELECT name FROM sqlite_master WHERE type = 'index'"
+        elif self.db.db_type == "postgresql":
+            sql = "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema()"
+        else:
+            sql = "SELECT DISTINCT index_name FROM information_schema.statistics WHERE table_schema = DATABASE()"
+        
+        try:
+            with self.db.transaction() as cursor:
+                cursor.execute(sql)
+                return {list(row.values())[0] if isinstance(row, dict) else row[0]
+                        for row in cursor.fetchall()}
+        except Exception as e:
+            print(f"⚠️ Index lookup error: {e}")
+            return set()
+
+class BatchWriter:
+    """write-behind INSERT - সারি জমিয়ে flush_ms পরপর বা batch_rows হলেই এক ট্রানজ্যাকশনে executemany
+    
+    add() শুধু মেমোরিতে জমায়, তাই হট পাথে কোনো কমিট অপেক্ষা নেই; চলতি ট্রানজ্যাকশনের ভিতর
+    থেকে ডাকলে সারি জমে commit এর পরে, rollback হলে বাদ। সারি max_pending এ আটকানো:
+    overflow="block" এ কলার block_ms পর্যন্ত ফ্লাশারের অপেক্ষা করে, তারপর নিজেই সারিটা লেখে;
+    "drop" এ সারি বাদ পড়ে আর dropped বাড়ে। ব্যাচ ব্যর্থ হলে সারিগুলো একটা একটা করে লেখা হয়;
+    যে সারি একা লিখলেও ব্যর্থ (poison row) সেটা dead-letter এ যায়, বাকিরা আটকে থাকে না।
+    একটা সারিও না লেখা গেলে (ডাটাবেজ ডাউন) সব সামনে ফেরত যায়। close() এ বাকি সব লিখে তবেই থামে।
+    """
+    
+    def __init__(self, db, sql, flush_ms=200, batch_rows=500, name="Batch",
+                 max_pending=10000, overflow="block", block_ms=1000, dead_letter_rows=1000):
+        if overflow not in ("block", "drop"):
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        
+        self.db = db
+        self.sql = sql
+        self.flush_interval = flush_ms / 1000
+        self.batch_rows = batch_rows
+        self.name = name
+        self.max_pending = max(max_pending, batch_rows)
+        self.overflow = overflow
+        self.block_timeout = block_ms / 1000
+        
+        self._rows = []
+        self._lock = threading.Lock()
+        self._space = threading.Condition(self._lock)
+        # একসাথে একটাই flush - লেখার ক্রম বজায় থাকে
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        # একা লিখলেও ব্যর্থ সারি (row, error) - শেষ dead_letter_rows টা রাখা হয়
+        self.dead_letter = deque(maxlen=dead_letter_rows)
+        
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+        self.dropped = 0
+        self.inline = 0
+        
+        self._thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._thread.start()
+    
+    def add(self, row):
+        self.db.after_commit(lambda: self._enqueue(row))
+    
+    def _enqueue(self, row):
+        with self._lock:
+            if not self._closed and len(self._rows) >= self.max_pending:
+                if self.overflow == "drop":
+                    self.dropped += 1
+                    return
+                
+                self._wakeup.set()
+                self._space.wait_for(lambda: len(self._rows) < self.max_pending or self._closed,
+                                     timeout=self.block_timeout)
+            
+            # বন্ধ হয়ে গেলে বা অপেক্ষার পরেও জায়গা না হলে কলার নিজেই লেখে
+            write_now = self._closed or len(self._rows) >= self.max_pending
+            if write_now:
+                self.inline += 1
+            else:
+                self._rows.append(row)
+                full = len(self._rows) >= self.batch_rows
+        
+        if write_now:
+            self._write_inline(row)
+        elif full:
+            self._wakeup.set()
+    
+    def _write_inline(self, row):
+        try:
+            with self.db.transaction() as cursor:
+                cursor.execute(self.sql, row)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+                self.dropped += 1
+                self.dead_letter.append((row, str(e)))
+            print(f"⚠️ {self.name} write error: {e}")
+    
+    def _flush_loop(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+    
+    def flush(self):
+        """জমা সব সারি এক ট্রানজ্যাকশনে লিখুন; লেখা সারির সংখ্যা ফেরত"""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, []
+                self._space.notify_all()
+            
+            if not rows:
+                return 0
+            
+            try:
+                with self.db.transaction() as cursor:
+                    cursor.executemany(self.sql, rows)
+            except Exception as e:
+                print(f"⚠️ {self.name} batch error, retrying {len(rows)} rows one by one: {e}")
+                return self._flush_rows(rows)
+            
+            with self._lock:
+                self.written += len(rows)
+                self.batches += 1
+            return len(rows)
+    
+    def _flush_rows(self, rows):
+        """ব্যর্থ ব্যাচ সারি ধরে লিখুন - খারাপ সারি dead-letter এ, বাকিরা লেখা হয়"""
+        failed = []
+        for row in rows:
+            try:
+                with self.db.transaction() as cursor:
+                    cursor.execute(self.sql, row)
+            except Exception as e:
+                failed.append((row, str(e)))
+        
+        written = len(rows) - len(failed)
+        with self._lock:
+            self.errors += 1
+            if not written:
+                # কোনো সারিই গেল না - সারির দোষ নয়, পরের flush এ আবার চেষ্টা
+                self._rows[:0] = rows
+                # ফেরত সারিসহ সীমা ছাড়ালে সবচেয়ে পুরনোগুলো বাদ
+                excess = len(self._rows) - self.max_pending
+                if excess > 0:
+                    del self._rows[:excess]
+                    self.dropped += excess
+            else:
+                self.written += written
+                self.batches += 1
+                self.dropped += len(failed)
+                self.dead_letter.extend(failed)
+        
+        if not written:
+            print(f"⚠️ {self.name} flush error ({len(rows)} rows kept): {failed[0][1]}")
+        else:
+            for row, error in failed:
+                print(f"⚠️ {self.name} dead-letter row {row}: {error}")
+        return written
+    
+    def pending(self):
+        with self._lock:
+            return len(self._rows)
+    
+    def close(self):
+        """ফ্লাশার থামিয়ে বাকি সারি লিখে দিন"""
+        with self._lock:
+            self._closed = True
+            self._space.notify_all()
+        self._wakeup.set()
+        self._thread.join(timeout=5)
+        self.flush()
+    
+    def stats(self):
+        with self._lock:
+            return {
+                "pending": len(self._rows),
+                "max_pending": self.max_pending,
+                "overflow": self.overflow,
+                "written": self.written,
+                "batches": self.batches,
+                "avg_batch": round(self.written / self.batches, 1) if self.batches else 0,
+                "inline": self.inline,
+                "dropped": self.dropped,
+                "dead_letter": len(self.dead_letter),
+                "errors": self.errors
+            }
+
+class CreditEngine:
+    """ক্রেডিট ব্যালেন্স - এক স্টেটমেন্টে অ্যাটমিক ডেবিট, write-behind লেজার, হট ব্যালেন্স ক্যাশে
+    
+    ব্যালেন্সের আসল জায়গা user_bots.credit_balance। ডেবিট একটাই শর্তযুক্ত
+    UPDATE ... WHERE credit_balance >= amount RETURNING, তাই একসাথে অনেক হ্যান্ডলার কাটলেও
+    কোনো ডেবিট হারায় না, দুবার কাটে না, ব্যালেন্স মাইনাসে যায় না। usage লেজার সারি
+    BatchWriter এ জমে গ্রুপ কমিট হয়। ক্যাশে শুধু ডাটাবেজের ফেরত দেওয়া মান বসে, তাও
+    বাইরের ট্রানজ্যাকশন commit হওয়ার পরে আর ডাটাবেজের লেখার ক্রমেই; rollback হলে মুছে যায়।
+    """
+    
+    DEBIT_SQL = """
+    UPDATE user_bots SET credit_balance = credit_balance - %s
+    WHERE user_id = %s AND is_active = TRUE AND credit_balance >= %s
+    """
+    
+    CREDIT_SQL = """
+    UPDATE user_bots SET credit_balance = credit_balance + %s, last_payment_date = CURRENT_TIMESTAMP
+    WHERE user_id = %s AND is_active = TRUE
+    """
+    
+    BALANCE_SQL = "SELECT credit_balance FROM user_bots WHERE user_id = %s AND is_active = TRUE"
+    
+    LEDGER_SQL = """
+    INSERT INTO credits (user_id, amount, transaction_type, reference_id, description, balance_after)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    """
+    
+    def __init__(self, db, flush_ms=200, batch_rows=500, cache_ttl=60, max_pending=10000, block_ms=1000):
+        self.db = db
+        self.cache_ttl = cache_ttl
+        # টাকার হিসাব - লেজার সারি কখনো drop নয়
+        self.ledger = BatchWriter(db, self.LEDGER_SQL, flush_ms, batch_rows, "Credit ledger",
+                                  max_pending=max_pending, overflow="block", block_ms=block_ms)
+        
+        # user_id → (balance, loaded_at); version বাড়ে প্রতিটি লেখায়, পুরনো SELECT যেন ক্যাশ না মোছে
+        self._balances = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+        
+        self.debits = 0
+        self.rejected = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+    
+    def debit(self, user_id, amount=1, description="Message sent"):
+        """ব্যালেন্স থাকলে কাটুন - নতুন ব্যালেন্স, না থাকলে None"""
+        with self.db.transaction() as cursor:
+            balance = self._apply(cursor, self.DEBIT_SQL, (amount, user_id, amount), user_id)
+            if balance is None:
+                with self._lock:
+                    self.rejected += 1
+                return None
+            self._stage(user_id, balance)
+        
+        with self._lock:
+            self.debits += 1
+        self.ledger.add((user_id, -amount, "usage", None, description, balance))
+        return balance
+    
+    def credit(self, user_id, amount, description="", transaction_type="purchase", reference_id=""):
+        """ব্যালেন্সে যোগ - টাকা ঢোকার লেজার সারি একই ট্রানজ্যাকশনে লেখা হয়"""
+        with self.db.transaction() as cursor:
+            balance = self._apply(cursor, self.CREDIT_SQL, (amount, user_id), user_id)
+            if balance is None:
+                # সক্রিয় বট নেই - আগের মতো শুধু লেজারে থাকে
+                balance = amount
+            else:
+                self._stage(user_id, balance)
+            
+            cursor.execute(self.LEDGER_SQL, (
+                user_id, amount, transaction_type,
+                reference_id, description, balance
+            ))
+        
+        return balance
+    
+    def balance(self, user_id):
+        """ব্যালেন্স - ক্যাশে থাকলে সেখান থেকে, নাহলে ডাটাবেজ থেকে পড়ে ক্যাশে"""
+        with self._lock:
+            cached = self._balances.get(user_id)
+            if cached and time.monotonic() - cached[1] < self.cache_ttl:
+                self.cache_hits += 1
+                return cached[0]
+            self.cache_misses += 1
+            version = self._versions.get(user_id, 0)
+        
+        with self.db.transaction() as cursor:
+            cursor.execute(self.BALANCE_SQL, (user_id,))
+            row = cursor.fetchone()
+        
+        if not row:
+            return 0
+        
+        balance = self._value(row)
+        with self._lock:
+            if self._versions.get(user_id, 0) == version:
+                self._balances[user_id] = (balance, time.monotonic())
+        return balance
+    
+    def _apply(self, cursor, sql, params, user_id):
+        """শর্তযুক্ত UPDATE চালিয়ে নতুন ব্যালেন্স; কোনো সারি না মিললে None"""
+        if self.db.db_type == "mysql":
+            # MySQL এ RETURNING নেই; UPDATE এর row lock কমিট পর্যন্ত থাকে, তাই পরের SELECT একই মান দেখে
+            cursor.execute(sql, params)
+            if cursor.rowcount <= 0:
+                return None
+            cursor.execute(self.BALANCE_SQL, (user_id,))
+            row = cursor.fetchone()
+            return self._value(row) if row else None
+        
+        cursor.execute(sql + " RETURNING credit_balance", params)
+        rows = cursor.fetchall()
+        return self._value(rows[0]) if rows else None
+    
+    @staticmethod
+    def _value(row):
+        return row[0] if isinstance(row, tuple) else row["credit_balance"]
+    
+    def _stage(self, user_id, balance):
+        """row lock ধরা অবস্থায় - ক্যাশের মান commit এর পরে বসে, rollback হলে মুছে যায়
+        
+        version এখানেই (লেখার ক্রমে) নেওয়া হয়; commit এর পরের callback গুলো যে ক্রমেই
+        চলুক, শুধু সর্বশেষ লেখার মানটাই ক্যাশে টেকে।
+        """
+        with self._lock:
+            version = self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            # commit না হওয়া পর্যন্ত পুরনো ক্যাশের মানও আর সত্য নয়
+            self._balances.pop(user_id, None)
+        
+        self.db.after_commit(lambda: self._remember(user_id, balance, version))
+        self.db.after_rollback(lambda: self._forget(user_id))
+    
+    def _remember(self, user_id, balance, version):
+        with self._lock:
+            if self._versions.get(user_id, 0) != version:
+                return
+            # version বাড়ানো, যাতে এর আগে শুরু হওয়া SELECT পুরনো মান না বসায়
+            self._versions[user_id] = version + 1
+            self._balances[user_id] = (balance, time.monotonic())
+    
+    def _forget(self, user_id):
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            self._balances.pop(user_id, None)
+    
+    def close(self):
+        self.ledger.close()
+    
+    def stats(self):
+        with self._lock:
+            lookups = self.cache_hits + self.cache_misses
+            stats = {
+                "debits": self.debits,
+                "rejected": self.rejected,
+                "cached_balances": len(self._balances),
+                "cache_hit_rate": round(self.cache_hits / lookups, 3) if lookups else 0
+            }
+        stats["ledger"] = self.ledger.stats()
+        return stats
+
 class DatabaseManager:
+    CONVERSATION_LOG_SQL = """
+    INSERT INTO conversations (user_id, bot_id, message_text, response_text, message_type)
+    VALUES (%s, %s, %s, %s, %s)
+    """
+    
+    AUDIT_LOG_SQL = """
+    INSERT INTO audit_log (user_id, action, details, ip_address, user_agent)
+    VALUES (%s, %s, %s, %s, %s)
+    """
+    
     def __init__(self, db_type="sqlite", config=None):
         self.db_type = db_type.lower()
         self.config = config or {}
-        self.connection = None
-        self.cursor = None
+        self.pool = None
+        
+        self.dialect = Dialect(self.db_type)
+        self.statement_cache_size = self.config.get("statement_cache_size", 100)
+        self.statement_stats = StatementStats(estimated=self.db_type == "sqlite")
+        self.tuner = StorageTuner(self, self.config)
+        
+        # এই থ্রেডের চলতি ট্রানজ্যাকশনের কানেকশন (নেস্টেড কলে একই কানেকশন)
+        self._local = threading.local()
         
         self._init_database()
+        
+        self.credit_engine = CreditEngine(
+            self,
+            flush_ms=self.config.get("ledger_flush_ms", 200),
+            batch_rows=self.config.get("ledger_batch_rows", 500),
+            cache_ttl=self.config.get("balance_cache_ttl", 60),
+            max_pending=self.config.get("log_max_pending", 10000),
+            block_ms=self.config.get("log_block_ms", 1000)
+        )
+        
+        # কনভারসেশন/অডিট লগ গ্রুপ কমিট - প্রতি মেসেজে আলাদা commit/fsync নয়
+        self.conversation_writer = BatchWriter(self, self.CONVERSATION_LOG_SQL, name="Conversation log",
+                                               **self._log_writer_settings())
+        self.audit_writer = BatchWriter(self, self.AUDIT_LOG_SQL, name="Audit log",
+                                        **self._log_writer_settings())
         print(f"🗄️ Database Manager Initialized ({db_type})")
     
     def _init_database(self):
@@ -33,41 +970,165 @@ class DatabaseManager:
         
         # টেবিল তৈরি
         self._create_tables()
+        self.tuner.on_start()
     
     def _init_sqlite(self):
-        """SQLite3 কানেকশন"""
-        db_path = self.config.get("path", "data/bot_database.db")
+        """SQLite3 - থ্রেড প্রতি কানেকশন"""
         Path("data").mkdir(exist_ok=True)
+        self.pool = ThreadLocalPool(self._connect_sqlite)
+    
+    def _connect_sqlite(self):
+        db_path = self.config.get("path", "data/bot_database.db")
         
-        self.connection = sqlite3.connect(db_path, check_same_thread=False)
-        self.connection.row_factory = sqlite3.Row
-        self.cursor = self.connection.cursor()
+        # অন্য থ্রেড লিখছে এমন সময় "database is locked" না দিয়ে timeout পর্যন্ত অপেক্ষা
+        connection = sqlite3.connect(db_path, timeout=self.config.get("connection_timeout", 30),
+                                     check_same_thread=False,
+                                     cached_statements=max(self.statement_cache_size, 0))
+        connection.row_factory = sqlite3.Row
+        self.tuner.apply_pragmas(connection)
+        return self._prepared(connection)
     
     def _init_postgresql(self):
-        """PostgreSQL কানেকশন"""
+        """PostgreSQL কানেকশন পুল"""
+        self.pool = ConnectionPool(self._connect_postgresql, **self._pool_settings())
+    
+    def _connect_postgresql(self):
         conn_params = {
             "host": self.config.get("host", "localhost"),
             "port": self.config.get("port", 5432),
             "database": self.config.get("database", "rana_bot"),
             "user": self.config.get("user", "postgres"),
             "password": self.config.get("password", ""),
+            "connect_timeout": self.config.get("connection_timeout", 30),
         }
         
-        self.connection = psycopg2.connect(**conn_params)
-        self.cursor = self.connection.cursor()
+        return self._prepared(psycopg2.connect(**conn_params))
     
     def _init_mysql(self):
-        """MySQL কানেকশন"""
+        """MySQL কানেকশন পুল"""
+        self.pool = ConnectionPool(self._connect_mysql, **self._pool_settings())
+    
+    def _connect_mysql(self):
         conn_params = {
             "host": self.config.get("host", "localhost"),
             "port": self.config.get("port", 3306),
             "database": self.config.get("database", "rana_bot"),
             "user": self.config.get("user", "root"),
             "password": self.config.get("password", ""),
+            "connection_timeout": self.config.get("connection_timeout", 30),
         }
         
-        self.connection = mysql.connector.connect(**conn_params)
-        self.cursor = self.connection.cursor(dictionary=True)
+        return self._prepared(mysql.connector.connect(**conn_params))
+    
+    def _prepared(self, connection):
+        return PreparedConnection(connection, StatementCache(self.dialect, self.statement_cache_size,
+                                                             self.statement_stats))
+    
+    def _pool_settings(self):
+        """SQL_CONFIG.json এর pool_size / max_overflow / max_connections / connection_timeout"""
+        return {
+            "pool_size": self.config.get("pool_size", 10),
+            "max_overflow": self.config.get("max_overflow", 20),
+            "max_connections": self.config.get("max_connections", 100),
+            "timeout": self.config.get("connection_timeout", 30),
+            "health_check_interval": self.config.get("health_check_interval", 30),
+        }
+    
+    def _log_writer_settings(self):
+        """লগ BatchWriter এর সেটিং - কনফিগে না থাকলে ডিফল্ট"""
+        return {
+            "flush_ms": self.config.get("log_flush_ms", 200),
+            "batch_rows": self.config.get("log_batch_rows", 500),
+            "max_pending": self.config.get("log_max_pending", 10000),
+            "overflow": self.config.get("log_overflow", "block"),
+            "block_ms": self.config.get("log_block_ms", 1000),
+        }
+    
+    @contextmanager
+    def transaction(self):
+        """পুল থেকে কানেকশন ধার করে কার্সর; শেষে commit, এরর হলে rollback, তারপর ফেরত
+        
+        একই থ্রেডের নেস্টেড কল (যেমন add_credit → log_audit) বাইরের ট্রানজ্যাকশনেই
+        যোগ দেয়; commit/rollback শুধু সবচেয়ে বাইরেরটা করে।
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            cursor = self._cursor(connection)
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+            return
+        
+        connection = self._local.connection = self.pool.checkout()
+        self._local.after_commit = []
+        self._local.after_rollback = []
+        cursor = self._cursor(connection)
+        broken = False
+        committed = False
+        
+        try:
+            yield cursor
+            connection.commit()
+            committed = True
+        except BaseException:
+            # rollback ও ব্যর্থ হলে কানেকশনটাই ভাঙা - পুলে ফেরত না দিয়ে বন্ধ
+            try:
+                connection.rollback()
+            except Exception:
+                broken = True
+            raise
+        finally:
+            callbacks = self._local.after_commit if committed else self._local.after_rollback
+            self._local.connection = None
+            self._local.after_commit = []
+            self._local.after_rollback = []
+            try:
+                cursor.close()
+            except Exception:
+                broken = True
+            self.pool.release(connection, discard=broken)
+            
+            # কানেকশন ফেরত দেওয়ার পরে, কোনো লক ধরে না রেখে
+            for callback in callbacks:
+                callback()
+    
+    def after_commit(self, callback):
+        """চলতি ট্রানজ্যাকশন commit হলে callback (rollback হলে বাদ); ট্রানজ্যাকশন না থাকলে এখনই"""
+        if getattr(self._local, "connection", None) is None:
+            callback()
+        else:
+            self._local.after_commit.append(callback)
+    
+    def after_rollback(self, callback):
+        """চলতি ট্রানজ্যাকশন rollback হলে callback; ট্রানজ্যাকশন না থাকলে কিছু না"""
+        if getattr(self._local, "connection", None) is not None:
+            self._local.after_rollback.append(callback)
+    
+    def flush_writes(self):
+        """জমে থাকা লগ ও লেজার সারি এখনই লিখুন"""
+        for writer in (self.conversation_writer, self.audit_writer, self.credit_engine.ledger):
+            writer.flush()
+    
+    def _cursor(self, connection):
+        if self.db_type == "mysql":
+            return PreparedCursor(connection.cursor(dictionary=True, buffered=True), connection, self.tuner)
+        return PreparedCursor(connection.cursor(), connection, self.tuner)
+    
+    def pool_stats(self):
+        """কানেকশন পুলের মেট্রিক্স"""
+        return self.pool.stats() if self.pool is not None else {}
+    
+    def statement_cache_stats(self):
+        """প্রিপেয়ার্ড স্টেটমেন্ট ক্যাশের হিট রেট (সব কানেকশন মিলিয়ে)"""
+        stats = self.statement_stats.to_dict()
+        stats["size"] = self.statement_cache_size
+        stats["rewritten_sql"] = len(self.dialect._rewritten)
+        return stats
+    
+    def tuning_report(self):
+        """SQL_CONFIG.json এর টিউনিং কতটা কার্যকর (প্রাগমা, ইনডেক্স, optimize)"""
+        return self.tuner.report()
     
     def _create_tables(self):
         """সব টেবিল তৈরি"""
@@ -203,14 +1264,93 @@ class DatabaseManager:
         ]
         
         for table_sql in tables:
+            table_sql = self.dialect.ddl(table_sql)
+            
+            # প্রতিটি আলাদা ট্রানজ্যাকশনে, একটার এররে (PostgreSQL) বাকিগুলো আটকে না যায়
             try:
-                self.cursor.execute(table_sql)
+                with self.transaction() as cursor:
+                    cursor.execute(table_sql)
             except Exception as e:
                 print(f"⚠️ Table creation error: {e}")
         
-        self.connection.commit()
+        self._create_search_index()
+        
         print("✅ Database tables created")
     
+    def _create_search_index(self):
+        """ai_memory.question এ ফুল-টেক্সট ইনডেক্স (ডায়ালেক্ট অনুযায়ী)
+        
+        SQLite: external-content FTS5 টেবিল + ট্রিগার
+        PostgreSQL: জেনারেটেড tsvector কলাম + GIN ইনডেক্স
+        MySQL: FULLTEXT ইনডেক্স
+        তিনটাই ডাটাবেজ নিজে আপডেট করে, তাই save_ai_pattern বা অন্য যেকোনো লেখায় সিঙ্ক থাকে।
+        """
+        if self.db_type == "sqlite":
+            with self.transaction() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ai_memory_fts'"
+                )
+                exists = cursor.fetchone() is not None
+            
+            # unicode61 বাংলা কার-চিহ্নকে (মাত্রা, হসন্ত ইত্যাদি) বিভাজক ধরে; টোকেনের অংশ করে দেওয়া
+            statements = [
+                f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS ai_memory_fts USING fts5(
+                    question, content='ai_memory', content_rowid='id',
+                    tokenize="unicode61 tokenchars '{BANGLA_MARKS}'"
+                )
+                """,
+                """
+                CREATE TRIGGER IF NOT EXISTS ai_memory_fts_insert AFTER INSERT ON ai_memory BEGIN
+                    INSERT INTO ai_memory_fts (rowid, question) VALUES (new.id, new.question);
+                END
+                """,
+                """
+                CREATE TRIGGER IF NOT EXISTS ai_memory_fts_delete AFTER DELETE ON ai_memory BEGIN
+                    INSERT INTO ai_memory_fts (ai_memory_fts, rowid, question)
+                    VALUES ('delete', old.id, old.question);
+                END
+                """,
+                """
+                CREATE TRIGGER IF NOT EXISTS ai_memory_fts_update AFTER UPDATE OF question ON ai_memory BEGIN
+                    INSERT INTO ai_memory_fts (ai_memory_fts, rowid, question)
+                    VALUES ('delete', old.id, old.question);
+                    INSERT INTO ai_memory_fts (rowid, question) VALUES (new.id, new.question);
+                END
+                """
+            ]
+            
+            # আগে থেকে থাকা প্যাটার্নগুলো প্রথমবার ইনডেক্সে তোলা
+            if not exists:
+                statements.append("INSERT INTO ai_memory_fts (ai_memory_fts) VALUES ('rebuild')")
+        elif self.db_type == "postgresql":
+            statements = [
+                """
+                ALTER TABLE ai_memory ADD COLUMN IF NOT EXISTS search_vector tsvector
+                GENERATED ALWAYS AS (to_tsvector('simple', question)) STORED
+                """,
+                "CREATE INDEX IF NOT EXISTS idx_ai_memory_search ON ai_memory USING GIN (search_vector)"
+            ]
+        else:
+            # MySQL এ ইনডেক্সের IF NOT EXISTS নেই; আগে থেকে থাকলে শুধু এরর প্রিন্ট হয়
+            statements = ["ALTER TABLE ai_memory ADD FULLTEXT INDEX idx_ai_memory_search (question)"]
+        
+        for statement in statements:
+            try:
+                with self.transaction() as cursor:
+                    cursor.execute(statement)
+            except Exception as e:
+                print(f"⚠️ Search index creation error: {e}")
+    
+    def _fetch_dicts(self, cursor):
+        """fetchall → dict এর লিস্ট, তিন ডায়ালেক্টেই একই রকম"""
+        rows = cursor.fetchall()
+        
+        if self.db_type == "postgresql":
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in rows]
+        return [dict(row) for row in rows]
+    
     # 👤 USER OPERATIONS
     def create_user(self, telegram_id, username=None, first_name=None, **kwargs):
         """নতুন ইউজার তৈরি"""
@@ -221,19 +1361,19 @@ class DatabaseManager:
         """
         
         try:
-            self.cursor.execute(sql, (
-                telegram_id, username, first_name,
-                kwargs.get('last_name'), kwargs.get('phone'),
-                kwargs.get('email'), json.dumps(kwargs.get('settings', {}))
-            ))
-            
-            user_id = self.cursor.fetchone()[0]
-            self.connection.commit()
-            
-            # অডিট লগ
-            self.log_audit(user_id, "user_created", {"telegram_id": telegram_id})
-            
-            return user_id
+            with self.transaction() as cursor:
+                cursor.execute(sql, (
+                    telegram_id, username, first_name,
+                    kwargs.get('last_name'), kwargs.get('phone'),
+                    kwargs.get('email'), json.dumps(kwargs.get('settings', {}))
+                ))
+                
+                user_id = self.dialect.inserted_id(cursor)
+                
+                # অডিট লগ
+                self.log_audit(user_id, "user_created", {"telegram_id": telegram_id})
+                
+                return user_id
         except Exception as e:
             print(f"❌ User creation error: {e}")
             return None
@@ -250,12 +1390,13 @@ class DatabaseManager:
             return None
         
         try:
-            self.cursor.execute(sql, (identifier,))
-            result = self.cursor.fetchone()
-            
-            if result and self.db_type == "sqlite":
-                return dict(result)
-            return result
+            with self.transaction() as cursor:
+                cursor.execute(sql, (identifier,))
+                result = cursor.fetchone()
+                
+                if result and self.db_type == "sqlite":
+                    return dict(result)
+                return result
         except:
             return None
     
@@ -268,11 +1409,11 @@ class DatabaseManager:
         sql = f"UPDATE users SET {set_clause} WHERE id = %s"
         
         try:
-            self.cursor.execute(sql, (*updates.values(), user_id))
-            self.connection.commit()
-            
-            self.log_audit(user_id, "user_updated", updates)
-            return True
+            with self.transaction() as cursor:
+                cursor.execute(sql, (*updates.values(), user_id))
+                
+                self.log_audit(user_id, "user_updated", updates)
+                return True
         except Exception as e:
             print(f"❌ User update error: {e}")
             return False
@@ -287,12 +1428,12 @@ class DatabaseManager:
         """
         
         try:
-            self.cursor.execute(sql, (user_id, bot_token, chat_id, bot_username))
-            bot_id = self.cursor.fetchone()[0]
-            self.connection.commit()
-            
-            self.log_audit(user_id, "bot_registered", {"bot_id": bot_id})
-            return bot_id
+            with self.transaction() as cursor:
+                cursor.execute(sql, (user_id, bot_token, chat_id, bot_username))
+                bot_id = self.dialect.inserted_id(cursor)
+                
+                self.log_audit(user_id, "bot_registered", {"bot_id": bot_id})
+                return bot_id
         except Exception as e:
             print(f"❌ Bot registration error: {e}")
             return None
@@ -306,99 +1447,62 @@ class DatabaseManager:
         """
         
         try:
-            self.cursor.execute(sql, (user_id,))
-            results = self.cursor.fetchall()
-            
-            if self.db_type == "sqlite":
-                return [dict(row) for row in results]
-            return results
+            with self.transaction() as cursor:
+                cursor.execute(sql, (user_id,))
+                results = cursor.fetchall()
+                
+                if self.db_type == "sqlite":
+                    return [dict(row) for row in results]
+                return results
         except:
             return []
     
     # 💰 CREDIT OPERATIONS
     def add_credit(self, user_id, amount, description="", transaction_type="purchase", reference_id=""):
         """ক্রেডিট যোগ"""
-        # প্রথমে কারেন্ট ব্যালেন্স নিন
-        current_balance = self.get_user_balance(user_id)
-        new_balance = current_balance + amount
-        
-        sql = """
-        INSERT INTO credits (user_id, amount, transaction_type, reference_id, description, balance_after)
-        VALUES (%s, %s, %s, %s, %s, %s)
-        """
-        
         try:
-            self.cursor.execute(sql, (
-                user_id, amount, transaction_type, 
-                reference_id, description, new_balance
-            ))
-            
-            # user_bots টেবিল আপডেট
-            update_sql = """
-            UPDATE user_bots 
-            SET credit_balance = %s, last_payment_date = CURRENT_TIMESTAMP
-            WHERE user_id = %s AND is_active = TRUE
-            """
-            
-            self.cursor.execute(update_sql, (new_balance, user_id))
-            self.connection.commit()
-            
-            self.log_audit(user_id, "credit_added", {
-                "amount": amount, 
-                "new_balance": new_balance,
-                "type": transaction_type
-            })
-            
-            return new_balance
+            with self.transaction():
+                new_balance = self.credit_engine.credit(
+                    user_id, amount, description, transaction_type, reference_id
+                )
+                
+                self.log_audit(user_id, "credit_added", {
+                    "amount": amount, 
+                    "new_balance": new_balance,
+                    "type": transaction_type
+                })
+                
+                return new_balance
         except Exception as e:
             print(f"❌ Credit add error: {e}")
-            return current_balance
+            return self.get_user_balance(user_id)
     
     def use_credit(self, user_id, amount=1, description="Message sent"):
-        """ক্রেডিট ব্যবহার"""
-        current_balance = self.get_user_balance(user_id)
-        
-        if current_balance < amount:
-            return False
-        
-        new_balance = current_balance - amount
-        
-        sql = """
-        INSERT INTO credits (user_id, amount, transaction_type, description, balance_after)
-        VALUES (%s, %s, %s, %s, %s)
-        """
-        
+        """ক্রেডিট ব্যবহার - এক স্টেটমেন্টে শর্তযুক্ত ডেবিট, লেজার write-behind"""
         try:
-            self.cursor.execute(sql, (
-                user_id, -amount, "usage", description, new_balance
-            ))
-            
-            # ব্যালেন্স আপডেট
-            update_sql = "UPDATE user_bots SET credit_balance = %s WHERE user_id = %s"
-            self.cursor.execute(update_sql, (new_balance, user_id))
-            self.connection.commit()
-            
-            return True
+            return self.credit_engine.debit(user_id, amount, description) is not None
         except Exception as e:
             print(f"❌ Credit usage error: {e}")
             return False
     
     def get_user_balance(self, user_id):
         """ইউজার ব্যালেন্স"""
-        sql = "SELECT credit_balance FROM user_bots WHERE user_id = %s AND is_active = TRUE"
-        
         try:
-            self.cursor.execute(sql, (user_id,))
-            result = self.cursor.fetchone()
-            
-            if result:
-                if self.db_type == "sqlite":
-                    return result["credit_balance"]
-                return result[0]
-            return 0
+            return self.credit_engine.balance(user_id)
         except:
             return 0
     
+    def credit_stats(self):
+        """ক্রেডিট ইঞ্জিন - ডেবিট, ক্যাশে হিট রেট, লেজার ব্যাচ"""
+        return self.credit_engine.stats()
+    
+    def log_writer_stats(self):
+        """কনভারসেশন/অডিট লগের গ্রুপ কমিট - ব্যাচ, জমে থাকা, drop"""
+        return {
+            "conversations": self.conversation_writer.stats(),
+            "audit": self.audit_writer.stats()
+        }
+    
     # 💳 PAYMENT OPERATIONS
     def create_payment(self, user_id, amount, method="nagad", sender_number="", transaction_id=""):
         """পেমেন্ট রেকর্ড তৈরি"""
@@ -409,20 +1513,20 @@ class DatabaseManager:
         """
         
         try:
-            self.cursor.execute(sql, (
-                user_id, amount, method, sender_number, transaction_id
-            ))
-            
-            payment_id = self.cursor.fetchone()[0]
-            self.connection.commit()
-            
-            self.log_audit(user_id, "payment_created", {
-                "payment_id": payment_id,
-                "amount": amount,
-                "method": method
-            })
-            
-            return payment_id
+            with self.transaction() as cursor:
+                cursor.execute(sql, (
+                    user_id, amount, method, sender_number, transaction_id
+                ))
+                
+                payment_id = self.dialect.inserted_id(cursor)
+                
+                self.log_audit(user_id, "payment_created", {
+                    "payment_id": payment_id,
+                    "amount": amount,
+                    "method": method
+                })
+                
+                return payment_id
         except Exception as e:
             print(f"❌ Payment creation error: {e}")
             return None
@@ -436,29 +1540,29 @@ class DatabaseManager:
         """
         
         try:
-            self.cursor.execute(sql, (status, verified_by, payment_id))
-            
-            if status == "verified":
-                # ক্রেডিট যোগ
-                payment = self.get_payment(payment_id)
-                if payment:
-                    user_id = payment["user_id"]
-                    amount = int(payment["amount"] * 100)  # টাকায় রূপান্তর
-                    
-                    self.add_credit(
-                        user_id, amount, 
-                        "Payment verified", "purchase", 
-                        f"PAYMENT_{payment_id}"
-                    )
-            
-            self.connection.commit()
-            
-            self.log_audit(verified_by, "payment_verified", {
-                "payment_id": payment_id,
-                "status": status
-            })
-            
-            return True
+            with self.transaction() as cursor:
+                cursor.execute(sql, (status, verified_by, payment_id))
+                
+                if status == "verified":
+                    # ক্রেডিট যোগ
+                    payment = self.get_payment(payment_id)
+                    if payment:
+                        user_id = payment["user_id"]
+                        amount = int(payment["amount"] * 100)  # টাকায় রূপান্তর
+                        
+                        self.add_credit(
+                            user_id, amount, 
+                            "Payment verified", "purchase", 
+                            f"PAYMENT_{payment_id}"
+                        )
+                
+                
+                self.log_audit(verified_by, "payment_verified", {
+                    "payment_id": payment_id,
+                    "status": status
+                })
+                
+                return True
         except Exception as e:
             print(f"❌ Payment verification error: {e}")
             return False
@@ -468,12 +1572,13 @@ class DatabaseManager:
         sql = "SELECT * FROM payments WHERE id = %s"
         
         try:
-            self.cursor.execute(sql, (payment_id,))
-            result = self.cursor.fetchone()
-            
-            if result and self.db_type == "sqlite":
-                return dict(result)
-            return result
+            with self.transaction() as cursor:
+                cursor.execute(sql, (payment_id,))
+                result = cursor.fetchone()
+                
+                if result and self.db_type == "sqlite":
+                    return dict(result)
+                return result
         except:
             return None
     
@@ -492,10 +1597,10 @@ class DatabaseManager:
         """
         
         try:
-            self.cursor.execute(sql, (pattern_hash, question, response, user_id))
-            pattern_id = self.cursor.fetchone()[0]
-            self.connection.commit()
-            return pattern_id
+            with self.transaction() as cursor:
+                cursor.execute(sql, (pattern_hash, question, response, user_id))
+                pattern_id = self.dialect.inserted_id(cursor)
+                return pattern_id
         except Exception as e:
             print(f"❌ AI pattern save error: {e}")
             return None
@@ -513,14 +1618,15 @@ class DatabaseManager:
         """
         
         try:
-            self.cursor.execute(sql, (pattern_hash,))
-            result = self.cursor.fetchone()
-            
-            if result:
-                if self.db_type == "sqlite":
-                    result = dict(result)
-                return result
-            return None
+            with self.transaction() as cursor:
+                cursor.execute(sql, (pattern_hash,))
+                result = cursor.fetchone()
+                
+                if result:
+                    if self.db_type == "sqlite":
+                        result = dict(result)
+                    return result
+                return None
         except:
             return None
     
@@ -529,25 +1635,70 @@ class DatabaseManager:
         sql = "UPDATE ai_memory SET used_count = used_count + 1 WHERE id = %s"
         
         try:
-            self.cursor.execute(sql, (pattern_id,))
-            self.connection.commit()
-            return True
+            with self.transaction() as cursor:
+                cursor.execute(sql, (pattern_id,))
+                return True
         except:
             return False
     
-    # 💬 CONVERSATION LOGGING
-    def log_conversation(self, user_id, bot_id, message_text, response_text=None, message_type="text"):
-        """কনভারসেশন লগ"""
-        sql = """
-        INSERT INTO conversations (user_id, bot_id, message_text, response_text, message_type)
-        VALUES (%s, %s, %s, %s, %s)
+    def search_ai_patterns(self, question, limit=5):
+        """ফুল-টেক্সট ইনডেক্স থেকে প্রশ্নের সাথে মেলে এমন প্যাটার্ন, সেরাটা আগে
+        
+        AI ব্রেইনের মতোই ২ অক্ষরের বেশি (len > 2) শব্দগুলো নেওয়া হয়, যেকোনো একটা মিললেই চলবে।
+        প্রতিটি রো ai_memory এর কলাম + "score" (বড় = ভালো; ডায়ালেক্ট ভেদে স্কেল আলাদা)।
         """
+        words = list(dict.fromkeys(word for word in question.lower().split() if len(word) > 2))
+        if not words:
+            return []
         
+        if self.db_type == "sqlite":
+            # প্রতিটি শব্দ কোট করা ফ্রেজ, যাতে FTS5 এর অপারেটর/বিশেষ চিহ্ন হিসেবে না পড়ে
+            query = " OR ".join('"' + word.replace('"', '""') + '"' for word in words)
+            sql = """
+            SELECT m.*, -bm25(ai_memory_fts) AS score
+            FROM ai_memory_fts JOIN ai_memory m ON m.id = ai_memory_fts.rowid
+            WHERE ai_memory_fts MATCH %s
+            ORDER BY score DESC, m.used_count DESC
+            LIMIT %s
+            """
+            params = (query, limit)
+        elif self.db_type == "postgresql":
+            # plainto_tsquery প্রতিটি শব্দ আলাদাভাবে, || দিয়ে OR
+            tsquery = " || ".join(["plainto_tsquery('simple', %s)"] * len(words))
+            sql = f"""
+            SELECT m.*, ts_rank(m.search_vector, t.q) AS score
+            FROM ai_memory m, (SELECT {tsquery} AS q) AS t
+            WHERE m.search_vector @@ t.q
+            ORDER BY score DESC, m.used_count DESC
+            LIMIT %s
+            """
+            params = (*words, limit)
+        else:
+            query = " ".join(words)
+            sql = """
+            SELECT *, MATCH (question) AGAINST (%s IN NATURAL LANGUAGE MODE) AS score
+            FROM ai_memory
+            WHERE MATCH (question) AGAINST (%s IN NATURAL LANGUAGE MODE)
+            ORDER BY score DESC, used_count DESC
+            LIMIT %s
+            """
+            params = (query, query, limit)
+        
+        try:
+            with self.transaction() as cursor:
+                cursor.execute(sql, params)
+                return self._fetch_dicts(cursor)
+        except Exception as e:
+            print(f"❌ AI pattern search error: {e}")
+            return []
+    
+    # 💬 CONVERSATION LOGGING
+    def log_conversation(self, user_id, bot_id, message_text, response_text=None, message_type="text"):
+        """কনভারসেশন লগ - BatchWriter এ জমে, গ্রুপ কমিটে লেখা হয়"""
         try:
-            self.cursor.execute(sql, (
+            self.conversation_writer.add((
                 user_id, bot_id, message_text, response_text, message_type
             ))
-            self.connection.commit()
             return True
         except Exception as e:
             print(f"❌ Conversation log error: {e}")
@@ -562,13 +1713,17 @@ class DatabaseManager:
         LIMIT %s
         """
         
+        # জমে থাকা লগ আগে লিখে নিন, যাতে সদ্য লগ করা মেসেজও আসে
+        self.conversation_writer.flush()
+        
         try:
-            self.cursor.execute(sql, (user_id, limit))
-            results = self.cursor.fetchall()
-            
-            if self.db_type == "sqlite":
-                return [dict(row) for row in results]
-            return results
+            with self.transaction() as cursor:
+                cursor.execute(sql, (user_id, limit))
+                results = cursor.fetchall()
+                
+                if self.db_type == "sqlite":
+                    return [dict(row) for row in results]
+                return results
         except:
             return []
     
@@ -582,14 +1737,14 @@ class DatabaseManager:
         """
         
         try:
-            self.cursor.execute(sql, (
-                user_id, bot_id, message_text, scheduled_time, repeat_type
-            ))
-            
-            message_id = self.cursor.fetchone()[0]
-            self.connection.commit()
-            
-            return message_id
+            with self.transaction() as cursor:
+                cursor.execute(sql, (
+                    user_id, bot_id, message_text, scheduled_time, repeat_type
+                ))
+                
+                message_id = self.dialect.inserted_id(cursor)
+                
+                return message_id
         except Exception as e:
             print(f"❌ Schedule message error: {e}")
             return None
@@ -604,12 +1759,13 @@ class DatabaseManager:
         """
         
         try:
-            self.cursor.execute(sql)
-            results = self.cursor.fetchall()
-            
-            if self.db_type == "sqlite":
-                return [dict(row) for row in results]
-            return results
+            with self.transaction() as cursor:
+                cursor.execute(sql)
+                results = cursor.fetchall()
+                
+                if self.db_type == "sqlite":
+                    return [dict(row) for row in results]
+                return results
         except:
             return []
     
@@ -622,26 +1778,20 @@ class DatabaseManager:
         """
         
         try:
-            self.cursor.execute(sql, (message_id,))
-            self.connection.commit()
-            return True
+            with self.transaction() as cursor:
+                cursor.execute(sql, (message_id,))
+                return True
         except:
             return False
     
     # 🔐 AUDIT LOGGING
     def log_audit(self, user_id, action, details=None, ip_address=None, user_agent=None):
-        """অডিট লগ"""
-        sql = """
-        INSERT INTO audit_log (user_id, action, details, ip_address, user_agent)
-        VALUES (%s, %s, %s, %s, %s)
-        """
-        
+        """অডিট লগ - BatchWriter এ জমে, গ্রুপ কমিটে লেখা হয়"""
         try:
-            self.cursor.execute(sql, (
+            self.audit_writer.add((
                 user_id, action, json.dumps(details or {}), 
                 ip_address, user_agent
             ))
-            self.connection.commit()
             return True
         except Exception as e:
             print(f"❌ Audit log error: {e}")
@@ -656,13 +1806,16 @@ class DatabaseManager:
             sql = "SELECT * FROM audit_log ORDER BY created_at DESC LIMIT %s"
             params = (limit,)
         
+        self.audit_writer.flush()
+        
         try:
-            self.cursor.execute(sql, params)
-            results = self.cursor.fetchall()
-            
-            if self.db_type == "sqlite":
-                return [dict(row) for row in results]
-            return results
+            with self.transaction() as cursor:
+                cursor.execute(sql, params)
+                results = cursor.fetchall()
+                
+                if self.db_type == "sqlite":
+                    return [dict(row) for row in results]
+                return results
         except:
             return []
     
@@ -690,9 +1843,10 @@ class DatabaseManager:
         
         for key, query in queries.items():
             try:
-                self.cursor.execute(query)
-                result = self.cursor.fetchone()
-                stats[key] = result[0] or 0
+                with self.transaction() as cursor:
+                    cursor.execute(query)
+                    result = cursor.fetchone()
+                    stats[key] = result[0] or 0
             except:
                 stats[key] = 0
         
@@ -700,11 +1854,16 @@ class DatabaseManager:
     
     def close(self):
         """ডাটাবেজ কানেকশন বন্ধ"""
-        if self.cursor:
-            self.cursor.close()
-        if self.connection:
-            self.connection.close()
-        print("🗄️ Database connection closed")
+        if getattr(self, "pool", None) is not None and getattr(self, "audit_writer", None) is not None:
+            # জমে থাকা লগ ও লেজার সারি কানেকশন বন্ধের আগে লিখে দিন
+            self.conversation_writer.close()
+            self.audit_writer.close()
+            self.credit_engine.close()
+        
+        if getattr(self, "pool", None) is not None:
+            self.pool.close_all()
+            self.pool = None
+            print("🗄️ Database connection closed")
     
     def __del__(self):
         """ডেস্ট্রাক্টর"""
@@ -714,7 +1873,28 @@ class DatabaseFactory:
     """ডাটাবেজ ফ্যাক্টরি - একাধিক ডাটাবেজ ম্যানেজ"""
     
     @staticmethod
-    def create_database(config_path="configs/database.json"):
+    def load_tuning(db_type, path="SQL_CONFIG.json"):
+        """SQL_CONFIG.json থেকে এই ডাটাবেজের সেটিং (performance + database.<type> + maintenance + tables), ফ্ল্যাট dict"""
+        if not Path(path).exists():
+            return {}
+        
+        with open(path, 'r', encoding='utf-8') as f:
+            sql_config = json.load(f)
+        
+        tuning = dict(sql_config.get("performance", {}))
+        tuning.update(sql_config.get("database", {}).get(db_type, {}))
+        tuning.update(sql_config.get("maintenance", {}))
+        
+        # tables.indexes → indexes; কোনো টেবিলে optimize_on_start থাকলে শুরুতে একবার ANALYZE
+        tables = sql_config.get("tables", {})
+        tuning["indexes"] = tables.get("indexes", [])
+        tuning["optimize_on_start"] = any(
+            isinstance(options, dict) and options.get("optimize_on_start") for options in tables.values()
+        )
+        return tuning
+    
+    @staticmethod
+    def create_database(config_path="configs/database.json", tuning_path="SQL_CONFIG.json"):
         """ডাটাবেজ তৈরি"""
         import json
         
@@ -733,4 +1913,7 @@ class DatabaseFactory:
             with open(config_path, 'w') as f:
                 json.dump(config, f, indent=2)
         
+        # SQL_CONFIG.json এর পুল/পারফরম্যান্স সেটিং ডিফল্ট, configs/database.json এর মান আগে
+        config = {**DatabaseFactory.load_tuning(config["type"], tuning_path), **config}
+        
         return DatabaseManager(config["type"], config)
\ No newline at end of file
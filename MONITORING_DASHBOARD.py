@@ -51,7 +51,7 @@ class SystemMonitor:
             },
             "ai": {
                 "patterns": len(getattr(self.core.ai_orchestrator.brain, 'patterns', {})) 
-                          if hasattr(self.core, 'ai_orchestrator') else 0,
+                          if getattr(self.core, 'ai_orchestrator', None) else 0,
                 "learning_rate": self._get_ai_learning_rate(),
                 "accuracy": self._get_ai_accuracy()
             },
@@ -121,16 +121,11 @@ class SystemMonitor:
     def _get_ai_learning_rate(self):
         """AI লার্নিং রেট"""
         try:
-            if hasattr(self.core, 'ai_orchestrator'):
+            if getattr(self.core, 'ai_orchestrator', None):
                 brain = self.core.ai_orchestrator.brain
                 if hasattr(brain, 'learning_log'):
-                    # শেষ 24 ঘণ্টার লার্নিং কাউন্ট
-                    day_ago = time.time() - 86400
-                    recent_learnings = [
-                        log for log in brain.learning_log
-                        if datetime.fromisoformat(log.get('time', '2000-01-01')).timestamp() > day_ago
-                    ]
-                    return len(recent_learnings)
+                    # শেষ 24 ঘণ্টার লার্নিং কাউন্ট - মিনিট কাউন্টার থেকে, লগ স্ক্যান ছাড়া
+                    return sum(brain.learning_log.totals().values())
             return 0
         except:
             return 0
@@ -138,7 +133,7 @@ class SystemMonitor:
     def _get_ai_accuracy(self):
         """AI এক্যুরেসি"""
         try:
-            if hasattr(self.core, 'ai_orchestrator'):
+            if getattr(self.core, 'ai_orchestrator', None):
                 patterns = self.core.ai_orchestrator.brain.patterns
                 if patterns:
                     avg_confidence = sum(p.get('confidence', 0) for p in patterns.values()) / len(patterns)
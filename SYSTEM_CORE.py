@@ -25,6 +25,14 @@ except ImportError:
     DB_AVAILABLE = False
     print("⚠️ DATABASE_MANAGER not found, using JSON mode")
 
+# Auto-detect AI brain
+try:
+    from AI_BRAIN import AIOrchestrator, AIMemoryService
+    AI_AVAILABLE = True
+except ImportError:
+    AI_AVAILABLE = False
+    print("⚠️ AI_BRAIN not available, AI features disabled")
+
 # Auto-detect Telegram
 try:
     from telegram import Update
@@ -205,6 +213,9 @@ class RanaBotSystem:
         # Initialize database
         self.db = self._init_database()
         
+        # Initialize AI brain
+        self.ai_orchestrator = self._init_ai()
+        
         # Initialize components
         self.plugins = {}
         self.users = {}
@@ -214,6 +225,9 @@ class RanaBotSystem:
         # Load data
         self._load_data()
         
+        # Shared AI memory service for plugins (core.ai_memory)
+        self.ai_memory = self._init_ai_memory()
+        
         # System state
         self.running = True
         self.started_at = time.time()
@@ -249,6 +263,43 @@ class RanaBotSystem:
         print("ℹ️ Using JSON storage (database not available)")
         return None
     
+    def _init_ai(self):
+        """Initialize AI orchestrator (configs/ai.json → AIOrchestrator config, ai_memory table via self.db)"""
+        if not AI_AVAILABLE:
+            return None
+        
+        ai_config = dict(self.config.configs.get("ai", {}))
+        brain_config = dict(ai_config.get("brain", {}))
+        brain_config.setdefault("memory_path", str(Path(self.config.DATA_DIR) / "ai_brain.json"))
+        ai_config["brain"] = brain_config
+        
+        try:
+            return AIOrchestrator(ai_config, db=self.db)
+        except Exception as e:
+            print(f"⚠️ AI init failed: {e}")
+            return None
+    
+    def _init_ai_memory(self):
+        """AI memory service on top of the orchestrator's brain, legacy ai_memory.json imported once"""
+        if not self.ai_orchestrator:
+            return None
+        
+        service = AIMemoryService(self.ai_orchestrator)
+        
+        # Read the legacy file directly - in DB mode _load_from_json never runs
+        legacy = {}
+        legacy_path = Path(self.config.DATA_DIR) / "ai_memory.json"
+        if legacy_path.exists():
+            try:
+                with open(legacy_path, 'r', encoding='utf-8') as f:
+                    legacy = json.load(f)
+            except Exception as e:
+                print(f"⚠️ Legacy AI memory read error: {e}")
+        
+        service.import_patterns(legacy.get("patterns", {}))
+        
+        return service
+    
     def _load_data(self):
         """Load data from storage"""
         if self.db and DB_AVAILABLE:
@@ -427,6 +478,7 @@ class RanaBotSystem:
             # Execute in isolated namespace
             namespace = {
                 "system": self,
+                "core": self,
                 "config": self.config,
                 "__file__": str(file_path)
             }
@@ -588,6 +640,13 @@ class RanaBotSystem:
         # Save data
         self._save_data()
         
+        # Flush AI brain (write-behind)
+        if self.ai_orchestrator:
+            try:
+                self.ai_orchestrator.flush()
+            except Exception as e:
+                print(f"⚠️ AI flush error: {e}")
+        
         # Close database
         if self.db:
             try:
@@ -31,7 +31,8 @@ class TelegramBotManager:
             "max_bots_per_user": 3,
             "message_timeout": 30,
             "retry_attempts": 3,
-            "webhook_url": None  # For production
+            "webhook_url": None,  # For production
+            "ai_auto_reply": False  # AI উত্তর সরাসরি পাঠাবে কিনা
         }
     
     async def initialize_user_bot(self, user_id, bot_token, chat_id):
@@ -256,7 +257,7 @@ class TelegramBotManager:
         
         # AI প্রসেসিং
         ai_response = None
-        if hasattr(self.core, 'ai_orchestrator'):
+        if self.config["ai_auto_reply"] and getattr(self.core, 'ai_orchestrator', None):
             ai_result = self.core.ai_orchestrator.process_query(user_key, message_text)
             if ai_result.get("response"):
                 ai_response = ai_result["response"]
@@ -3,28 +3,25 @@
 Machine learning system
 """
 
-import json
-import hashlib
-from datetime import datetime
-
 def on_plugin_load(core):
     print("🎓 AI Trainer Plugin Loaded")
     
-    # AI মেমোরি ফাইল
-    memory_file = core.data_path / "ai_memory.json"
-    if not memory_file.exists():
-        with open(memory_file, 'w', encoding='utf-8') as f:
-            json.dump({"patterns": {}, "learning": []}, f, ensure_ascii=False)
+    # মেমোরি core.ai_memory তে (AI_BRAIN এর ব্রেইন), আলাদা ফাইল লাগে না
+    if getattr(core, "ai_memory", None) is None:
+        print("⚠️ AI memory service not available, AI training disabled")
     
     return {"ai": "training_system"}
 
 def handle_event(event_name, data=None):
+    if getattr(core, "ai_memory", None) is None:
+        return None
+    
     if event_name == "user_message":
         user_id = data.get('user_id')
         message = data.get('message')
         
         # প্রথমে AI মেমোরি চেক
-        response = check_ai_memory(message)
+        response = check_ai_memory(message, user_id)
         
         if response:
             return {
@@ -48,7 +45,7 @@ def handle_event(event_name, data=None):
         result = train_ai_model(question, answer, user_id)
         
         return {
-            "trained": True,
+            "trained": result,
             "question": question,
             "answer": answer,
             "user": user_id
@@ -56,62 +53,20 @@ def handle_event(event_name, data=None):
     
     return None
 
-def check_ai_memory(message):
-    """AI মেমোরি চেক"""
+def check_ai_memory(message, user_id=None):
+    """AI মেমোরি চেক - core এর শেয়ার করা ব্রেইন থেকে, কোনো ফাইল I/O নেই"""
     try:
-        memory_file = core.data_path / "ai_memory.json"
-        with open(memory_file, 'r', encoding='utf-8') as f:
-            memory = json.load(f)
-        
-        message_hash = hashlib.md5(message.encode()).hexdigest()
-        
-        if message_hash in memory["patterns"]:
-            pattern = memory["patterns"][message_hash]
-            return pattern["responses"][0] if pattern["responses"] else None
-        
-    except:
-        pass
+        return core.ai_memory.lookup(message, user_id)
+    except Exception as e:
+        print(f"⚠️ AI memory lookup error: {e}")
     
     return None
 
 def train_ai_model(question, answer, user_id):
-    """AI মডেল ট্রেন"""
+    """AI মডেল ট্রেন - সেভ ব্রেইনের write-behind রাইটার করে"""
     try:
-        memory_file = core.data_path / "ai_memory.json"
-        
-        with open(memory_file, 'r', encoding='utf-8') as f:
-            memory = json.load(f)
-        
-        question_hash = hashlib.md5(question.encode()).hexdigest()
-        
-        if question_hash not in memory["patterns"]:
-            memory["patterns"][question_hash] = {
-                "question": question,
-                "responses": [answer],
-                "learned_from": user_id,
-                "learned_at": datetime.now().isoformat(),
-                "used_count": 0
-            }
-        else:
-            if answer not in memory["patterns"][question_hash]["responses"]:
-                memory["patterns"][question_hash]["responses"].append(answer)
-        
-        memory["learning"].append({
-            "question": question,
-            "answer": answer,
-            "user": user_id,
-            "time": datetime.now().isoformat()
-        })
-        
-        # শুধু সর্বশেষ 1000 টি লার্নিং রাখুন
-        if len(memory["learning"]) > 1000:
-            memory["learning"] = memory["learning"][-1000:]
-        
-        with open(memory_file, 'w', encoding='utf-8') as f:
-            json.dump(memory, f, ensure_ascii=False, indent=2)
-        
-        return True
+        return core.ai_memory.train(question, answer, user_id)
         
     except Exception as e:
         print(f"❌ AI Training error: {e}")
-        return False
\ No newline at end of file
+        return False
@@ -0,0 +1,25 @@
+"""টেস্ট সেটআপ - রিপোর টপ-লেভেল মডিউল (AI_BRAIN, DATABASE_MANAGER ...) ইমপোর্টযোগ্য করা"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def new_brain():
+    """NeuralAI বানায়; টেস্ট শেষে সবগুলোর ব্যাকগ্রাউন্ড থ্রেড ও ফাইল বন্ধ"""
+    from AI_BRAIN import NeuralAI
+    
+    brains = []
+    
+    def factory(path, **options):
+        brain = NeuralAI(memory_path=path, **options)
+        brains.append(brain)
+        return brain
+    
+    yield factory
+    
+    for brain in brains:
+        brain.close(save=False)
@@ -0,0 +1,72 @@
+"""AIMemoryService - পুরনো ai_memory.json ইমপোর্ট, memory_backend অনুযায়ী"""
+import hashlib
+
+import pytest
+
+from AI_BRAIN import AIMemoryService, AIOrchestrator
+from DATABASE_MANAGER import DatabaseManager
+
+QUESTION = "tomar naam ki bolo"
+LEGACY = {
+    hashlib.md5(QUESTION.encode()).hexdigest(): {
+        "question": QUESTION,
+        "responses": ["ami rana bot"],
+        "learned_from": None,
+        "used_count": 0
+    }
+}
+
+
+@pytest.fixture
+def make_service(tmp_path):
+    created = []
+    
+    def factory(memory_backend):
+        db = None
+        if memory_backend != "brain":
+            db = DatabaseManager("sqlite", {"path": str(tmp_path / f"{memory_backend}.db")})
+        orchestrator = AIOrchestrator({
+            "brain": {"memory_path": str(tmp_path / f"{memory_backend}.json"), "write_behind": False},
+            "memory_backend": memory_backend
+        }, db=db)
+        created.append((orchestrator, db))
+        return AIMemoryService(orchestrator)
+    
+    yield factory
+    
+    for orchestrator, db in created:
+        orchestrator.brain.close(save=False)
+        if db is not None:
+            db.close()
+
+
+@pytest.mark.parametrize("memory_backend", ["brain", "hybrid", "database"])
+def test_import_reaches_configured_backend_once(make_service, memory_backend):
+    service = make_service(memory_backend)
+    
+    assert service.import_patterns(LEGACY) == 1
+    assert service.import_patterns(LEGACY) == 0
+    assert service.lookup(QUESTION, "u1") == "ami rana bot"
+    
+    orchestrator = service.orchestrator
+    if memory_backend != "brain":
+        assert orchestrator.db.find_ai_pattern(QUESTION)["response"] == "ami rana bot"
+    if memory_backend == "database":
+        assert len(orchestrator.brain.patterns) == 0
+
+
+def test_lookup_changes_no_brain_state(make_service):
+    service = make_service("brain")
+    service.train("kemon acho bondhu", "valo achi", "u1")
+    brain = service.orchestrator.brain
+    
+    before = (brain.learning_log.entries(), brain.context_memory.to_dict(),
+              dict(brain.patterns[next(iter(brain.patterns))]), service.orchestrator.response_cache.stats())
+    
+    assert service.lookup("kemon acho bondhu", "u1") == "valo achi"
+    assert service.lookup("kemon acho bondhu ki", "u1") == "valo achi"
+    assert service.lookup("sompurno ojana kotha", "u1") is None
+    
+    after = (brain.learning_log.entries(), brain.context_memory.to_dict(),
+             dict(brain.patterns[next(iter(brain.patterns))]), service.orchestrator.response_cache.stats())
+    assert after == before
@@ -0,0 +1,77 @@
+"""ইনডেক্সড রিট্রিভাল বনাম লিনিয়ার স্ক্যান - একই ফলাফল"""
+import random
+
+import pytest
+
+
+WORDS = ["ami", "tumi", "kemon", "acho", "valo", "hello", "world", "kotha", "bolo", "naam",
+         "amar", "tomar", "weather", "aaj", "kal", "bazar", "khabar", "gaan"]
+
+
+def sentence(rng):
+    return " ".join(rng.choices(WORDS, k=rng.randint(1, 5)))
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    rng = random.Random(7)
+    lessons = [(sentence(rng), f"reply {i % 13}", f"u{i % 4}") for i in range(300)]
+    queries = [sentence(rng) for _ in range(200)] + ["unknown words only", ""]
+    return lessons, queries
+
+
+def trained(new_brain, tmp_path, name, lessons, **options):
+    brain = new_brain(tmp_path / f"{name}.json", write_behind=False, **options)
+    for question, response, user_id in lessons:
+        brain._apply_learn(question, response, user_id, "2024-01-01T00:00:00")
+    return brain
+
+
+def test_token_index_matches_linear_scan(new_brain, tmp_path, corpus):
+    lessons, queries = corpus
+    indexed = trained(new_brain, tmp_path, "indexed", lessons)
+    linear = trained(new_brain, tmp_path, "linear", lessons, use_index=False)
+    
+    for query in queries:
+        expected = linear.find_top_k(query, k=5, min_score=0)
+        got = indexed.find_top_k(query, k=5, min_score=0)
+        assert [r["pattern_hash"] for r in got] == [r["pattern_hash"] for r in expected]
+        assert [r["score"] for r in got] == pytest.approx([r["score"] for r in expected])
+
+
+def test_matrix_backend_matches_linear_best_match(new_brain, tmp_path, corpus):
+    lessons, queries = corpus
+    matrix = trained(new_brain, tmp_path, "matrix", lessons, backend="matrix")
+    linear = trained(new_brain, tmp_path, "linear", lessons, use_index=False)
+    
+    for query in queries:
+        got_hash, got_score = matrix._best_match(matrix._text_to_vector(query))
+        expected_hash, expected_score = linear._best_match(linear._text_to_vector(query))
+        assert got_hash == expected_hash
+        assert got_score == pytest.approx(expected_score, rel=1e-5)
+
+
+def test_stats_report_active_backend(new_brain, tmp_path, corpus):
+    lessons, _ = corpus
+    matrix = trained(new_brain, tmp_path, "matrix", lessons[:20], backend="matrix")
+    indexed = trained(new_brain, tmp_path, "indexed", lessons[:20])
+    
+    assert matrix.get_brain_stats()["index"] is None
+    assert matrix.get_brain_stats()["matrix"] is not None
+    assert indexed.get_brain_stats()["index"] is not None
+    assert indexed.get_brain_stats()["matrix"] is None
+
+
+def test_fuzzy_runs_only_when_words_miss(new_brain, tmp_path, corpus, monkeypatch):
+    lessons, _ = corpus
+    brain = trained(new_brain, tmp_path, "fuzzy", lessons, fuzzy=True)
+    calls = []
+    closest = brain.fuzzy.closest
+    monkeypatch.setattr(brain.fuzzy, "closest", lambda word: calls.append(word) or closest(word))
+    
+    assert brain._match("ami kemon acho zzyzx")[0] is not None
+    assert calls == []
+    
+    assert brain._match("kemmon achho")[0] is not None
+    assert calls
+    assert brain.match_batch(["kemmon achho"]) == [brain._match("kemmon achho")]
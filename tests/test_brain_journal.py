@@ -0,0 +1,111 @@
+"""ব্রেইন জার্নাল - ক্র্যাশের পর রিপ্লে, স্ন্যাপশটে ট্রাঙ্কেশন, ছেঁড়া রেকর্ড"""
+import json
+
+QUESTIONS = ["kemon acho bondhu", "tomar naam ki", "aaj weather kemon", "hello world again", "bangla kotha bolo"]
+
+
+def journaled(new_brain, path):
+    return new_brain(path, journal=True, snapshot_every=10**6, snapshot_interval=3600)
+
+
+def crash(brain):
+    """স্ন্যাপশট না নিয়ে বন্ধ - জার্নালে যা আছে শুধু তা-ই টিকে থাকে"""
+    brain.learning_log.flush()
+    brain.close(save=False)
+
+
+def log_lines(path):
+    log_path = path.with_suffix(".learning.jsonl")
+    return log_path.read_text(encoding="utf-8").splitlines() if log_path.exists() else []
+
+
+def test_replay_restores_unsnapshotted_mutations(new_brain, tmp_path):
+    path = tmp_path / "brain.json"
+    brain = journaled(new_brain, path)
+    for i, question in enumerate(QUESTIONS):
+        brain.learn_pattern(question, f"answer {i}", "u1")
+    crash(brain)
+    
+    restored = journaled(new_brain, path)
+    assert len(restored.patterns) == len(QUESTIONS)
+    assert restored.journal_seq == len(QUESTIONS)
+    assert restored.find_response("tomar naam ki")["response"] == "answer 1"
+
+
+def test_replay_does_not_duplicate_learning_log(new_brain, tmp_path):
+    path = tmp_path / "brain.json"
+    brain = journaled(new_brain, path)
+    for i, question in enumerate(QUESTIONS):
+        brain.learn_pattern(question, f"answer {i}", "u1")
+    crash(brain)
+    before = log_lines(path)
+    
+    for _ in range(2):
+        crash(journaled(new_brain, path))
+    
+    assert log_lines(path) == before
+    assert len(before) == len(QUESTIONS)
+
+
+def test_snapshot_truncates_journal(new_brain, tmp_path):
+    path = tmp_path / "brain.json"
+    brain = journaled(new_brain, path)
+    for i, question in enumerate(QUESTIONS):
+        brain.learn_pattern(question, f"answer {i}", "u1")
+    brain.flush()
+    
+    journal_path = path.with_suffix(".journal")
+    assert journal_path.stat().st_size == 0
+    assert brain.journal.pending == 0
+    brain.close()
+    
+    # স্ন্যাপশটের journal_seq থেকে চালু, রিপ্লে করার কিছু নেই
+    reloaded = journaled(new_brain, path)
+    assert reloaded.journal_seq == len(QUESTIONS)
+    assert len(reloaded.patterns) == len(QUESTIONS)
+
+
+def test_snapshot_truncates_journal_under_traffic(new_brain, tmp_path, monkeypatch):
+    path = tmp_path / "brain.json"
+    brain = journaled(new_brain, path)
+    for i, question in enumerate(QUESTIONS[:4]):
+        brain.learn_pattern(question, f"answer {i}", "u1")
+    
+    # স্ন্যাপশট ডিস্কে লেখার সময়েই নতুন মেসেজ আসে
+    dump = json.dump
+    
+    def dump_during_traffic(*args, **kwargs):
+        brain.learn_pattern(QUESTIONS[4], "answer 4", "u1")
+        dump(*args, **kwargs)
+    
+    monkeypatch.setattr(json, "dump", dump_during_traffic)
+    brain.flush()
+    monkeypatch.setattr(json, "dump", dump)
+    
+    # স্ন্যাপশটে ঢোকা রেকর্ড মুছে গেছে, শুধু সেভের সময়ের রেকর্ডটা বাকি
+    assert brain.journal.pending == 1
+    assert brain.journal.segments() == []
+    assert len(path.with_suffix(".journal").read_text(encoding="utf-8").splitlines()) == 1
+    crash(brain)
+    
+    restored = journaled(new_brain, path)
+    assert len(restored.patterns) == len(QUESTIONS)
+    assert restored.journal_seq == len(QUESTIONS)
+    assert restored.journal.pending == 1
+
+
+def test_torn_tail_record_is_cut(new_brain, tmp_path):
+    path = tmp_path / "brain.json"
+    brain = journaled(new_brain, path)
+    for i, question in enumerate(QUESTIONS[:3]):
+        brain.learn_pattern(question, f"answer {i}", "u1")
+    crash(brain)
+    
+    journal_path = path.with_suffix(".journal")
+    intact_size = journal_path.stat().st_size
+    with open(journal_path, "a", encoding="utf-8") as f:
+        f.write('{"op":"learn","q":"half writ')
+    
+    restored = journaled(new_brain, path)
+    assert len(restored.patterns) == 3
+    assert journal_path.stat().st_size == intact_size
@@ -0,0 +1,80 @@
+"""ব্রেইন সেভ/লোড - write-behind ফ্লাশ, JSON ও বাইনারি ফরম্যাট"""
+import AI_BRAIN_FORMAT
+
+LESSONS = [("kemon acho bondhu", "valo achi"), ("tomar naam ki", "ami rana bot"),
+           ("aaj weather kemon", "rodela din"), ("kemon acho bondhu", "onek valo")]
+
+
+def teach(brain):
+    for question, response in LESSONS:
+        brain.learn_pattern(question, response, "u1")
+
+
+def test_write_behind_flush_survives_reload(new_brain, tmp_path):
+    path = tmp_path / "brain.json"
+    brain = new_brain(path, write_interval=3600, write_every=10**6)
+    teach(brain)
+    assert brain._pending() == len(LESSONS)
+    brain.close()
+    
+    reloaded = new_brain(path, write_behind=False)
+    assert len(reloaded.patterns) == 3
+    assert reloaded.find_top_k("kemon acho bondhu", k=1)[0]["responses"] == ["valo achi", "onek valo"]
+    assert len(reloaded.vocab) == len(brain.vocab)
+
+
+def test_close_without_save_discards_pending(new_brain, tmp_path):
+    path = tmp_path / "brain.json"
+    brain = new_brain(path, write_interval=3600, write_every=10**6)
+    teach(brain)
+    brain.close(save=False)
+    
+    assert not path.exists()
+
+
+def test_binary_format_roundtrip(new_brain, tmp_path):
+    json_path = tmp_path / "brain.json"
+    brain = new_brain(json_path, write_behind=False)
+    teach(brain)
+    
+    binary_path = tmp_path / "brain.bin"
+    AI_BRAIN_FORMAT.json_to_binary(json_path, binary_path)
+    
+    for backend in ("dict", "matrix"):
+        mapped = new_brain(binary_path, backend=backend, write_behind=False)
+        assert len(mapped.patterns) == len(brain.patterns)
+        for question, _ in LESSONS:
+            assert mapped._best_match(mapped._text_to_vector(question)) == \
+                brain._best_match(brain._text_to_vector(question))
+    
+    # বাইনারি ব্রেইনে নতুন শেখা সেভ হয়ে আবার লোড হয়
+    mapped = new_brain(binary_path, write_behind=False)
+    mapped.learn_pattern("notun proshno eta", "notun uttor", "u2")
+    reloaded = new_brain(binary_path, write_behind=False)
+    assert reloaded.find_top_k("notun proshno eta", k=1)[0]["responses"] == ["notun uttor"]
+
+
+def test_binary_save_decodes_only_changed_patterns(new_brain, tmp_path, monkeypatch):
+    json_path = tmp_path / "brain.json"
+    teach(new_brain(json_path, write_behind=False))
+    binary_path = tmp_path / "brain.bin"
+    AI_BRAIN_FORMAT.json_to_binary(json_path, binary_path)
+    
+    decoded = []
+    pattern = AI_BRAIN_FORMAT.MappedBrain.pattern
+    monkeypatch.setattr(AI_BRAIN_FORMAT.MappedBrain, "pattern",
+                        lambda mapped, row: decoded.append(row) or pattern(mapped, row))
+    
+    # লোড আর সেভে শুধু বদলানো প্যাটার্ন ডিকোড হয়, বাকি রো ফাইল থেকে হুবহু কপি
+    mapped = new_brain(binary_path, write_behind=False)
+    assert decoded == []
+    mapped.learn_pattern("kemon acho bondhu", "darun", "u2")
+    mapped.learn_pattern("notun proshno eta", "notun uttor", "u2")
+    assert len(set(decoded)) == 1
+    
+    monkeypatch.setattr(AI_BRAIN_FORMAT.MappedBrain, "pattern", pattern)
+    reloaded = new_brain(binary_path, write_behind=False)
+    assert len(reloaded.patterns) == 4
+    assert reloaded.find_top_k("kemon acho bondhu", k=1)[0]["responses"] == ["valo achi", "onek valo", "darun"]
+    assert reloaded.find_top_k("tomar naam ki", k=1)[0]["responses"] == ["ami rana bot"]
+    assert reloaded.find_top_k("notun proshno eta", k=1)[0]["responses"] == ["notun uttor"]
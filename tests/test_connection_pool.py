@@ -0,0 +1,93 @@
+"""ConnectionPool - পুনর্ব্যবহার, ওভারফ্লো, টাইমআউট, হেলথ চেক"""
+import threading
+import time
+
+import pytest
+
+from DATABASE_MANAGER import ConnectionPool, PoolTimeout, ThreadLocalPool
+
+
+class FakeConnection:
+    def __init__(self, healthy=True):
+        self.healthy = healthy
+        self.closed = False
+    
+    def cursor(self):
+        if not self.healthy:
+            raise RuntimeError("server closed the connection")
+        return self
+    
+    def execute(self, sql):
+        pass
+    
+    def fetchall(self):
+        return [(1,)]
+    
+    def rollback(self):
+        pass
+    
+    def close(self):
+        self.closed = True
+
+
+def test_released_connection_is_reused():
+    pool = ConnectionPool(FakeConnection, pool_size=2, max_overflow=0, timeout=1)
+    first = pool.checkout()
+    pool.release(first)
+    
+    assert pool.checkout() is first
+    assert pool.stats()["created"] == 1
+
+
+def test_overflow_connections_close_on_release():
+    pool = ConnectionPool(FakeConnection, pool_size=1, max_overflow=1, timeout=1)
+    base, overflow = pool.checkout(), pool.checkout()
+    pool.release(overflow)
+    pool.release(base)
+    
+    assert overflow.closed and not base.closed
+    assert pool.stats()["idle"] == 1
+
+
+def test_checkout_times_out_when_exhausted():
+    pool = ConnectionPool(FakeConnection, pool_size=1, max_overflow=0, timeout=0.05)
+    pool.checkout()
+    
+    with pytest.raises(PoolTimeout):
+        pool.checkout()
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_waiter_gets_connection_released_by_other_thread():
+    pool = ConnectionPool(FakeConnection, pool_size=1, max_overflow=0, timeout=2)
+    held = pool.checkout()
+    threading.Timer(0.05, pool.release, args=(held,)).start()
+    
+    assert pool.checkout() is held
+    assert pool.stats()["waits"] == 1
+
+
+def test_stale_connection_replaced_after_failed_health_check():
+    pool = ConnectionPool(FakeConnection, pool_size=1, max_overflow=0, timeout=1, health_check_interval=0)
+    broken = pool.checkout()
+    broken.healthy = False
+    pool.release(broken)
+    time.sleep(0.01)
+    
+    fresh = pool.checkout()
+    assert fresh is not broken and broken.closed
+    assert pool.stats()["health_checks"] == 1
+
+
+def test_thread_local_pool_gives_each_thread_its_own_connection():
+    pool = ThreadLocalPool(FakeConnection)
+    main = pool.checkout()
+    seen = []
+    worker = threading.Thread(target=lambda: seen.append(pool.checkout()))
+    worker.start()
+    worker.join()
+    
+    assert pool.checkout() is main
+    assert seen[0] is not main
+    pool.close_all()
+    assert main.closed and seen[0].closed
@@ -0,0 +1,128 @@
+"""CreditEngine - কনকারেন্ট ডেবিটে কোনো ডেবিট হারায় না/দুবার কাটে না, ক্যাশে ও লেজার মেলে"""
+import random
+import threading
+
+import pytest
+
+from DATABASE_MANAGER import DatabaseManager
+
+START_BALANCE = 20
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager("sqlite", {"path": str(tmp_path / "credits.db"), "ledger_flush_ms": 20})
+    yield db
+    db.close()
+
+
+def make_users(db, count):
+    user_ids = []
+    for index in range(count):
+        user_id = db.create_user(700000 + index, f"credit_{index}")
+        db.register_bot(user_id, f"credit-token-{index}", 700000 + index)
+        db.add_credit(user_id, START_BALANCE, "Test start", "bonus")
+        user_ids.append(user_id)
+    return user_ids
+
+
+def ledger_totals(db, user_id):
+    with db.transaction() as cursor:
+        cursor.execute("""
+        SELECT transaction_type, SUM(amount) AS total, COUNT(*) AS n FROM credits
+        WHERE user_id = %s GROUP BY transaction_type
+        """, (user_id,))
+        return {row["transaction_type"]: (row["total"], row["n"]) for row in cursor.fetchall()}
+
+
+def stored_balance(db, user_id):
+    with db.transaction() as cursor:
+        cursor.execute("SELECT credit_balance FROM user_bots WHERE user_id = %s", (user_id,))
+        return cursor.fetchone()["credit_balance"]
+
+
+def test_concurrent_debits_never_lost_or_doubled(db):
+    user_ids = make_users(db, 4)
+    debited = {user_id: 0 for user_id in user_ids}
+    credited = {user_id: 0 for user_id in user_ids}
+    returned = []
+    lock = threading.Lock()
+    
+    def worker(seed):
+        rng = random.Random(seed)
+        for step in range(150):
+            user_id = rng.choice(user_ids)
+            if step % 10 == 9:
+                db.credit_engine.credit(user_id, 3, "Test top-up")
+                with lock:
+                    credited[user_id] += 3
+                continue
+            
+            balance = db.credit_engine.debit(user_id, 1, "Test debit")
+            if balance is not None:
+                with lock:
+                    debited[user_id] += 1
+                    returned.append(balance)
+    
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    db.credit_engine.ledger.flush()
+    
+    # মোট চাহিদা ব্যালেন্সের চেয়ে বেশি, তাই কিছু ডেবিট ফেরত যাওয়ার কথা
+    assert db.credit_stats()["rejected"] > 0
+    assert min(returned) >= 0
+    
+    for user_id in user_ids:
+        balance = stored_balance(db, user_id)
+        ledger = ledger_totals(db, user_id)
+        
+        assert balance == START_BALANCE + credited[user_id] - debited[user_id]
+        assert balance >= 0
+        assert sum(total for total, _ in ledger.values()) == balance
+        assert ledger.get("usage", (0, 0))[1] == debited[user_id]
+        assert db.get_user_balance(user_id) == balance
+
+
+def test_insufficient_balance_is_rejected(db):
+    user_id, = make_users(db, 1)
+    
+    assert db.use_credit(user_id, START_BALANCE) is True
+    assert db.use_credit(user_id, 1) is False
+    assert db.get_user_balance(user_id) == 0
+
+
+def test_rolled_back_outer_transaction_leaves_no_phantom_balance(db):
+    user_id, = make_users(db, 1)
+    assert db.get_user_balance(user_id) == START_BALANCE
+    
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            db.credit_engine.credit(user_id, 100, "Never committed")
+            db.credit_engine.debit(user_id, 5)
+            raise RuntimeError("abort")
+    db.credit_engine.ledger.flush()
+    
+    assert stored_balance(db, user_id) == START_BALANCE
+    assert db.get_user_balance(user_id) == START_BALANCE
+    assert "usage" not in ledger_totals(db, user_id)
+
+
+def test_bad_ledger_row_does_not_block_later_rows(db):
+    user_id, = make_users(db, 1)
+    # amount NOT NULL - এই লেজার সারি কখনো লেখা যাবে না
+    db.credit_engine.ledger.add((user_id, None, "usage", None, "Broken", 0))
+    for _ in range(3):
+        db.credit_engine.debit(user_id, 1, "Test debit")
+    db.credit_engine.ledger.flush()
+    
+    balance = stored_balance(db, user_id)
+    ledger = ledger_totals(db, user_id)
+    
+    assert balance == START_BALANCE - 3
+    assert ledger["usage"] == (-3, 3)
+    assert sum(total for total, _ in ledger.values()) == balance
+    assert db.credit_engine.ledger.stats()["pending"] == 0
+    assert db.credit_engine.ledger.stats()["dead_letter"] == 1
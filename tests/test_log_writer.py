@@ -0,0 +1,48 @@
+"""BatchWriter - গ্রুপ কমিটে খারাপ সারি বাকিদের আটকায় না"""
+import pytest
+
+from DATABASE_MANAGER import DatabaseManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager("sqlite", {"path": str(tmp_path / "logs.db"), "log_flush_ms": 10**6})
+    yield db
+    db.close()
+
+
+def test_poison_row_goes_to_dead_letter(db):
+    user_id = db.create_user(800001, "logger")
+    db.audit_writer.flush()
+    db.log_audit(user_id, "first")
+    db.log_audit(user_id, None)  # action NOT NULL - এই সারি কখনো লেখা যাবে না
+    db.log_audit(user_id, "second")
+    
+    assert db.audit_writer.flush() == 2
+    db.log_audit(user_id, "third")
+    assert db.audit_writer.flush() == 1
+    
+    actions = {row["action"] for row in db.get_audit_logs(user_id)}
+    assert {"first", "second", "third"} <= actions
+    
+    stats = db.audit_writer.stats()
+    assert stats["pending"] == 0
+    assert stats["dead_letter"] == 1
+    assert stats["dropped"] == 1
+    assert db.audit_writer.dead_letter[0][0][1] is None
+
+
+def test_failed_batch_is_kept_when_no_row_can_be_written(db):
+    user_id = db.create_user(800002, "logger")
+    db.audit_writer.flush()
+    db.log_audit(user_id, None)
+    
+    assert db.audit_writer.flush() == 0
+    assert db.audit_writer.stats()["pending"] == 1
+    assert db.audit_writer.stats()["dead_letter"] == 0
+    
+    # পরের ব্যাচে ভালো সারি থাকলে খারাপটা আলাদা হয়ে dead-letter এ যায়
+    db.log_audit(user_id, "good")
+    assert db.audit_writer.flush() == 1
+    assert db.audit_writer.stats()["pending"] == 0
+    assert db.audit_writer.stats()["dead_letter"] == 1
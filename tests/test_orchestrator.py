@@ -0,0 +1,85 @@
+"""AIOrchestrator - ক্যাশে ও hot reload"""
+import pytest
+
+import AI_BRAIN
+from AI_BRAIN import AIOrchestrator
+
+
+@pytest.fixture
+def orchestrator(tmp_path):
+    orchestrator = AIOrchestrator({"brain": {"memory_path": str(tmp_path / "brain.json"), "write_behind": False}})
+    yield orchestrator
+    orchestrator.brain.close(save=False)
+
+
+def test_reload_drops_entries_but_keeps_cache_counters(orchestrator):
+    orchestrator.teach_ai("u1", "kemon acho bondhu", "valo achi")
+    orchestrator.process_query("u1", "kemon acho bondhu")
+    orchestrator.process_query("u1", "kemon acho bondhu")
+    before = orchestrator.response_cache.stats()
+    assert before["hits"] == 1 and before["size"] == 1
+    
+    orchestrator.reload_brain(wait=True)
+    
+    after = orchestrator.response_cache.stats()
+    assert orchestrator.reloads == 1
+    assert after["size"] == 0
+    assert (after["hits"], after["misses"]) == (before["hits"], before["misses"])
+    assert orchestrator.process_query("u1", "kemon acho bondhu")["response"] == "valo achi"
+
+
+def test_same_file_reload_keeps_unflushed_learns(tmp_path):
+    path = tmp_path / "brain.json"
+    orchestrator = AIOrchestrator({"brain": {"memory_path": str(path), "write_interval": 3600,
+                                             "write_every": 10**6}})
+    try:
+        orchestrator.teach_ai("u1", "kemon acho bondhu", "valo achi")
+        assert orchestrator.brain._pending() == 1
+        
+        orchestrator.reload_brain(wait=True)
+        
+        assert orchestrator.process_query("u1", "kemon acho bondhu")["response"] == "valo achi"
+        assert "kemon acho bondhu" in path.read_text(encoding="utf-8")
+    finally:
+        orchestrator.brain.close(save=False)
+
+
+def test_learns_during_same_file_reload_reach_new_brain(orchestrator, monkeypatch):
+    orchestrator.teach_ai("u1", "kemon acho bondhu", "valo achi")
+    old = orchestrator.brain
+    
+    # নতুন ব্রেইন ফাইল পড়ে ফেলার পর, সোয়াপের আগে পুরনো ব্রেইন একটা নতুন প্রশ্ন শেখে
+    neural_ai = AI_BRAIN.NeuralAI
+    
+    def loading(**options):
+        brain = neural_ai(**options)
+        orchestrator.teach_ai("u2", "tomar naam ki", "ami rana bot")
+        return brain
+    
+    monkeypatch.setattr(AI_BRAIN, "NeuralAI", loading)
+    orchestrator.reload_brain(wait=True)
+    
+    assert orchestrator.brain is not old
+    assert orchestrator.process_query("u2", "tomar naam ki")["response"] == "ami rana bot"
+    
+    reloaded = neural_ai(memory_path=orchestrator.brain.memory_path, write_behind=False)
+    try:
+        assert len(reloaded.patterns) == 2
+    finally:
+        reloaded.close(save=False)
+
+
+def test_closed_brain_stops_persisting(new_brain, tmp_path):
+    path = tmp_path / "brain.json"
+    brain = new_brain(path, journal=True, snapshot_every=10**6, snapshot_interval=3600)
+    brain.learn_pattern("kemon acho bondhu", "valo achi", "u1")
+    brain.close()
+    
+    journal_path = path.with_suffix(".journal")
+    journal_path.unlink()
+    snapshot = path.read_bytes()
+    brain.learn_pattern("tomar naam ki", "ami rana bot", "u1")
+    brain.flush()
+    
+    assert not journal_path.exists()
+    assert path.read_bytes() == snapshot
@@ -0,0 +1,57 @@
+"""SmartCache - LRU, TTL ও ট্যাগ ইনভ্যালিডেশন"""
+from utilities.CACHE_SYSTEM import SmartCache
+
+
+def test_invalidate_removes_every_key_for_tag():
+    cache = SmartCache(max_size=10)
+    cache.set("a", 1, tags=["pat:x", "tok:kemon"])
+    cache.set("b", 2, tags=["tok:kemon"])
+    cache.set("c", 3, tags=["pat:y"])
+    
+    assert cache.invalidate("tok:kemon") == 2
+    assert cache.get("a") is None and cache.get("b") is None
+    assert cache.get("c") == 3
+    assert "tok:kemon" not in cache.tags and "pat:x" not in cache.tags
+    assert cache.stats()["invalidations"] == 2
+
+
+def test_lru_eviction_drops_tag_links():
+    cache = SmartCache(max_size=2)
+    cache.set("a", 1, tags=["t"])
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+    
+    # c এর পরে a বাদ পড়লে তার ট্যাগ লিংকও মুছে যায়
+    cache.set("d", 4)
+    cache.set("e", 5)
+    assert "a" not in cache.cache
+    assert "t" not in cache.tags
+
+
+def test_ttl_expiry():
+    cache = SmartCache(max_size=2, ttl=-1)
+    cache.set("a", 1, tags=["t"])
+    
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+    assert not cache.tags
+
+
+def test_clear_can_keep_counters():
+    cache = SmartCache(max_size=4)
+    cache.set("a", 1, tags=["t"])
+    cache.get("a")
+    cache.get("missing")
+    
+    cache.clear(reset_stats=False)
+    assert len(cache) == 0 and not cache.tags
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    assert cache.stats()["invalidations"] == 1
+    
+    cache.clear()
+    assert cache.stats()["hits"] == 0
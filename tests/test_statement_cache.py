@@ -0,0 +1,69 @@
+"""Dialect রূপান্তর ও StatementCache - PostgreSQL PREPARE/EXECUTE/DEALLOCATE, SQLite হিসাব"""
+from DATABASE_MANAGER import DatabaseManager, Dialect, StatementCache, StatementStats
+
+
+class RecordingCursor:
+    def __init__(self):
+        self.calls = []
+    
+    def execute(self, sql, params=()):
+        self.calls.append((sql, tuple(params)))
+
+
+def test_dialect_rewrites():
+    sql = "INSERT INTO t (a, b) VALUES (%s, %s) ON CONFLICT (a) DO UPDATE SET b = 1 RETURNING id"
+    
+    assert Dialect("sqlite").sql("SELECT * FROM t WHERE a = %s") == "SELECT * FROM t WHERE a = ?"
+    mysql = Dialect("mysql").sql(sql)
+    assert "RETURNING" not in mysql and "ON DUPLICATE KEY UPDATE" in mysql
+    assert Dialect("postgresql").numbered("SELECT %s, '%%', %s") == "SELECT $1, '%', $2"
+    assert Dialect("sqlite").ddl("id SERIAL PRIMARY KEY") == "id INTEGER PRIMARY KEY AUTOINCREMENT"
+
+
+def test_postgresql_prepares_once_and_deallocates_evicted():
+    stats = StatementStats()
+    cache = StatementCache(Dialect("postgresql"), 2, stats)
+    cursor = RecordingCursor()
+    
+    cache.execute(cursor, "SELECT * FROM users WHERE id = %s", (1,))
+    cache.execute(cursor, "SELECT * FROM users WHERE id = %s", (2,))
+    assert cursor.calls == [
+        ("PREPARE rb_stmt_0 AS SELECT * FROM users WHERE id = $1", ()),
+        ("EXECUTE rb_stmt_0 (%s)", (1,)),
+        ("EXECUTE rb_stmt_0 (%s)", (2,)),
+    ]
+    
+    cache.execute(cursor, "SELECT 1 FROM a")
+    cache.execute(cursor, "SELECT 1 FROM b")
+    assert ("DEALLOCATE rb_stmt_0", ()) in cursor.calls
+    assert stats.to_dict() == {"hits": 1, "misses": 3, "evictions": 1, "hit_rate": 0.25, "estimated": False}
+
+
+def test_ddl_and_mysql_bypass_cache():
+    stats = StatementStats()
+    cursor = RecordingCursor()
+    StatementCache(Dialect("postgresql"), 10, stats).execute(cursor, "CREATE TABLE t (a INT)")
+    StatementCache(Dialect("mysql"), 10, stats).execute(cursor, "SELECT * FROM t WHERE a = %s", (1,))
+    
+    assert cursor.calls == [("CREATE TABLE t (a INT)", ()), ("SELECT * FROM t WHERE a = %s", (1,))]
+    assert stats.to_dict()["misses"] == 0
+
+
+def test_sqlite_counts_hits_and_runs_rewritten_sql():
+    stats = StatementStats()
+    cache = StatementCache(Dialect("sqlite"), 10, stats)
+    cursor = RecordingCursor()
+    for user_id in (1, 2, 3):
+        cache.execute(cursor, "SELECT * FROM users WHERE id = %s", (user_id,))
+    
+    assert all(sql == "SELECT * FROM users WHERE id = ?" for sql, _ in cursor.calls)
+    assert stats.to_dict()["hits"] == 2
+
+
+def test_sqlite_hit_rate_is_marked_estimated(tmp_path):
+    db = DatabaseManager("sqlite", {"path": str(tmp_path / "stmt.db")})
+    try:
+        db.get_user(1)
+        assert db.statement_cache_stats()["estimated"] is True
+    finally:
+        db.close()
@@ -1,9 +1,10 @@
 """
 💾 INTELLIGENT CACHE SYSTEM
-LRU cache with auto-expiration
+LRU cache with auto-expiration and tag-based invalidation
 """
 
 import time
+import threading
 from collections import OrderedDict
 
 class SmartCache:
@@ -13,46 +14,106 @@ class SmartCache:
         self.ttl = ttl  # Time to live in seconds
         self.hits = 0
         self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        
+        # ট্যাগ → কী, যাতে একটা উৎস বদলালে তার সব এন্ট্রি একসাথে মোছা যায়
+        self.tags = {}
+        self.key_tags = {}
+        self._lock = threading.RLock()
     
     def get(self, key):
         """ভ্যালু পেতে"""
-        if key not in self.cache:
-            self.misses += 1
-            return None
-        
-        value, timestamp = self.cache[key]
-        
-        # TTL চেক
-        if time.time() - timestamp > self.ttl:
-            del self.cache[key]
-            self.misses += 1
-            return None
-        
-        # LRU: শেষে নিয়ে যান
-        self.cache.move_to_end(key)
-        self.hits += 1
-        return value
+        with self._lock:
+            if key not in self.cache:
+                self.misses += 1
+                return None
+            
+            value, timestamp = self.cache[key]
+            
+            # TTL চেক
+            if time.time() - timestamp > self.ttl:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            
+            # LRU: শেষে নিয়ে যান
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return value
     
-    def set(self, key, value):
+    def set(self, key, value, tags=()):
         """ভ্যালু সেট"""
-        if len(self.cache) >= self.max_size:
-            # LRU: প্রথম আইটেম রিমুভ
-            self.cache.popitem(last=False)
-        
-        self.cache[key] = (value, time.time())
+        with self._lock:
+            if key in self.cache:
+                self._remove(key)
+            elif len(self.cache) >= self.max_size:
+                # LRU: প্রথম আইটেম রিমুভ
+                self._remove(next(iter(self.cache)))
+                self.evictions += 1
+            
+            self.cache[key] = (value, time.time())
+            
+            if tags:
+                self.key_tags[key] = tuple(tags)
+                for tag in tags:
+                    self.tags.setdefault(tag, set()).add(key)
     
     def delete(self, key):
         """ভ্যালু ডিলিট"""
-        if key in self.cache:
-            del self.cache[key]
-            return True
-        return False
+        with self._lock:
+            if key in self.cache:
+                self._remove(key)
+                return True
+            return False
     
-    def clear(self):
-        """ক্যাশে ক্লিয়ার"""
-        self.cache.clear()
-        self.hits = 0
-        self.misses = 0
+    def invalidate(self, *tags):
+        """ট্যাগের সাথে যুক্ত সব এন্ট্রি ডিলিট"""
+        removed = 0
+        
+        with self._lock:
+            for tag in tags:
+                for key in list(self.tags.get(tag, ())):
+                    self._remove(key)
+                    removed += 1
+            
+            self.invalidations += removed
+        
+        return removed
+    
+    def _remove(self, key):
+        """এন্ট্রি ও তার ট্যাগ লিংক মুছে ফেলা"""
+        del self.cache[key]
+        
+        for tag in self.key_tags.pop(key, ()):
+            keys = self.tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tags[tag]
+    
+    def clear(self, reset_stats=True):
+        """ক্যাশে ক্লিয়ার - reset_stats=False হলে কাউন্টার থাকে, মোছা এন্ট্রি invalidations এ গোনা"""
+        with self._lock:
+            removed = len(self.cache)
+            self.cache.clear()
+            self.tags.clear()
+            self.key_tags.clear()
+            
+            if not reset_stats:
+                self.invalidations += removed
+                return
+            
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.expirations = 0
+            self.invalidations = 0
+    
+    def __len__(self):
+        return len(self.cache)
     
     def stats(self):
         """স্ট্যাটিস্টিক্স"""
@@ -60,6 +121,9 @@ class SmartCache:
             "size": len(self.cache),
             "hits": self.hits,
             "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
             "hit_rate": self.hits / (self.hits + self.misses) if (self.hits + self.misses) > 0 else 0,
             "max_size": self.max_size
-        }
\ No newline at end of file
+        }